@@ -0,0 +1,51 @@
+"""
+Compare JSON decoders on an api/locations payload, full and filtered by user
+
+Usage:
+    python benchmarks/decoding.py [records]
+"""
+import json
+import sys
+import timeit
+
+from whoopy.decoding import decode_locations, msgspec, orjson, resolve_decoder
+
+
+def _payload(records):
+    return json.dumps({"locations": [{
+        "latitude": 35.0 + i * 1e-4,
+        "longitude": 139.0 + i * 1e-4,
+        "speed": 1.25,
+        "horizontal_accuracy": 5.0,
+        "battery_level": 0.8,
+        "battery_state": 3,
+        "updated_at": "2024-01-01T12:00:00.000+09:00",
+        "stayed_at": None,
+        "user": {"id": i, "username": f"user{i}", "display_name": f"User {i}",
+                 "profile_image": f"profile_images/images/{i}.jpeg"},
+    } for i in range(records)]}).encode()
+
+
+def _time(func, number=20):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000
+
+
+def main(records=10000):
+    body = _payload(records)
+    target = records // 2
+    names = ['json'] + [name for name, mod in (('orjson', orjson), ('msgspec', msgspec)) if mod is not None]
+
+    print(f"{records} records, {len(body) / 1024:.0f} KiB")
+    for name in names:
+        loads = resolve_decoder(name)
+        full = _time(lambda: loads(body))
+        print(f"{name:<8} full decode      {full:8.2f} ms")
+
+    print(f"{'':<8} dicts, user_id    {_time(lambda: decode_locations(body, None, target)):8.2f} ms"
+          f"  ({'msgspec partial' if msgspec is not None else 'json'})")
+    print(f"{'':<8} models, all       {_time(lambda: decode_locations(body, None, typed=True)):8.2f} ms"
+          f"  ({'msgspec typed' if msgspec is not None else 'json + from_dict'})")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
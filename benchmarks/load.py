@@ -0,0 +1,123 @@
+"""
+End-to-end load benchmark against the bundled mock Whoo server
+
+Starts ``whoopy.mock_server.MockWhooServer`` with the given latency and
+payload size, then drives each client method with the sync client
+(sequential and from a thread pool) and, if httpx is installed, with
+AsyncWhoopy. Reports p50/p95/p99 latency and requests/sec per method.
+
+Usage:
+    python benchmarks/load.py [--requests 200] [--concurrency 8] [--latency 0.005]
+                              [--friends 200] [--error-rate 0.0]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from whoopy import Whoopy
+from whoopy.mock_server import MockWhooServer
+
+try:
+    from whoopy import AsyncWhoopy
+    import httpx  # noqa: F401
+except ImportError:
+    AsyncWhoopy = None
+
+
+LOCATION = {"latitude": 35.6762, "longitude": 139.6503}
+
+
+def _operations(cl):
+    return {
+        'info': cl.info,
+        'get_friends': cl.get_friends,
+        'get_locations': cl.get_locations,
+        'get_user': lambda: cl.get_user(1000, friends=True),
+        'update_location': lambda: cl.update_location(LOCATION),
+        'online': cl.online,
+        'send_message': lambda: cl.send_message('room', 'hi'),
+    }
+
+
+def _report(label, name, latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    rps = len(latencies) / elapsed if elapsed else 0.0
+    print(f'{label:<10} {name:<16} p50 {p50 * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  '
+          f'p99 {p99 * 1000:7.2f} ms  {rps:8.0f} req/s  errors {errors}')
+
+
+def _timed(func):
+    start = time.perf_counter()
+    try:
+        func()
+    except Exception:
+        return None
+    return time.perf_counter() - start
+
+
+def run_sync(server, requests, concurrency):
+    cl = Whoopy(access_token=server.token, verbose=False, base_url=server.url,
+                pool_maxsize=max(concurrency, 1))
+    with cl:
+        for name, func in _operations(cl).items():
+            for label, workers in (('sync', 1), ('threads', concurrency)):
+                start = time.perf_counter()
+                if workers == 1:
+                    results = [_timed(func) for _ in range(requests)]
+                else:
+                    with ThreadPoolExecutor(workers) as pool:
+                        results = list(pool.map(lambda _: _timed(func), range(requests)))
+                elapsed = time.perf_counter() - start
+                latencies = [r for r in results if r is not None]
+                _report(label, name, latencies, elapsed, len(results) - len(latencies))
+
+
+async def _run_async(server, requests, concurrency):
+    async with AsyncWhoopy(access_token=server.token, verbose=False, base_url=server.url,
+                           concurrency=concurrency) as cl:
+        for name, func in _operations(cl).items():
+            async def timed():
+                start = time.perf_counter()
+                try:
+                    await func()
+                except Exception:
+                    return None
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(timed() for _ in range(requests)))
+            elapsed = time.perf_counter() - start
+            latencies = [r for r in results if r is not None]
+            _report('async', name, latencies, elapsed, len(results) - len(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=200, help='Calls per method and mode')
+    parser.add_argument('--concurrency', type=int, default=8, help='Threads / async concurrency')
+    parser.add_argument('--latency', type=float, default=0.005, help='Server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random server latency')
+    parser.add_argument('--friends', type=int, default=200, help='Friends and locations served')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Injected 503 probability')
+    args = parser.parse_args()
+
+    with MockWhooServer(latency=args.latency, jitter=args.jitter, friends=args.friends,
+                        error_rate=args.error_rate) as server:
+        print(f'{args.requests} calls per method, concurrency {args.concurrency}, '
+              f'latency {args.latency * 1000:.1f} ms, {args.friends} friends')
+        run_sync(server, args.requests, args.concurrency)
+        if AsyncWhoopy is not None:
+            asyncio.run(_run_async(server, args.requests, args.concurrency))
+        else:
+            print('async      skipped (httpx not installed)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare memory held by get_locations() results: dicts vs. FriendLocation models
+
+Builds the same decoded ``api/locations`` payload, converts it the way
+get_locations(raw=True) and get_locations(raw=False) do, and reports the
+memory retained by each result with tracemalloc.
+
+Usage:
+    python benchmarks/models_memory.py [records]
+"""
+import json
+import sys
+import tracemalloc
+
+from whoopy.client import _index_locations
+from whoopy.models import FriendLocation
+
+
+def _payload(records):
+    locations = [{
+        "latitude": 35.0 + i * 1e-4,
+        "longitude": 139.0 + i * 1e-4,
+        "speed": 1.25,
+        "horizontal_accuracy": 5.0,
+        "battery_level": 0.8,
+        "battery_state": 3,
+        "updated_at": "2024-01-01T12:00:00.000+09:00",
+        "stayed_at": None,
+        "user": {"id": i, "username": f"user{i}", "display_name": f"User {i}",
+                 "profile_image": f"profile_images/images/{i}.jpeg"},
+    } for i in range(records)]
+    # Round-trip through JSON so strings are fresh objects as after response.json()
+    return json.dumps({"locations": locations})
+
+
+def _retained(build, body):
+    locations = json.loads(body)['locations']
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(locations)
+    del locations
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained
+
+
+def main(records=10000):
+    body = _payload(records)
+    _, as_dicts = _retained(_index_locations, body)
+    _, as_models = _retained(
+        lambda locs: {loc['user']['username']: FriendLocation.from_dict(loc) for loc in locs}, body)
+
+    print(f"{records} location records")
+    print(f"dicts  (raw=True)  {as_dicts / 1024 / 1024:7.2f} MiB  {as_dicts / records:6.0f} B/record")
+    print(f"models (raw=False) {as_models / 1024 / 1024:7.2f} MiB  {as_models / records:6.0f} B/record")
+    print(f"saved {(1 - as_models / as_dicts) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,91 @@
+"""
+Latency of urgent calls while bulk calls saturate a client-side rate limit
+
+Bulk threads keep calling get_user(friends=True) (one profile plus friend
+pages each) on one client while another thread sends update_location every
+``--interval`` seconds. Runs the same load with a FIFO rate limit (every
+request NORMAL, no reserve), with the default priority classes, and with
+priorities plus load shedding (small queue, overflow='shed'), then reports
+update_location p50/p95 latency, bulk requests/sec and shed calls.
+
+Usage:
+    python benchmarks/scheduler.py [--rate 50] [--bulk-threads 16] [--duration 3]
+                                   [--interval 0.1] [--latency 0.005]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from whoopy import Whoopy
+from whoopy.exceptions import QueueFullError
+from whoopy.mock_server import MockWhooServer
+from whoopy.scheduler import DEFAULT_PRIORITIES, Priority, RequestScheduler
+
+
+LOCATION = {"latitude": 35.6762, "longitude": 139.6503}
+
+
+def run(name, scheduler, server, args):
+    cl = Whoopy(access_token=server.token, verbose=False, base_url=server.url, scheduler=scheduler,
+                pool_maxsize=args.bulk_threads + 2, lazy_validation=True)
+    stop = threading.Event()
+    bulk_calls = [0]
+    shed = [0]
+    urgent = []
+
+    def bulk(offset):
+        user_id = 1000 + offset
+        while not stop.is_set():
+            try:
+                cl.get_user(user_id, friends=True)
+                bulk_calls[0] += 1
+            except QueueFullError:
+                shed[0] += 1
+                time.sleep(0.01)
+
+    def update():
+        while not stop.wait(args.interval):
+            start = time.perf_counter()
+            cl.update_location(LOCATION)
+            urgent.append(time.perf_counter() - start)
+
+    with cl:
+        threads = [threading.Thread(target=bulk, args=(i,)) for i in range(args.bulk_threads)]
+        threads.append(threading.Thread(target=update))
+        before = sum(server.requests.values())
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    served = sum(server.requests.values()) - before
+    cuts = statistics.quantiles(urgent, n=100, method='inclusive') if len(urgent) >= 2 else [0.0] * 99
+    print(f'{name:<10} update_location p50 {cuts[49] * 1000:7.1f} ms  p95 {cuts[94] * 1000:7.1f} ms  '
+          f'{served / elapsed:6.0f} requests/s  {bulk_calls[0]:4d} bulk calls  {shed[0]:4d} shed')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rate', type=float, default=50.0, help='Client-wide requests per second')
+    parser.add_argument('--bulk-threads', type=int, default=16, help='Threads making bulk calls')
+    parser.add_argument('--duration', type=float, default=3.0, help='Seconds per run')
+    parser.add_argument('--interval', type=float, default=0.1, help='Seconds between location updates')
+    parser.add_argument('--latency', type=float, default=0.005, help='Server latency in seconds')
+    args = parser.parse_args()
+
+    print(f'{args.bulk_threads} bulk threads, rate {args.rate:.0f}/s, '
+          f'update_location every {args.interval * 1000:.0f} ms')
+    fifo = {endpoint: Priority.NORMAL for endpoint in DEFAULT_PRIORITIES}
+    with MockWhooServer(latency=args.latency, friends=100, page_size=20) as server:
+        run('fifo', RequestScheduler(args.rate, priorities=fifo, reserve=0), server, args)
+        run('priority', RequestScheduler(args.rate), server, args)
+        run('shed', RequestScheduler(args.rate, max_queue=4, overflow='shed'), server, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measure per-call latency of module-level requests calls vs. the pooled session
+
+Starts a local keep-alive HTTP server that answers like ``api/my`` and times
+repeated calls made the old way (a fresh connection per call) and through
+``HTTPClient`` (one pooled keep-alive session, as used by ``Whoopy``).
+
+Usage:
+    python benchmarks/session_reuse.py [calls]
+"""
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from whoopy.utils import HTTPClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    body = json.dumps({"id": 1, "display_name": "bench"}).encode()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _time_calls(call, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(samples):7.3f} ms  "
+          f"p50 {statistics.median(samples):7.3f} ms  p95 {p95:7.3f} ms")
+    return statistics.mean(samples)
+
+
+def main(calls=500):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/api/my'
+    headers = {'Accept': 'application/json'}
+
+    try:
+        fresh = _time_calls(lambda: requests.get(url, headers=headers), calls)
+        client = HTTPClient(headers)
+        pooled = _time_calls(lambda: client.request('GET', url), calls)
+        client.close()
+    finally:
+        server.shutdown()
+
+    print(f"{calls} sequential GETs against {url}")
+    before = _report('requests.get (before)', fresh)
+    after = _report('pooled session (after)', pooled)
+    print(f"per-call latency reduction: {before - after:.3f} ms ({(1 - after / before) * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,148 @@
+"""
+Stress one shared Whoopy instance from a worker pool against the mock Whoo server
+
+Two scenarios:
+
+* ``relogin``: many threads make the first call at once with a stale token
+  taken from a token store; exactly one of them must log in again and every
+  call must succeed with the new token.
+* ``shared``: threads call info/get_friends/get_locations/get_user/
+  update_location on one client (with response cache, conditional requests,
+  single flight and metrics enabled) while another thread keeps rotating the
+  token on the server and swapping it in with email_login. No call may fail
+  and the client's request count must match the server's. Requests the
+  server rejected (sent with a token two rotations old) are reported; the
+  client retries them with the current token.
+
+Exits with status 1 if a check fails.
+
+Usage:
+    python benchmarks/thread_safety.py [--threads 32] [--calls 200] [--latency 0.002]
+                                       [--rotate-every 0.05] [--transport requests]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from whoopy import Whoopy
+from whoopy.mock_server import MockWhooServer
+from whoopy.token_store import TokenStore
+
+
+EMAIL = 'me@example.com'
+PASSWORD = 'password'
+LOCATION = {"latitude": 35.6762, "longitude": 139.6503}
+
+
+def _check(failures, name, ok, detail):
+    print(f'  {"ok  " if ok else "FAIL"} {name}: {detail}')
+    if not ok:
+        failures.append(name)
+
+
+def relogin(args, failures):
+    print(f'relogin: {args.threads} threads, first call with a stale stored token')
+    with MockWhooServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        store = TokenStore(os.path.join(tmp, 'tokens.json'))
+        store.set(EMAIL, 'stale-token')
+        cl = Whoopy(email=EMAIL, password=PASSWORD, token_store=store, lazy_validation=True,
+                    verbose=False, base_url=server.url, transport=args.transport,
+                    pool_maxsize=args.threads)
+        barrier = threading.Barrier(args.threads)
+
+        def call(_):
+            barrier.wait()
+            return cl.info()['id']
+
+        with cl, ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(lambda i: _safe(call, i), range(args.threads)))
+        errors = [r for r in results if isinstance(r, Exception)]
+        logins = server.requests['POST /api/email/login']
+        _check(failures, 'no errors', not errors, f'{len(errors)} of {len(results)} calls failed')
+        _check(failures, 'single login', logins == 1, f'{logins} logins')
+        _check(failures, 'token stored', store.get(EMAIL) == server.token, store.get(EMAIL))
+
+
+def _safe(func, *args):
+    try:
+        return func(*args)
+    except Exception as err:
+        return err
+
+
+def shared(args, failures):
+    print(f'shared: {args.threads} threads x {args.calls} calls, '
+          f'token rotated every {args.rotate_every * 1000:.0f} ms')
+    with MockWhooServer(latency=args.latency, friends=100, drift=1) as server:
+        cl = Whoopy(access_token=server.token, verbose=False, base_url=server.url,
+                    transport=args.transport, pool_maxsize=args.threads, cache=True,
+                    conditional=True, single_flight=True, metrics=True)
+        friend_ids = [user['id'] for user in server.friends[:10]]
+        calls = [
+            lambda i: cl.info()['id'] == 1,
+            lambda i: len(cl.get_friends()['friends']) == 100,
+            lambda i: len(cl.get_locations()) == 100,
+            lambda i: cl.get_user(friend_ids[i % len(friend_ids)])['id'] == friend_ids[i % len(friend_ids)],
+            lambda i: cl.update_location(LOCATION) is not None,
+        ]
+        stop = threading.Event()
+        rotations = []
+
+        def rotate():
+            while not stop.wait(args.rotate_every):
+                token = server.rotate_token()
+                cl.email_login(EMAIL, PASSWORD)
+                rotations.append(token)
+
+        rotator = threading.Thread(target=rotate)
+        start = time.perf_counter()
+        with cl:
+            rotator.start()
+            try:
+                with ThreadPoolExecutor(args.threads) as pool:
+                    results = list(pool.map(lambda i: _safe(calls[i % len(calls)], i),
+                                            range(args.threads * args.calls)))
+            finally:
+                stop.set()
+                rotator.join()
+            elapsed = time.perf_counter() - start
+            final = cl.info()['id'] == 1
+
+        errors = [r for r in results if isinstance(r, Exception)]
+        wrong = [r for r in results if r is False]
+        sent = sum(stats['requests'] for stats in cl.metrics.snapshot().values())
+        served = sum(server.requests.values())
+        print(f'  {len(results)} calls in {elapsed:.2f}s ({len(results) / elapsed:.0f} calls/s), '
+              f'{len(rotations)} token swaps, {served} requests served, '
+              f'{server.rejected} rejected and retried')
+        _check(failures, 'no errors', not errors,
+               f'{len(errors)} failed' + (f', first: {errors[0]!r}' if errors else ''))
+        _check(failures, 'consistent results', not wrong, f'{len(wrong)} unexpected results')
+        _check(failures, 'request counts match', sent == served, f'client {sent}, server {served}')
+        _check(failures, 'latest token in use', final and cl.headers['Authorization'] == f'Bearer {server.token}',
+               cl.headers['Authorization'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads', type=int, default=32, help='Threads sharing one client')
+    parser.add_argument('--calls', type=int, default=200, help='Calls per thread')
+    parser.add_argument('--latency', type=float, default=0.002, help='Server latency in seconds')
+    parser.add_argument('--rotate-every', type=float, default=0.05, help='Seconds between token swaps')
+    parser.add_argument('--transport', default='requests', help='requests, urllib3 or httpx')
+    args = parser.parse_args()
+
+    failures = []
+    relogin(args, failures)
+    shared(args, failures)
+    if failures:
+        print(f'{len(failures)} checks failed')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
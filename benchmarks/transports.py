@@ -0,0 +1,118 @@
+"""
+Compare Whoopy transport backends against the bundled mock Whoo server
+
+Runs the same calls through each backend: ``requests``, ``urllib3`` and
+``httpx`` against the HTTP/1.1 mock server, and ``http2`` (httpx with
+HTTP/2 prior knowledge) against the server started with ``http2=True``.
+Each backend is measured sequentially, from a thread pool sharing one
+client, and on get_user(friends=True), whose friend pages are fetched
+concurrently. Reports p50/p95 latency, requests/sec and the number of
+connections the server accepted.
+
+Usage:
+    python benchmarks/transports.py [--requests 300] [--concurrency 16] [--latency 0.005]
+                                    [--friends 200] [--page-size 20]
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from whoopy import Whoopy
+from whoopy.mock_server import MockWhooServer
+from whoopy.transport import HttpxTransport
+
+try:
+    import httpx  # noqa: F401
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+except ImportError:
+    h2 = None
+
+
+def _report(backend, name, latencies, elapsed, connections):
+    latencies = sorted(latencies)
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95 = cuts[49], cuts[94]
+    else:
+        p50 = p95 = latencies[0] if latencies else 0.0
+    rps = len(latencies) / elapsed if elapsed else 0.0
+    print(f'{backend:<9} {name:<20} p50 {p50 * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  '
+          f'{rps:8.0f} calls/s  new connections {connections}')
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+class _Counting:
+    """Count accepted connections by wrapping the server's get_request"""
+
+    def __init__(self, httpd):
+        self.count = 0
+        accept = httpd.get_request
+
+        def get_request():
+            self.count += 1
+            return accept()
+        httpd.get_request = get_request
+
+
+def run(backend, transport, server, args):
+    counter = _Counting(server.httpd)
+    cl = Whoopy(access_token=server.token, verbose=False, base_url=server.url, transport=transport,
+                pool_maxsize=args.concurrency, page_workers=args.concurrency)
+    with cl:
+        cl.info()
+        cases = (
+            ('info sequential', 1, cl.info, args.requests),
+            ('info threads', args.concurrency, cl.info, args.requests),
+            ('get_friends threads', args.concurrency, cl.get_friends, args.requests),
+            ('get_user pages', 1, lambda: cl.get_user(1000, friends=True), max(1, args.requests // 20)),
+        )
+        for name, workers, func, calls in cases:
+            before = counter.count
+            start = time.perf_counter()
+            if workers == 1:
+                latencies = [_timed(func) for _ in range(calls)]
+            else:
+                with ThreadPoolExecutor(workers) as pool:
+                    latencies = list(pool.map(lambda _: _timed(func), range(calls)))
+            _report(backend, name, latencies, time.perf_counter() - start, counter.count - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=300, help='Calls per case')
+    parser.add_argument('--concurrency', type=int, default=16, help='Threads sharing one client')
+    parser.add_argument('--latency', type=float, default=0.005, help='Server latency in seconds')
+    parser.add_argument('--friends', type=int, default=200, help='Friends served')
+    parser.add_argument('--page-size', type=int, default=20, help='Friends per get_user page')
+    args = parser.parse_args()
+    options = dict(latency=args.latency, friends=args.friends, page_size=args.page_size)
+
+    print(f'{args.requests} calls per case, {args.concurrency} threads, '
+          f'latency {args.latency * 1000:.1f} ms, {args.friends} friends')
+    with MockWhooServer(**options) as server:
+        for backend in ('requests', 'urllib3', 'httpx'):
+            if backend == 'httpx' and httpx is None:
+                print('httpx     skipped (httpx not installed)')
+                continue
+            run(backend, backend, server, args)
+
+    if httpx is None or h2 is None:
+        print('http2     skipped (needs httpx and h2: pip install "whoopy[http2]")')
+        return
+    with MockWhooServer(http2=True, **options) as server:
+        # Cleartext server, so HTTP/2 is used with prior knowledge instead of ALPN
+        run('http2', HttpxTransport(http2=True, http1=False), server, args)
+
+
+if __name__ == '__main__':
+    main()
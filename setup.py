@@ -10,7 +10,7 @@ setup(
     description="A Python library for interacting with the Whoo location-sharing app",
     long_description=long_description,
     long_description_content_type="text/markdown",
-    packages=find_packages(),
+    packages=find_packages(exclude=["tests", "tests.*"]),
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -20,4 +20,13 @@ setup(
     install_requires=[
         "requests>=2.31.0",
     ],
+    entry_points={
+        "console_scripts": ["whoopy=whoopy.cli:main"],
+    },
+    extras_require={
+        "async": ["httpx>=0.24.0"],
+        "http2": ["httpx[http2]>=0.24.0"],
+        "fast": ["orjson>=3.9", "msgspec>=0.18"],
+        "numpy": ["numpy>=1.21"],
+    },
 )
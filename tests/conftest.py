@@ -0,0 +1,28 @@
+"""Shared fixtures: a MockWhooServer per test and clients pointed at it."""
+import pytest
+
+from whoopy import Whoopy
+from whoopy.mock_server import MockWhooServer
+
+
+@pytest.fixture
+def server():
+    with MockWhooServer() as server:
+        yield server
+
+
+@pytest.fixture
+def make_client(server):
+    """Build Whoopy clients for ``server``; they are closed after the test"""
+    clients = []
+
+    def make(**options):
+        options.setdefault('access_token', server.token)
+        options.setdefault('lazy_validation', True)
+        options.setdefault('base_url', server.url)
+        cl = Whoopy(verbose=False, **options)
+        clients.append(cl)
+        return cl
+    yield make
+    for cl in clients:
+        cl.close()
@@ -0,0 +1,72 @@
+import asyncio
+import socket
+
+import pytest
+
+pytest.importorskip('httpx')
+
+from whoopy import AsyncWhoopy  # noqa: E402
+from whoopy.exceptions import CircuitOpenError, ServerError, TransportError  # noqa: E402
+from whoopy.mock_server import MockWhooServer  # noqa: E402
+from whoopy.retry import CircuitBreakers, RetryPolicy  # noqa: E402
+
+
+def _closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/'
+
+
+def test_refused_connection_raises_transport_error():
+    async def main():
+        async with AsyncWhoopy(verbose=False, base_url=_closed_port_url(),
+                               retry=RetryPolicy(max_retries=1, backoff=0.01)) as cl:
+            cl.token = True
+            with pytest.raises(TransportError):
+                await cl.info()
+            with pytest.raises(TransportError):
+                async for _ in cl.iter_friends():
+                    pass
+    asyncio.run(main())
+
+
+def test_transient_status_is_retried_then_raised():
+    with MockWhooServer(error_rate=1.0, error_paths=['/api/friends']) as server:
+        async def main():
+            async with AsyncWhoopy(access_token=server.token, verbose=False, base_url=server.url,
+                                   retry=RetryPolicy(max_retries=2, backoff=0.01)) as cl:
+                with pytest.raises(ServerError):
+                    await cl.get_friends()
+        asyncio.run(main())
+        assert server.requests['GET /api/friends'] == 3
+
+
+def test_circuit_breaker_opens():
+    with MockWhooServer(error_rate=1.0, error_paths=['/api/friends']) as server:
+        async def main():
+            async with AsyncWhoopy(access_token=server.token, verbose=False, base_url=server.url,
+                                   retry=False,
+                                   circuit_breaker=CircuitBreakers(failure_threshold=2, reset_timeout=60)) as cl:
+                for _ in range(2):
+                    with pytest.raises(ServerError):
+                        await cl.get_friends()
+                with pytest.raises(CircuitOpenError):
+                    await cl.get_friends()
+        asyncio.run(main())
+        assert server.requests['GET /api/friends'] == 2
+
+
+def test_iter_user_friends_reaps_prefetched_pages_on_early_stop():
+    with MockWhooServer(friends=23, page_size=5, latency=0.02) as server:
+        async def main():
+            async with AsyncWhoopy(access_token=server.token, verbose=False, base_url=server.url,
+                                   metrics=True) as cl:
+                friends = cl.iter_user_friends(5, prefetch=3)
+                assert (await friends.__anext__())['id'] == server.friends[0]['id']
+                await friends.aclose()
+                assert asyncio.all_tasks() == {asyncio.current_task()}
+                assert [user['id'] async for user in cl.iter_user_friends(5)] == \
+                    [user['id'] for user in server.friends]
+                assert cl.metrics.snapshot()['iter_user_friends']['calls'] == 2
+        asyncio.run(main())
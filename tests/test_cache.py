@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from whoopy.cache import _MISSING, ResponseCache
+from whoopy.persistent import PersistentCache
+
+
+def test_entries_expire_after_their_ttl():
+    cache = ResponseCache(ttl={'info': 0.05})
+    cache.set('info', (), {'id': 1})
+    assert cache.get('info') == {'id': 1}
+    time.sleep(0.06)
+    assert cache.get('info') is _MISSING
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2)
+    cache.set('get_user', 1, 'a')
+    cache.set('get_user', 2, 'b')
+    cache.get('get_user', 1)
+    cache.set('get_user', 3, 'c')
+    assert cache.get('get_user', 2) is _MISSING
+    assert cache.get('get_user', 1) == 'a'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_callers_get_copies():
+    cache = ResponseCache()
+    cache.set('info', (), {'id': 1})
+    cache.get('info')['id'] = 2
+    assert cache.get('info') == {'id': 1}
+
+
+def test_value_loaded_before_invalidation_is_not_stored():
+    cache = ResponseCache()
+    generation = cache.generation('get_friends')
+    cache.invalidate('get_friends')
+    cache.set('get_friends', (), 'stale', generation)
+    assert cache.get('get_friends') is _MISSING
+    # Other endpoints keep their generation
+    cache.set('info', (), 'fresh', cache.generation('info'))
+    assert cache.get('info') == 'fresh'
+
+
+def test_reads_are_served_from_the_cache(server, make_client):
+    cl = make_client(cache=True)
+    assert cl.get_friends() == cl.get_friends()
+    assert server.requests['GET /api/friends'] == 1
+
+
+@pytest.mark.parametrize('write', [
+    lambda cl: cl.update_location({'latitude': 35.0, 'longitude': 139.0}),
+    lambda cl: cl.online(),
+    lambda cl: cl.update_account(name='Renamed'),
+    lambda cl: cl.location.online(),
+    lambda cl: cl.location.update_location('35.0', '139.0', 80, '1', None, 0),
+    lambda cl: cl.profile.update_profile(name='Renamed'),
+], ids=['update_location', 'online', 'update_account', 'location.online',
+        'location.update_location', 'profile.update_profile'])
+def test_writes_invalidate_info(server, make_client, tmp_path, write):
+    cl = make_client(cache=True, persistent_cache=PersistentCache(str(tmp_path / 'cache.db'),
+                                                                  stale_after={'info': 3600.0}))
+    cl.info()
+    cl.info()
+    assert server.requests['GET /api/my'] == 2  # one for the persistent cache namespace
+    write(cl)
+    cl.info()
+    assert server.requests['GET /api/my'] == 3
+    cl.persistent_cache.close()
+
+
+@pytest.mark.parametrize('write, forgets', [
+    (lambda cl: cl.profile.update_profile(name='Renamed'), True),
+    (lambda cl: cl.profile.update_profile(username='renamed'), True),
+    (lambda cl: cl.profile.update_profile(profile_image='profile_images/images/1.jpeg'), False),
+], ids=['name', 'username', 'profile_image'])
+def test_profile_renames_forget_resolved_names(server, make_client, write, forgets):
+    cl = make_client()
+    cl.resolve_user_id('User 1000')
+    write(cl)
+    cl.resolve_user_id('User 1000')
+    assert server.requests['GET /api/friends/search'] == (2 if forgets else 1)
+
+
+def test_email_login_drops_the_in_process_cache(server, make_client):
+    cl = make_client(cache=True)
+    cl.get_friends()
+    cl.email_login('me@example.com', 'password')
+    cl.get_friends()
+    assert server.requests['GET /api/friends'] == 2
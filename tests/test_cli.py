@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+
+import pytest
+
+from whoopy import cli
+from whoopy.mock_server import MockWhooServer
+
+
+@pytest.fixture
+def daemon(server, make_client):
+    # AF_UNIX paths are short; tmp_path can exceed the limit
+    directory = tempfile.mkdtemp(prefix='whoopy')
+    daemon = cli.Daemon(make_client(), os.path.join(directory, 'd.sock'))
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    while not cli._ping(daemon.path):
+        thread.join(0.01)
+    yield daemon
+    daemon.server.shutdown()
+    thread.join(5)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_commands_go_to_the_daemon(daemon, server, capsys):
+    assert cli.main(['--socket', daemon.path, 'info']) == 0
+    assert json.loads(capsys.readouterr().out)['id'] == server.me['id']
+    assert daemon.served >= 1
+
+
+def test_matching_token_and_base_url_use_the_daemon(daemon, server, capsys):
+    served = daemon.served
+    argv = ['--socket', daemon.path, '--token', server.token, '--base-url', server.url, 'info']
+    assert cli.main(argv) == 0
+    assert daemon.served > served + 1
+
+
+def test_other_token_runs_in_process(daemon, server, capsys):
+    with MockWhooServer(token='other-token') as other:
+        argv = ['--socket', daemon.path, '--token', 'other-token', '--base-url', other.url, 'info']
+        assert cli.main(argv) == 0
+        assert other.requests['GET /api/my'] == 1
+    before = server.requests['GET /api/my']
+    assert cli.main(['--socket', daemon.path, '--token', 'bogus', '--base-url', server.url, 'info']) == 1
+    assert 'error' in capsys.readouterr().err
+    assert server.requests['GET /api/my'] == before + 1
+
+
+def test_daemon_start_refuses_other_account(daemon, server):
+    args = cli.build_parser().parse_args(['--socket', daemon.path, '--token', 'bogus', 'daemon', 'start'])
+    reply = cli._start_daemon(args)
+    assert not reply['ok'] and reply['error']['type'] == 'DaemonError'
+
+
+def test_lost_reply_is_reported_not_run_again(server, capsys):
+    directory = tempfile.mkdtemp(prefix='whoopy')
+    path = os.path.join(directory, 'd.sock')
+    received = []
+
+    class Dropping(socketserver.StreamRequestHandler):
+        def handle(self):
+            # Take the command, then hang up without replying
+            received.append(json.loads(self.rfile.readline()))
+
+    with socketserver.UnixStreamServer(path, Dropping) as dropping:
+        thread = threading.Thread(target=dropping.serve_forever, daemon=True)
+        thread.start()
+        try:
+            argv = ['--socket', path, '--token', server.token, '--base-url', server.url, 'message', '1', 'hello']
+            with pytest.MonkeyPatch.context() as patch:
+                patch.setattr(cli, '_serves', lambda *args: True)
+                assert cli.main(argv) == 1
+        finally:
+            dropping.shutdown()
+    shutil.rmtree(directory, ignore_errors=True)
+    assert [request['command'] for request in received] == ['message']
+    assert json.loads(capsys.readouterr().err)['error']['type'] == 'DaemonError'
+    assert server.requests['POST /api/rooms/1/messages'] == 0
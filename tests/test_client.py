@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from whoopy.exceptions import ServerError
+from whoopy.mock_server import MockWhooServer
+from whoopy.scheduler import Priority, RequestScheduler, priority
+
+
+@pytest.fixture
+def paged_server():
+    with MockWhooServer(friends=23, page_size=5, latency=0.01) as server:
+        yield server
+
+
+@pytest.fixture
+def paged_client(paged_server, make_client):
+    return make_client(base_url=paged_server.url, access_token=paged_server.token)
+
+
+def test_iter_user_friends_yields_every_page_in_order(paged_server, paged_client):
+    friends = list(paged_client.iter_user_friends(5, prefetch=3))
+    assert [user['id'] for user in friends] == [user['id'] for user in paged_server.friends]
+
+
+def test_iter_user_friends_is_instrumented(paged_server, make_client):
+    cl = make_client(base_url=paged_server.url, access_token=paged_server.token, metrics=True)
+    list(cl.iter_user_friends(5))
+    stats = cl.metrics.snapshot()
+    # Page requests made from the worker threads count towards the operation
+    assert list(stats) == ['iter_user_friends']
+    assert stats['iter_user_friends']['calls'] == 1
+    assert stats['iter_user_friends']['requests'] == 1 + paged_server.requests['GET /api/v2/users/5/friends']
+
+
+def test_iter_user_friends_stops_fetching_when_closed_early(paged_server, paged_client):
+    friends = paged_client.iter_user_friends(5, prefetch=2)
+    assert next(friends)['id'] == paged_server.friends[0]['id']
+    friends.close()
+    time.sleep(0.1)
+    # The first page plus the look-ahead window; nothing queued runs after close
+    assert paged_server.requests['GET /api/v2/users/5/friends'] <= 3
+
+
+def test_get_users_fetches_each_id_once_in_input_order(server, make_client):
+    cl = make_client()
+    users = cl.get_users([1003, 1001, 1003, 1002])
+    assert [user['id'] for user in users] == [1003, 1001, 1003, 1002]
+    assert server.requests['GET /api/v2/users/1003'] == 1
+    assert cl.get_users([]) == []
+
+
+def test_get_users_keeps_failures_in_place(server, make_client):
+    cl = make_client(retry=False)
+    server.error_rate, server.error_paths = 1.0, ['/api/v2/users/1002']
+    users = cl.get_users([1001, 1002])
+    assert users[0]['id'] == 1001 and isinstance(users[1], ServerError)
+
+
+def test_get_users_is_instrumented(server, make_client):
+    cl = make_client(metrics=True)
+    cl.get_users([1001, 1002, 1001])
+    stats = cl.metrics.snapshot()
+    assert stats['get_users']['calls'] == 1
+    assert stats['get_user']['calls'] == stats['get_user']['requests'] == 2
+
+
+def test_get_users_workers_keep_the_callers_priority(server, make_client):
+    scheduler = RequestScheduler(rate=None)
+    cl = make_client(scheduler=scheduler)
+    with priority(Priority.URGENT):
+        cl.get_users([1001, 1002, 1003])
+    assert scheduler.stats()['urgent']['admitted'] == 3
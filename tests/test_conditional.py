@@ -0,0 +1,29 @@
+from whoopy.conditional import ConditionalCache
+
+
+class _Response:
+    def __init__(self, etag):
+        self.headers = {'ETag': etag, 'Content-Length': '10'}
+        self.content = b'0123456789'
+
+
+def test_revalidated_bodies_are_copies():
+    cache = ConditionalCache()
+    data = {'friends': [{'id': 1}]}
+    cache.store('url', _Response('"a"'), data)
+    data['friends'].append({'id': 2})
+    first = cache.revalidated('url')
+    first['friends'][0]['id'] = 99
+    assert cache.revalidated('url') == {'friends': [{'id': 1}]}
+    assert cache.stats()['not_modified'] == 2 and cache.stats()['bytes_saved'] == 20
+
+
+def test_get_friends_results_may_be_mutated(server, make_client):
+    cl = make_client(conditional=True)
+    friends = cl.get_friends()
+    expected = [friend['id'] for friend in friends['friends']]
+    friends['friends'].clear()
+    again = cl.get_friends()
+    again['friends'][0]['id'] = -1
+    assert [friend['id'] for friend in cl.get_friends()['friends']] == expected
+    assert cl.conditional.stats()['not_modified'] == 2
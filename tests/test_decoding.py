@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from whoopy.decoding import RecordStream, decode_locations, iter_records, resolve_decoder
+
+
+BODY = json.dumps({
+    "meta": {"locations": [0], "note": "]\"[{"},
+    "locations": [2500.0, -1.5e-3, 12, 1E+2, True, None, "café ☃ \\\"x",
+                  {"user": {"id": 1, "tags": ["a", "]"]}, "latitude": 35.68},
+                  [1, [2, 3]], 0],
+    "after": 1,
+}, ensure_ascii=False).encode()
+EXPECTED = json.loads(BODY)["locations"]
+
+
+def _decode(chunks, key='locations'):
+    stream = RecordStream(key)
+    items = []
+    for chunk in chunks:
+        items += stream.feed(chunk)
+    return items + stream.end()
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+def test_any_chunking_gives_the_same_items(size):
+    chunks = [BODY[i:i + size] for i in range(0, len(BODY), size)]
+    assert _decode(chunks) == EXPECTED
+
+
+def test_every_split_point():
+    for cut in range(1, len(BODY)):
+        assert _decode([BODY[:cut], BODY[cut:]]) == EXPECTED, cut
+
+
+@pytest.mark.parametrize('pieces, expected', [
+    ([b'{"x":[2500.', b'0]}'], [2500.0]),
+    ([b'{"x":[1e', b'3]}'], [1000.0]),
+    ([b'{"x":[1e-', b'3]}'], [0.001]),
+    ([b'{"x":[-', b'7]}'], [-7]),
+    ([b'{"x":[12', b'34, 5]}'], [1234, 5]),
+])
+def test_number_cut_at_a_chunk_boundary_waits_for_its_end(pieces, expected):
+    stream = RecordStream('x')
+    assert stream.feed(pieces[0]) == []
+    assert stream.feed(pieces[1]) + stream.end() == expected
+
+
+@pytest.mark.parametrize('body', [b'{"x":[2500.]}', b'{"x":[1e]}', b'{"x":[1, 2', b'{"y":[1]}'])
+def test_invalid_or_truncated_body_raises(body):
+    with pytest.raises(ValueError):
+        _decode([body], 'x')
+
+
+def test_stops_reading_after_the_array():
+    def chunks():
+        yield b'{"x":[1,2]'
+        raise AssertionError('read past the array')
+    assert list(iter_records(chunks(), 'x')) == [1, 2]
+
+
+def test_iter_friends_streams_the_mock_body(server, make_client):
+    cl = make_client()
+    assert list(cl.iter_friends()) == cl.get_friends()['friends']
+
+
+def test_resolve_decoder():
+    assert resolve_decoder('json') is json.loads
+    assert resolve_decoder(len) is len
+    assert resolve_decoder('auto')(b'{"a": 1}') == {'a': 1}
+    with pytest.raises(ValueError):
+        resolve_decoder('yaml')
+
+
+@pytest.mark.parametrize('name', ['orjson', 'msgspec'])
+def test_optional_decoders(name):
+    pytest.importorskip(name)
+    assert resolve_decoder(name)(b'{"a": [1, "x"]}') == {'a': [1, 'x']}
+
+
+LOCATIONS = json.dumps({"locations": [
+    {"user": {"id": user_id, "username": f"user{user_id}"}, "latitude": "35.5", "longitude": 139.5,
+     "battery_level": 0.5, "battery_state": 1}
+    for user_id in (1, 2, 3)
+]}).encode()
+
+
+@pytest.mark.parametrize('user_id', [None, 2])
+@pytest.mark.parametrize('typed', [False, True])
+def test_decode_locations_uses_the_given_decoder(user_id, typed):
+    calls = []
+
+    def loads(body):
+        calls.append(body)
+        return json.loads(body)
+    expected = decode_locations(LOCATIONS, None, user_id, typed)
+    assert decode_locations(LOCATIONS, loads, user_id, typed) == expected
+    assert calls == [LOCATIONS]
+    assert len(expected) == (1 if user_id else 3)
+
+
+def test_client_get_locations_respects_the_configured_decoder(server, make_client):
+    calls = []
+
+    def loads(body):
+        calls.append(1)
+        return json.loads(body)
+    cl = make_client(decoder=loads)
+    user_id = next(iter(server.locations.values()))['user']['id']
+    assert len(cl.get_locations(user_id=user_id)) == 1
+    cl.get_locations(user_id=user_id, raw=False)
+    assert len(calls) == 2
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+import pytest
+
+from whoopy.exceptions import NotFoundError
+from whoopy.metrics import Histogram, Metrics, _operation, bind_operation, instrumented
+
+
+class _Client:
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    @instrumented('outer')
+    def outer(self, fail=False):
+        if fail:
+            raise ValueError('boom')
+        return _operation.get()
+
+    @instrumented('items')
+    def items(self):
+        yield _operation.get()
+        yield _operation.get()
+
+    @instrumented('coro')
+    async def coro(self):
+        await asyncio.sleep(0)
+        return _operation.get()
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((0.1, 1.0))
+    assert histogram.quantile(0.5) is None
+    for value in (0.05, 0.05, 0.5, 5.0):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == {0.1: 2, 1.0: 1, float('inf'): 1}
+    assert snapshot['count'] == 4 and snapshot['sum'] == pytest.approx(5.6)
+    assert snapshot['p50'] == 0.1 and snapshot['p99'] == float('inf')
+
+
+def test_instrumented_binds_the_operation_and_records_calls():
+    cl = _Client(Metrics())
+    assert cl.outer() == 'outer'
+    with pytest.raises(ValueError):
+        cl.outer(fail=True)
+    assert list(cl.items()) == ['items', 'items']
+    assert asyncio.run(cl.coro()) == 'coro'
+    assert _operation.get() is None
+    stats = cl.metrics.snapshot()
+    assert (stats['outer']['calls'], stats['outer']['failures']) == (2, 1)
+    assert stats['items']['calls'] == stats['coro']['calls'] == 1
+
+
+def test_instrumented_is_a_no_op_without_metrics():
+    assert _Client(None).outer() is None
+
+
+def test_bind_operation_carries_the_context_into_threads():
+    seen = []
+
+    @instrumented('outer')
+    def run(self):
+        plain = threading.Thread(target=lambda: seen.append(_operation.get()))
+        bound = threading.Thread(target=bind_operation(lambda: seen.append(_operation.get())))
+        for thread in (plain, bound):
+            thread.start()
+            thread.join()
+    run(_Client(Metrics()))
+    assert seen == [None, 'outer']
+
+
+def test_client_requests_are_attributed_to_operations(server, make_client):
+    cl = make_client(metrics=True, retry=False)
+    events = []
+    cl.metrics.on_request_end(events.append)
+    cl.info()
+    cl.get_friends()
+    with pytest.raises(NotFoundError):
+        cl.client.get(server.url + 'api/missing')
+    stats = cl.metrics.snapshot()
+    assert stats['info']['requests'] == stats['get_friends']['requests'] == 1
+    assert stats['get_friends']['bytes_received'] > 0
+    # Requests made outside an operation are grouped by endpoint
+    assert stats['GET /api/missing']['errors'] == {'404': 1}
+    assert [event.operation for event in events] == ['info', 'get_friends', 'GET /api/missing']
+    assert [event.status for event in events] == [200, 200, 404]
+
+
+def test_prometheus_export(server, make_client):
+    cl = make_client(metrics=True)
+    cl.info()
+    text = cl.metrics.export_prometheus()
+    assert 'whoopy_calls_total{operation="info"} 1' in text
+    assert 'whoopy_request_duration_seconds_bucket{operation="info",le="+Inf"} 1' in text
+    cl.metrics.reset()
+    assert cl.metrics.snapshot() == {}
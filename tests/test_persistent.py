@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+
+import pytest
+
+from whoopy.mock_server import MockWhooServer
+from whoopy.persistent import PersistentCache
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PersistentCache(str(tmp_path / 'cache.db'))
+    yield store
+    store.close()
+
+
+def test_fetch_stores_and_serves(store):
+    calls = []
+    load = lambda: calls.append(1) or {'friends': [1]}
+    assert store.fetch('ns', 'get_friends', (), load) == {'friends': [1]}
+    assert store.fetch('ns', 'get_friends', (), load) == {'friends': [1]}
+    assert len(calls) == 1
+    assert store.stats['hits'] == 1 and store.stats['misses'] == 1
+
+
+def test_stale_entry_is_served_and_refreshed_once(tmp_path):
+    store = PersistentCache(str(tmp_path / 'cache.db'), stale_after=0)
+    store.set('ns', 'get_friends', (), 'old')
+    loaded = threading.Event()
+    assert store.fetch('ns', 'get_friends', (), lambda: loaded.set() or 'new') == 'old'
+    assert store.fetch('ns', 'get_friends', (), lambda: 'second') == 'old'
+    store.close()
+    assert loaded.is_set()
+    assert store.get('ns', 'get_friends')[0] == 'new'
+    assert store.stats['refreshed'] == 1
+
+
+def test_load_racing_invalidation_is_not_stored(store):
+    def load():
+        store.invalidate('ns', 'get_friends')
+        return 'before the write'
+    assert store.fetch('ns', 'get_friends', (), load) == 'before the write'
+    assert store.get('ns', 'get_friends') is None
+    # Other endpoints and namespaces are unaffected
+    assert store.set('ns', 'get_user', (), 'x', store.generation('ns', 'get_user'))
+    assert store.set('other', 'get_friends', (), 'x', store.generation('other', 'get_friends'))
+
+
+def test_invalidation_from_another_process_is_seen(store):
+    other = PersistentCache(store.path)
+    try:
+        def load():
+            other.invalidate('ns')
+            return 'stale'
+        store.fetch('ns', 'get_friends', (), load)
+        assert store.get('ns', 'get_friends') is None
+    finally:
+        other.close()
+
+
+def test_refresh_racing_invalidation_is_not_stored(tmp_path):
+    store = PersistentCache(str(tmp_path / 'cache.db'), stale_after=0)
+    store.set('ns', 'get_friends', (), 'old')
+
+    def load():
+        store.invalidate('ns', 'get_friends')
+        return 'refreshed before the write'
+    store.fetch('ns', 'get_friends', (), load)
+    store.close()
+    assert store.get('ns', 'get_friends') is None
+
+
+def test_close_closes_every_thread_connection(store):
+    barrier = threading.Barrier(5)
+
+    def use():
+        store.get('ns', 'get_friends')
+        barrier.wait()
+        barrier.wait()
+    threads = [threading.Thread(target=use) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    connections = [conn for _, conn in store._connections]
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    assert len(connections) == 5
+    store.close()
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+    # Still usable after close
+    assert store.set('ns', 'get_friends', (), 1)
+
+
+def test_connections_of_finished_threads_are_closed(store):
+    thread = threading.Thread(target=store.get, args=('ns', 'get_friends'))
+    thread.start()
+    thread.join()
+    (_, finished), = [entry for entry in store._connections if entry[0] is thread]
+    other = threading.Thread(target=store.get, args=('ns', 'get_friends'))
+    other.start()
+    other.join()
+    with pytest.raises(sqlite3.ProgrammingError):
+        finished.execute('SELECT 1')
+
+
+def test_namespace_follows_the_account_not_the_token(server, make_client, tmp_path):
+    store = PersistentCache(str(tmp_path / 'cache.db'))
+    first = make_client(persistent_cache=store)
+    friends = first.get_friends()
+    calls = server.requests['GET /api/friends']
+
+    renewed = make_client(access_token=server.rotate_token(), persistent_cache=store)
+    assert renewed.get_friends() == friends
+    assert server.requests['GET /api/friends'] == calls
+
+    with MockWhooServer(friends=3) as other:
+        elsewhere = make_client(base_url=other.url, access_token=other.token, persistent_cache=store)
+        assert len(elsewhere.get_friends()['friends']) == 3
+        assert other.requests['GET /api/friends'] == 1
+        elsewhere.close()
+    store.close()
+
+
+def test_client_close_closes_owned_store(make_client, tmp_path):
+    cl = make_client(persistent_cache=str(tmp_path / 'cache.db'))
+    cl.get_friends()
+    connections = [conn for _, conn in cl.persistent_cache._connections]
+    cl.close()
+    assert connections and cl.persistent_cache._connections == []
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute('SELECT 1')
+
+
+def test_restart_serves_from_the_store_while_the_api_is_down(make_client, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    with MockWhooServer() as server:
+        first = make_client(base_url=server.url, access_token=server.token, persistent_cache=path)
+        friends = first.get_friends()
+        first.close()
+    # The server is gone: no api/my lookup, no request at all
+    restarted = make_client(base_url=server.url, access_token=server.token,
+                            persistent_cache=path, retry=False)
+    assert restarted.get_friends() == friends
+    assert restarted.persistent_cache.stats['hits'] == 1
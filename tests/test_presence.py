@@ -0,0 +1,34 @@
+import time
+
+from whoopy.presence import PresenceSession
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_heartbeats_then_offline_on_stop(server, make_client):
+    cl = make_client()
+    session = PresenceSession(cl, interval=0.05, jitter=0).start()
+    _wait(lambda: session.stats['heartbeats'] >= 3)
+    session.stop()
+    assert session.stats['offline'] == 1
+    assert server.requests['PATCH /api/user/offline'] == 1
+    assert server.requests['PATCH /api/user/online'] == session.stats['heartbeats']
+
+
+def test_failing_on_error_does_not_stop_heartbeats(make_client, caplog):
+    cl = make_client(base_url='http://127.0.0.1:9/', retry=False)
+    errors = []
+
+    def on_error(error):
+        errors.append(error)
+        raise RuntimeError('callback bug')
+    session = PresenceSession(cl, interval=0.02, jitter=0, offline_on_stop=False, on_error=on_error).start()
+    _wait(lambda: len(errors) >= 3)
+    assert session.running and session._thread.is_alive()
+    session.stop()
+    assert 'on_error callback failed' in caplog.text
@@ -0,0 +1,39 @@
+import time
+
+from whoopy.publisher import LocationPublisher
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_fixes_are_filtered_and_coalesced(server, make_client):
+    publisher = LocationPublisher(make_client(), distance=10.0, min_interval=0.2).start()
+    assert publisher.publish({'latitude': 35.0, 'longitude': 139.0})
+    _wait(lambda: publisher.stats['sent'] == 1)
+    # ~1 m away: below the distance threshold
+    assert not publisher.publish({'latitude': 35.00001, 'longitude': 139.0})
+    for step in range(1, 6):
+        assert publisher.publish({'latitude': 35.0 + step * 0.001, 'longitude': 139.0})
+    assert publisher.flush(5)
+    publisher.stop()
+    assert publisher.stats['sent'] == 2 and publisher.stats['coalesced'] == 4
+    assert server.requests['PATCH /api/user/location'] == 2
+
+
+def test_failing_on_error_does_not_stop_the_sender(make_client, caplog):
+    errors = []
+
+    def on_error(error):
+        errors.append(error)
+        raise RuntimeError('callback bug')
+    publisher = LocationPublisher(make_client(base_url='http://127.0.0.1:9/', retry=False),
+                                  min_interval=0.01, on_error=on_error).start()
+    publisher.publish({'latitude': 35.0, 'longitude': 139.0})
+    _wait(lambda: len(errors) >= 3)
+    assert publisher._thread.is_alive()
+    publisher.stop(flush=False)
+    assert 'on_error callback failed' in caplog.text
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from whoopy.exceptions import CircuitOpenError, ServerError, TransportError
+from whoopy.mock_server import MockWhooServer
+from whoopy.retry import CircuitBreakers, RetryPolicy
+
+
+FAST = RetryPolicy(max_retries=2, backoff=0.01)
+
+
+def test_idempotent_reads_are_retried(make_client):
+    with MockWhooServer(error_rate=1.0, error_paths=['/api/friends']) as server:
+        cl = make_client(base_url=server.url, access_token=server.token, retry=FAST)
+        with pytest.raises(ServerError):
+            cl.get_friends()
+        assert server.requests['GET /api/friends'] == 3
+
+
+def test_non_idempotent_writes_are_not_retried_on_server_errors(make_client):
+    with MockWhooServer(error_rate=1.0, error_status=500, error_paths=['/api/stamp_messages']) as server:
+        cl = make_client(base_url=server.url, access_token=server.token, retry=FAST)
+        with pytest.raises(ServerError):
+            cl.send_stamp(1000, 1, 1)
+        assert server.requests['POST /api/stamp_messages'] == 1
+
+
+def test_transient_errors_recover(make_client):
+    with MockWhooServer(error_rate=0.5, error_paths=['/api/my'], seed=3) as server:
+        cl = make_client(base_url=server.url, access_token=server.token,
+                         retry=RetryPolicy(max_retries=10, backoff=0.001))
+        for _ in range(10):
+            assert cl.info()['id'] == server.me['id']
+        assert server.requests['GET /api/my'] > 10
+
+
+def test_connection_errors_are_typed(make_client):
+    cl = make_client(base_url='http://127.0.0.1:9/', retry=False)
+    with pytest.raises(TransportError):
+        cl.info()
+
+
+def test_breaker_opens_then_lets_a_trial_through(make_client):
+    with MockWhooServer(error_rate=1.0, error_paths=['/api/friends']) as server:
+        cl = make_client(base_url=server.url, access_token=server.token, retry=False,
+                         circuit_breaker=CircuitBreakers(failure_threshold=2, reset_timeout=0.1))
+        for _ in range(2):
+            with pytest.raises(ServerError):
+                cl.get_friends()
+        with pytest.raises(CircuitOpenError):
+            cl.get_friends()
+        assert server.requests['GET /api/friends'] == 2
+        # Other endpoints keep working
+        assert cl.info()['id'] == server.me['id']
+
+        server.error_rate = 0.0
+        time.sleep(0.12)
+        assert 'friends' in cl.get_friends()
+        assert cl.client.breakers.states()['GET /api/friends'] == 'closed'
+
+
+@pytest.mark.parametrize('write, path', [
+    (lambda cl: cl.location.online(), 'PATCH /api/user/online'),
+    (lambda cl: cl.location.update_location('35.0', '139.0', 80, '1', None, 0), 'PATCH /api/user/location'),
+    (lambda cl: cl.profile.update_profile(name='Renamed'), 'PATCH /api/user'),
+], ids=['location.online', 'location.update_location', 'profile.update_profile'])
+def test_helper_patches_are_retried_like_the_client_methods(make_client, write, path):
+    with MockWhooServer(error_rate=1.0, error_paths=['/api/user']) as server:
+        cl = make_client(base_url=server.url, access_token=server.token, retry=FAST)
+        with pytest.raises(ServerError):
+            write(cl)
+        assert server.requests[path] == 3
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from whoopy.exceptions import QueueFullError
+from whoopy.mock_server import MockWhooServer
+from whoopy.scheduler import Priority, RequestScheduler, priority
+
+URL = 'http://127.0.0.1/'
+
+
+def _start(scheduler, method, path, admitted, level=None):
+    def run():
+        try:
+            if level is None:
+                scheduler.acquire(method, URL + path)
+            else:
+                with priority(level):
+                    scheduler.acquire(method, URL + path)
+        except QueueFullError:
+            admitted.append(('shed', path))
+        else:
+            admitted.append(('sent', path))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_queued(scheduler, count):
+    deadline = time.monotonic() + 5
+    while sum(level['waiting'] for level in scheduler.stats().values()) < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.002)
+
+
+def test_rate_limit_spaces_requests():
+    scheduler = RequestScheduler(rate=50, burst=1, reserve=0)
+    start = time.monotonic()
+    for _ in range(6):
+        scheduler.acquire('GET', URL + 'api/my')
+    # The first goes at once, then one every 20 ms
+    assert time.monotonic() - start >= 0.09
+
+
+def test_urgent_requests_overtake_queued_bulk_reads():
+    scheduler = RequestScheduler(rate=20, burst=1, reserve=0)
+    scheduler.acquire('GET', URL + 'api/friends')  # empty the bucket
+    admitted = []
+    threads = [_start(scheduler, 'GET', 'api/friends', admitted) for _ in range(4)]
+    _wait_queued(scheduler, 4)
+    threads.append(_start(scheduler, 'PATCH', 'api/user/location', admitted))
+    for thread in threads:
+        thread.join()
+    assert admitted.index(('sent', 'api/user/location')) <= 1
+    assert scheduler.stats()['urgent']['admitted'] == 1
+
+
+def test_priority_context_overrides_the_endpoint_class():
+    scheduler = RequestScheduler()
+    with priority(Priority.URGENT):
+        assert scheduler.priority_of('GET /api/friends') == Priority.URGENT
+    assert scheduler.priority_of('GET /api/friends') == Priority.BULK
+    assert scheduler.priority_of('GET /api/my') == Priority.NORMAL
+
+
+def test_shed_drops_the_newest_lower_class_waiter():
+    scheduler = RequestScheduler(rate=5, burst=1, reserve=0, max_queue=1, overflow='shed')
+    scheduler.acquire('GET', URL + 'api/my')
+    admitted = []
+    bulk = _start(scheduler, 'GET', 'api/friends', admitted)
+    _wait_queued(scheduler, 1)
+    normal = _start(scheduler, 'GET', 'api/my', admitted)
+    bulk.join()
+    assert admitted == [('shed', 'api/friends')]
+    # A newcomer of the same class as every waiter is refused
+    with pytest.raises(QueueFullError):
+        scheduler.acquire('GET', URL + 'api/friends')
+    normal.join()
+    assert admitted[-1] == ('sent', 'api/my')
+
+
+def test_block_keeps_the_queue_bounded():
+    scheduler = RequestScheduler(rate=100, burst=1, reserve=0, max_queue=2)
+    admitted = []
+    threads = [_start(scheduler, 'GET', 'api/my', admitted) for _ in range(10)]
+    most = 0
+    while any(thread.is_alive() for thread in threads):
+        most = max(most, sum(level['waiting'] for level in scheduler.stats().values()))
+        time.sleep(0.001)
+    assert most <= 2 and admitted == [('sent', 'api/my')] * 10
+
+
+def test_timeout_raises_queue_full():
+    scheduler = RequestScheduler(rate=1, burst=1, reserve=0, timeout=0.05)
+    scheduler.acquire('GET', URL + 'api/my')
+    with pytest.raises(QueueFullError):
+        scheduler.acquire('GET', URL + 'api/my')
+    assert scheduler.stats()['normal']['shed'] == 1
+
+
+def test_endpoint_limit(make_client):
+    with MockWhooServer() as server:
+        scheduler = RequestScheduler(rate=None, endpoint_limits={'GET /api/friends': (20, 1)})
+        cl = make_client(base_url=server.url, access_token=server.token, scheduler=scheduler)
+        start = time.monotonic()
+        for _ in range(4):
+            cl.get_friends()
+        assert time.monotonic() - start >= 0.14
+        # Other endpoints are not held back
+        start = time.monotonic()
+        for _ in range(4):
+            cl.info()
+        assert time.monotonic() - start < 0.14
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from whoopy.search import NameResolver
+
+
+def test_lookup_reports_remembered_ids_and_misses():
+    resolver = NameResolver()
+    assert resolver.lookup('a') == (False, None)
+    resolver.set('a', 1)
+    resolver.set('b', None)
+    assert resolver.lookup('a') == (True, 1)
+    assert resolver.lookup('b') == (True, None)
+    assert resolver.stats() == {'size': 2, 'hits': 2, 'misses': 1}
+
+
+def test_entries_expire_and_are_evicted():
+    resolver = NameResolver(ttl=0.05, negative_ttl=0, maxsize=2)
+    resolver.set('gone', None)
+    resolver.set('a', 1)
+    resolver.set('b', 2)
+    resolver.set('c', 3)
+    assert resolver.lookup('gone') == (False, None)
+    assert resolver.lookup('a') == (False, None)
+    time.sleep(0.06)
+    assert resolver.lookup('c') == (False, None)
+
+
+def test_concurrent_resolves_share_one_lookup():
+    resolver = NameResolver()
+    calls = []
+    release = threading.Event()
+
+    def lookup(name):
+        calls.append(name)
+        release.wait(5)
+        return 7
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(resolver.resolve('a', lookup)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [7] * 8 and calls == ['a']
+
+
+def test_find_users_follows_pages(server, make_client):
+    server.page_size = 2
+    cl = make_client()
+    users = cl.find_users('User 101')
+    assert len(users) == 10
+    assert server.requests['GET /api/friends/search'] == 5
+    assert cl.find_users('User 101', limit=3) == users[:3]
+
+
+def test_update_account_forgets_resolved_names(server, make_client):
+    cl = make_client()
+    assert cl.resolve_user_id('User 1000') == 1000
+    assert cl.resolve_user_id('User 1000') == 1000
+    assert server.requests['GET /api/friends/search'] == 1
+    cl.update_account(profile_image='profile_images/images/1.jpeg')
+    cl.resolve_user_id('User 1000')
+    assert server.requests['GET /api/friends/search'] == 1
+    cl.update_account(name='Renamed')
+    cl.resolve_user_id('User 1000')
+    assert server.requests['GET /api/friends/search'] == 2
+
+
+def test_async_update_account_forgets_resolved_names(server):
+    pytest.importorskip('httpx')
+    from whoopy import AsyncWhoopy
+
+    async def main():
+        async with AsyncWhoopy(access_token=server.token, verbose=False, base_url=server.url) as cl:
+            assert await cl.resolve_user_id('User 1000') == 1000
+            await cl.resolve_user_id('User 1000')
+            assert server.requests['GET /api/friends/search'] == 1
+            await cl.update_account(username='renamed')
+            await cl.resolve_user_id('User 1000')
+            assert server.requests['GET /api/friends/search'] == 2
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from whoopy.mock_server import MockWhooServer
+from whoopy.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class _Caller(threading.Thread):
+    def __init__(self, flight, func):
+        super().__init__()
+        self.flight, self.func = flight, func
+        self.result = self.error = None
+
+    def run(self):
+        try:
+            self.result = self.flight.do('key', self.func)
+        except Exception as err:
+            self.error = err
+
+
+def _run_together(flight, func, release, callers=8):
+    threads = [_Caller(flight, func) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()['calls'] + flight.stats()['collapsed'] < callers:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    return threads
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def func():
+        calls.append(1)
+        release.wait(5)
+        return {'value': 1}
+    results = [caller.result for caller in _run_together(flight, func, release)]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {'calls': 1, 'collapsed': 7, 'in_flight': 0}
+
+
+def test_the_shared_error_reaches_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def func():
+        release.wait(5)
+        raise ValueError('boom')
+    for caller in _run_together(flight, func, release, callers=4):
+        assert isinstance(caller.error, ValueError)
+
+
+def test_nothing_is_cached_after_the_call():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+
+
+def test_client_collapses_identical_gets(make_client):
+    with MockWhooServer(latency=0.2) as server:
+        cl = make_client(base_url=server.url, access_token=server.token, single_flight=True)
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: cl.get_friends(), range(8)))
+        assert all(result == results[0] for result in results)
+        assert server.requests['GET /api/friends'] == 1
+        # Writes are never collapsed
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda _: cl.online(), range(4)))
+        assert server.requests['PATCH /api/user/online'] == 4
+
+
+def test_async_waiters_share_one_task_and_survive_a_cancelled_waiter():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'done'
+        waiters = [asyncio.ensure_future(flight.do('key', func)) for _ in range(5)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        results = await asyncio.gather(*waiters[1:])
+        assert results == ['done'] * 4 and len(calls) == 1
+        assert flight.stats() == {'calls': 1, 'collapsed': 4, 'in_flight': 0}
+    asyncio.run(main())
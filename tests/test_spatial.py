@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from whoopy.geo import haversine
+from whoopy.spatial import SpatialIndex
+from whoopy.tracker import LocationDelta
+
+
+def _loc(user_id, latitude, longitude):
+    return {'user': {'id': user_id}, 'latitude': latitude, 'longitude': longitude}
+
+
+def _points(seed, count=300):
+    rand = random.Random(seed)
+    points = [_loc(i, rand.uniform(35.5, 35.9), rand.uniform(139.5, 139.9)) for i in range(count)]
+    # Around the antimeridian and the poles
+    points += [_loc(count + i, rand.uniform(-10, 10), rand.choice([-1, 1]) * rand.uniform(179.5, 180))
+               for i in range(30)]
+    points += [_loc(count + 30 + i, rand.choice([-1, 1]) * rand.uniform(89.5, 90), rand.uniform(-180, 180))
+               for i in range(30)]
+    return points
+
+
+def _distances(points, latitude, longitude):
+    return sorted((haversine(latitude, longitude, p['latitude'], p['longitude']), p['user']['id'])
+                  for p in points)
+
+
+QUERIES = [(35.7, 139.7), (0.0, 179.99), (0.0, -179.99), (89.9, 0.0), (-89.95, 120.0), (36.5, 139.7)]
+
+
+@pytest.mark.parametrize('cell_size', [200.0, 1000.0, 50000.0])
+@pytest.mark.parametrize('latitude, longitude', QUERIES)
+def test_within_matches_brute_force(cell_size, latitude, longitude):
+    points = _points(1)
+    index = SpatialIndex(points, cell_size=cell_size)
+    for radius in (500.0, 5000.0, 200000.0):
+        expected = [user_id for distance, user_id in _distances(points, latitude, longitude) if distance <= radius]
+        found = index.within(latitude, longitude, radius)
+        assert [record['user']['id'] for record, _ in found] == expected
+
+
+@pytest.mark.parametrize('cell_size', [200.0, 1000.0, 50000.0])
+@pytest.mark.parametrize('latitude, longitude', QUERIES)
+def test_nearest_matches_brute_force(cell_size, latitude, longitude):
+    points = _points(2)
+    index = SpatialIndex(points, cell_size=cell_size)
+    expected = _distances(points, latitude, longitude)
+    for k in (1, 5, 40):
+        found = index.nearest(latitude, longitude, k)
+        assert [distance for _, distance in found] == pytest.approx([distance for distance, _ in expected[:k]])
+    assert len(index.nearest(latitude, longitude, len(points) + 5)) == len(points)
+    assert index.nearest(latitude, longitude, 0) == []
+
+
+@pytest.mark.parametrize('box', [(35.6, 139.6, 35.8, 139.8), (-5.0, 179.8, 5.0, -179.8), (89.7, -180.0, 90.0, 180.0)])
+def test_bbox_matches_brute_force(box):
+    south, west, north, east = box
+    points = _points(3)
+    crosses = east < west
+    expected = {p['user']['id'] for p in points if south <= p['latitude'] <= north and
+                ((p['longitude'] >= west or p['longitude'] <= east) if crosses
+                 else west <= p['longitude'] <= east)}
+    assert {record['user']['id'] for record in SpatialIndex(points).bbox(*box)} == expected
+
+
+def test_updates_rebucket_moved_friends():
+    index = SpatialIndex([_loc(1, 35.0, 139.0), _loc(2, 35.0, 139.001)])
+    index.move(1, 36.0, 139.0)
+    assert [record['user']['id'] for record, _ in index.within(35.0, 139.0, 500)] == [2]
+    index.update([_loc(2, 36.0, 139.0005)])
+    assert 1 not in index and len(index) == 1
+    assert index.get(2)['longitude'] == 139.0005
+    index.remove(2)
+    assert len(index) == 0 and index._cells == {}
+
+
+def test_apply_tracker_delta():
+    index = SpatialIndex([_loc(1, 35.0, 139.0), _loc(2, 35.0, 139.0)])
+    index.apply(LocationDelta(added={3: _loc(3, 35.0, 139.0)}, changed={1: _loc(1, 10.0, 10.0)},
+                              removed={2: _loc(2, 35.0, 139.0)}))
+    assert sorted(record['user']['id'] for record, _ in index.within(35.0, 139.0, 100)) == [3]
+    assert index.nearest(10.0, 10.0)[0][0]['user']['id'] == 1
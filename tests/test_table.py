@@ -0,0 +1,75 @@
+import math
+
+import pytest
+
+from whoopy import table as table_module
+from whoopy.geo import bearing, haversine
+from whoopy.models import FriendLocation
+from whoopy.table import LocationTable
+
+RECORDS = [
+    {'user': {'id': 1}, 'latitude': '35.68', 'longitude': '139.76', 'speed': 1.5,
+     'battery_level': 0.9, 'updated_at': '2024-01-01T00:00:00Z'},
+    {'user': {'id': 2}, 'latitude': 35.0, 'longitude': 135.0, 'horizontal_accuracy': 12.0,
+     'battery': {'level': '0.1'}},
+    {'user': {'id': 3}, 'latitude': 35.69, 'longitude': 139.7, 'battery_level': None},
+]
+
+
+@pytest.fixture(params=['numpy', 'pure'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(table_module, 'np', None)
+    return request.param
+
+
+def _nan_list(column):
+    return ['nan' if math.isnan(value) else value for value in column]
+
+
+def test_columns_and_missing_values(backend):
+    table = LocationTable.from_locations({f'user{r["user"]["id"]}': r for r in RECORDS})
+    assert len(table) == 3 and list(table.ids) == [1, 2, 3]
+    assert list(table.latitude) == [35.68, 35.0, 35.69]
+    assert _nan_list(table.speed) == [1.5, 'nan', 'nan']
+    assert _nan_list(table.accuracy) == ['nan', 12.0, 'nan']
+    assert _nan_list(table.battery) == [0.9, 0.1, 'nan']
+    assert table.updated_at[0] == 1704067200.0 and math.isnan(table.updated_at[1])
+
+
+def test_distance_and_bearing_match_the_scalar_helpers(backend):
+    table = LocationTable.from_locations(RECORDS)
+    lats, lons = (35.0, 36.0), (139.0, 140.0)
+    for func, method in ((haversine, table.distance), (bearing, table.bearing)):
+        expected = [func(35.0, 139.0, float(r['latitude']), float(r['longitude'])) for r in RECORDS]
+        assert list(method(35.0, 139.0)) == pytest.approx(expected)
+        many = method(lats, lons)
+        assert len(many) == 2
+        for row, lat, lon in zip(many, lats, lons):
+            assert list(row) == pytest.approx([func(lat, lon, float(r['latitude']), float(r['longitude']))
+                                               for r in RECORDS])
+
+
+def test_filter_and_within(backend):
+    table = LocationTable.from_locations(RECORDS)
+    near = table.within(35.685, 139.73, 5000)
+    assert list(near.ids) == [1, 3]
+    assert near.records == [RECORDS[0], RECORDS[2]]
+    low = table[[battery < 0.5 for battery in table.battery]]
+    assert list(low.ids) == [2] and list(low.accuracy) == [12.0]
+    assert len(table.filter([False] * 3)) == 0
+
+
+def test_numpy_masks(backend):
+    if backend != 'numpy':
+        pytest.skip('comparisons give masks only with NumPy')
+    table = LocationTable.from_locations(RECORDS)
+    assert list(table[table.battery > 0.5].ids) == [1]
+
+
+def test_models(backend):
+    table = LocationTable.from_locations([FriendLocation.from_dict(record) for record in RECORDS])
+    assert list(table.ids) == [1, 2, 3]
+    assert _nan_list(table.battery) == [0.9, 0.1, 'nan']
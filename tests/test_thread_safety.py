@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from whoopy.mock_server import MockWhooServer
+from whoopy.token_store import TokenStore
+
+EMAIL = 'me@example.com'
+PASSWORD = 'password'
+LOCATION = {"latitude": 35.6762, "longitude": 139.6503}
+THREADS = 8
+
+
+def _safe(func, *args):
+    try:
+        return func(*args)
+    except Exception as err:
+        return err
+
+
+@pytest.mark.parametrize('transport', ['requests', 'urllib3'])
+def test_concurrent_first_calls_with_a_stale_token_log_in_once(make_client, tmp_path, transport):
+    with MockWhooServer(latency=0.002) as server:
+        store = TokenStore(str(tmp_path / 'tokens.json'))
+        store.set(EMAIL, 'stale-token')
+        cl = make_client(access_token=None, email=EMAIL, password=PASSWORD, token_store=store,
+                         base_url=server.url, transport=transport, pool_maxsize=THREADS)
+        barrier = threading.Barrier(THREADS)
+
+        def call(_):
+            barrier.wait()
+            return cl.info()['id']
+        with ThreadPoolExecutor(THREADS) as pool:
+            results = list(pool.map(lambda i: _safe(call, i), range(THREADS)))
+        assert results == [1] * THREADS
+        assert server.requests['POST /api/email/login'] == 1
+        assert store.get(EMAIL) == server.token
+
+
+@pytest.mark.parametrize('transport', ['requests', 'urllib3'])
+def test_shared_client_survives_token_swaps(make_client, transport):
+    with MockWhooServer(latency=0.001, friends=30, drift=1) as server:
+        cl = make_client(base_url=server.url, access_token=server.token, transport=transport,
+                         pool_maxsize=THREADS, cache=True, conditional=True, single_flight=True,
+                         metrics=True)
+        friend_ids = [user['id'] for user in server.friends[:5]]
+        calls = [
+            lambda i: cl.info()['id'] == 1,
+            lambda i: len(cl.get_friends()['friends']) == 30,
+            lambda i: len(cl.get_locations()) == 30,
+            lambda i: cl.get_user(friend_ids[i % 5])['id'] == friend_ids[i % 5],
+            lambda i: cl.update_location(LOCATION) is not None,
+        ]
+        stop = threading.Event()
+
+        def rotate():
+            while not stop.wait(0.02):
+                server.rotate_token()
+                cl.email_login(EMAIL, PASSWORD)
+        rotator = threading.Thread(target=rotate)
+        rotator.start()
+        try:
+            with ThreadPoolExecutor(THREADS) as pool:
+                results = list(pool.map(lambda i: _safe(calls[i % len(calls)], i), range(THREADS * 25)))
+        finally:
+            stop.set()
+            rotator.join()
+
+        assert [result for result in results if result is not True] == []
+        # Every request the server saw was counted by the client, retries included
+        sent = sum(stats['requests'] for stats in cl.metrics.snapshot().values())
+        assert sent == sum(server.requests.values())
+        assert cl.info()['id'] == 1
+        assert cl.headers['Authorization'] == f'Bearer {server.token}'
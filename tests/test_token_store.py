@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import stat
+
+import pytest
+
+from whoopy.exceptions import AuthenticationError
+from whoopy.token_store import TokenStore, fcntl
+
+EMAIL = 'me@example.com'
+PASSWORD = 'password'
+
+
+def _write_tokens(path, worker, count):
+    store = TokenStore(path)
+    for i in range(count):
+        store.set(f'{worker}-{i}@example.com', f'token-{worker}-{i}')
+
+
+def test_round_trip_and_delete(tmp_path):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    assert store.get(EMAIL) is None
+    store.set(EMAIL, 'a')
+    store.set('other@example.com', 'b')
+    assert TokenStore(store.path).get(EMAIL) == 'a'
+    store.delete(EMAIL)
+    assert store.get(EMAIL) is None and store.get('other@example.com') == 'b'
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+
+
+def test_corrupt_file_reads_as_empty(tmp_path):
+    path = tmp_path / 'tokens.json'
+    path.write_text('{"me@example.com": ')
+    assert TokenStore(str(path)).get(EMAIL) is None
+
+
+@pytest.mark.skipif(fcntl is None, reason='needs flock')
+def test_processes_writing_at_once_keep_every_token(tmp_path):
+    path = str(tmp_path / 'tokens.json')
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_write_tokens, args=(path, worker, 20)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+    store = TokenStore(path)
+    assert all(store.get(f'{worker}-{i}@example.com') == f'token-{worker}-{i}'
+               for worker in range(4) for i in range(20))
+
+
+def test_stored_token_is_reused_without_logging_in(server, make_client, tmp_path):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    store.set(EMAIL, server.token)
+    cl = make_client(access_token=None, email=EMAIL, password=PASSWORD, token_store=store,
+                     lazy_validation=False)
+    assert cl.info()['id'] == server.me['id']
+    assert server.requests['POST /api/email/login'] == 0
+
+
+@pytest.mark.parametrize('lazy', [True, False])
+def test_rejected_stored_token_logs_in_again_once(server, make_client, tmp_path, lazy):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    store.set(EMAIL, 'stale-token')
+    cl = make_client(access_token=None, email=EMAIL, password=PASSWORD, token_store=store,
+                     lazy_validation=lazy)
+    assert cl.info()['id'] == server.me['id']
+    assert cl.get_friends()['friends']
+    assert server.requests['POST /api/email/login'] == 1
+    assert store.get(EMAIL) == server.token
+
+
+def test_missing_token_logs_in_and_stores_it(server, make_client, tmp_path):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    make_client(access_token=None, email=EMAIL, password=PASSWORD, token_store=store)
+    assert server.requests['POST /api/email/login'] == 1
+    assert store.get(EMAIL) == server.token
+
+
+def test_explicit_token_is_never_replaced(server, make_client, tmp_path):
+    cl = make_client(access_token='stale-token')
+    with pytest.raises(AuthenticationError):
+        cl.info()
+    assert server.requests['POST /api/email/login'] == 0
@@ -0,0 +1,58 @@
+import pytest
+
+from whoopy.models import FriendLocation
+from whoopy.tracker import LocationTracker
+
+
+def _loc(user_id, latitude=35.0, longitude=139.0, **fields):
+    return dict({'user': {'id': user_id, 'username': f'user{user_id}'},
+                 'latitude': latitude, 'longitude': longitude}, **fields)
+
+
+def test_first_update_adds_everyone():
+    tracker = LocationTracker()
+    delta = tracker.update([_loc(1), _loc(2)])
+    assert set(delta.added) == {1, 2} and not delta.changed and not delta.removed
+    assert not tracker.update([_loc(1), _loc(2)])
+
+
+def test_small_moves_add_up_against_the_last_reported_record():
+    tracker = LocationTracker(distance=10.0)
+    tracker.update([_loc(1)])
+    # ~5.5 m per step: the first step stays under the threshold, the second does not
+    assert not tracker.update([_loc(1, 35.00005)])
+    assert set(tracker.update([_loc(1, 35.0001)]).changed) == {1}
+
+
+def test_removed_friends_are_reported():
+    tracker = LocationTracker()
+    tracker.update([_loc(1), _loc(2)])
+    delta = tracker.update([_loc(1)])
+    assert set(delta.removed) == {2} and len(delta) == 1
+
+
+@pytest.mark.parametrize('before, after', [
+    ({'battery_level': 0.9}, {'battery_level': 0.5}),
+    ({'battery_level': '0.9'}, {'battery_level': '0.5'}),
+    ({'battery': {'level': '0.9'}}, {'battery_level': 0.5}),
+])
+def test_battery_changes_accept_numeric_strings(before, after):
+    tracker = LocationTracker(battery=0.2)
+    tracker.update([_loc(1, **before)])
+    assert set(tracker.update([_loc(1, **after)]).changed) == {1}
+
+
+def test_interval_reports_a_newer_timestamp():
+    tracker = LocationTracker(interval=60)
+    tracker.update([_loc(1, updated_at='2024-01-01T00:00:00Z')])
+    assert not tracker.update([_loc(1, updated_at='2024-01-01T00:00:30Z')])
+    assert tracker.update([_loc(1, updated_at='2024-01-01T00:01:00Z')]).changed
+
+
+def test_models_and_get_locations_results(server, make_client):
+    tracker = LocationTracker(make_client())
+    assert len(tracker.poll().added) == len(server.locations)
+    models = [FriendLocation.from_dict(loc) for loc in server.locations.values()]
+    assert not tracker.update(models)
+    tracker.reset()
+    assert len(tracker.update(models).added) == len(models)
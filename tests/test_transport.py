@@ -0,0 +1,117 @@
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from whoopy import Whoopy
+from whoopy.exceptions import TransportError
+from whoopy.mock_server import MockWhooServer
+from whoopy.transport import _encode_body
+
+
+BACKENDS = ['requests', 'urllib3', 'httpx']
+
+
+def _backend(name):
+    if name == 'httpx':
+        pytest.importorskip('httpx')
+    return name
+
+
+def test_encode_body_drops_none_form_values():
+    headers = {}
+    body = _encode_body({'a': 'x', 'b': None, 'c': ['1', '2']}, None, headers)
+    assert body == b'a=x&c=1&c=2'
+    assert headers['Content-Type'] == 'application/x-www-form-urlencoded'
+
+
+@pytest.mark.parametrize('transport', BACKENDS)
+def test_update_account_leaves_omitted_fields_alone(server, make_client, transport):
+    cl = make_client(transport=_backend(transport))
+    cl.update_account(name='Zed')
+    assert server.me['display_name'] == 'Zed'
+    assert server.me['username'] == 'me'
+    assert server.me['profile_image'] == 'profile_images/images/default.jpeg'
+
+
+@pytest.mark.parametrize('transport', BACKENDS)
+def test_backends_return_the_same_data(make_client, transport):
+    cl = make_client(transport=_backend(transport))
+    assert cl.info()['id'] == 1
+    assert len(cl.get_friends()['friends']) == 50
+    assert len(cl.get_locations()) == 50
+
+
+def test_h2_mock_answers_out_of_order_streams_with_goaway():
+    h2 = pytest.importorskip('h2')
+    import h2.connection
+    import h2.events
+
+    def headers(server):
+        return [(':method', 'GET'), (':authority', server.url.split('/')[2]), (':scheme', 'http'),
+                (':path', '/api/my'), ('authorization', f'Bearer {server.token}')]
+
+    with MockWhooServer(http2=True) as server:
+        host, port = server.url.split('/')[2].split(':')
+        client = h2.connection.H2Connection()
+        client.initiate_connection()
+        client.send_headers(3, headers(server), end_stream=True)
+        # A second encoder state lets stream 1 go out after stream 3, as a racing client would
+        late = h2.connection.H2Connection()
+        late.send_headers(1, headers(server), end_stream=True)
+        with socket.create_connection((host, int(port))) as sock:
+            sock.sendall(client.data_to_send() + late.data_to_send())
+            sock.settimeout(5)
+            events = []
+            while not any(isinstance(event, h2.events.ConnectionTerminated) for event in events):
+                data = sock.recv(65536)
+                assert data, 'connection closed without GOAWAY'
+                events += client.receive_data(data)
+        terminated = [event for event in events if isinstance(event, h2.events.ConnectionTerminated)]
+        assert terminated[0].error_code == h2.errors.ErrorCodes.PROTOCOL_ERROR
+
+
+def test_concurrent_http2_requests():
+    pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    from whoopy.transport import HttpxTransport
+    with MockWhooServer(http2=True, jitter=0.002) as h2_server:
+        cl = Whoopy(access_token=h2_server.token, base_url=h2_server.url, lazy_validation=True,
+                    verbose=False, transport=HttpxTransport(http2=True, http1=False))
+        with cl, ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: cl.get_friends(), range(64)))
+        assert all(result == results[0] for result in results)
+
+
+@pytest.fixture
+def truncating_server():
+    """Answers every request with a chunked body cut off in the middle"""
+    class Truncating(socketserver.StreamRequestHandler):
+        def handle(self):
+            while self.rfile.readline() not in (b'\r\n', b''):
+                pass
+            body = b'{"friends": [{"id": 1}, '
+            self.wfile.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Transfer-Encoding: chunked\r\n\r\n'
+                             + b'%x\r\n%s\r\n' % (len(body), body) + b'40\r\n{"id": 2')
+            self.wfile.flush()
+
+    with socketserver.ThreadingTCPServer(('127.0.0.1', 0), Truncating) as server:
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield 'http://127.0.0.1:%d/' % server.server_address[1]
+        server.shutdown()
+
+
+@pytest.mark.parametrize('transport', BACKENDS)
+def test_truncated_stream_raises_transport_error(truncating_server, transport):
+    cl = Whoopy(access_token='token', base_url=truncating_server, lazy_validation=True,
+                verbose=False, transport=_backend(transport), retry=False)
+    items = []
+    with cl, pytest.raises(TransportError):
+        for friend in cl.iter_friends():
+            items.append(friend)
+    # httpx fills whole chunks before yielding, so it may fail before the first item
+    assert items in ([], [{'id': 1}])
@@ -4,8 +4,54 @@ Whoopy - A Python library for interacting with the Whoo location-sharing app
 This library is a Python wrapper for the Whoo API.
 """
 
-from .client import Whoopy
 from .enums import BatteryState, HttpStatus
+from .exceptions import (
+    AuthenticationError,
+    CircuitOpenError,
+    ConnectTimeoutError,
+    NotFoundError,
+    QueueFullError,
+    RateLimitError,
+    RequestError,
+    ServerError,
+    TokenRequiredError,
+    TransportError,
+    WhoopyError,
+)
 
 __version__ = "1.0.0"
-__all__ = ["Whoopy", "BatteryState", "HttpStatus"]
+__all__ = [
+    "Whoopy", "AsyncWhoopy", "TokenStore", "LocationTracker", "LocationPublisher", "PresenceSession", "SpatialIndex", "LocationTable", "Metrics", "RequestScheduler", "Priority", "BatteryState", "HttpStatus",
+    "WhoopyError", "TokenRequiredError", "RequestError", "AuthenticationError", "NotFoundError",
+    "RateLimitError", "ServerError", "TransportError", "ConnectTimeoutError", "CircuitOpenError",
+    "QueueFullError",
+]
+
+# Clients are imported on first access so that ``import whoopy`` does not pull
+# in the HTTP stacks (requests / httpx) until they are needed.
+_LAZY = {
+    "Whoopy": ".client",
+    "AsyncWhoopy": ".async_client",
+    "TokenStore": ".token_store",
+    "LocationTracker": ".tracker",
+    "LocationPublisher": ".publisher",
+    "PresenceSession": ".presence",
+    "SpatialIndex": ".spatial",
+    "LocationTable": ".table",
+    "Metrics": ".metrics",
+    "RequestScheduler": ".scheduler",
+    "Priority": ".scheduler",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
@@ -0,0 +1,850 @@
+"""Asyncio client for Whoo API (requires httpx)."""
+import asyncio
+from collections import deque
+from itertools import chain, islice
+from uuid import uuid4
+from typing import Dict, Optional
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from .client import DEFAULT_HEADERS, DEFAULT_STREAM_CHUNK_SIZE, _index_locations, _linked_location, _location_form
+from .decoding import RecordStream
+from .enums import BatteryState, HttpStatus, DEFAULT_BASE_URL, DEFAULT_BATTERY_LEVEL, DEFAULT_BATTERY_STATE
+from .exceptions import ConnectTimeoutError, RequestError, TokenRequiredError, TransportError, WhoopyError
+from .metrics import Metrics, instrumented
+from .retry import CircuitBreakers, RetryPolicy, endpoint_key, parse_retry_after
+from .search import NameResolver, best_match, search_params
+from .singleflight import AsyncSingleFlight
+from .utils import DEFAULT_POOL_MAXSIZE, _frozen
+
+DEFAULT_CONCURRENCY = 10
+
+
+class AsyncWhoopy:
+    """Asyncio counterpart of Whoopy with the same methods and response shapes"""
+
+    def __init__(self, access_token=None, verbose=True, email=None, password=None,
+                 timeout: float = 30, max_connections: int = DEFAULT_POOL_MAXSIZE,
+                 max_keepalive_connections: int = DEFAULT_POOL_MAXSIZE,
+                 keepalive_expiry: float = 5.0, concurrency: int = DEFAULT_CONCURRENCY,
+                 base_url: str = DEFAULT_BASE_URL, metrics=None, http2: bool = False,
+                 single_flight=False, resolver=None, retry=None, circuit_breaker=None):
+        """
+        Initialize AsyncWhoopy
+
+        Authentication happens in login(), which is awaited automatically by
+        ``async with AsyncWhoopy(...) as cl:``.
+
+        Args:
+            access_token: Access token (optional)
+            verbose: Display login success message
+            email: Email address (use with password)
+            password: Password (use with email)
+            timeout: Request timeout in seconds. Default is 30
+            max_connections: Maximum open connections in the shared pool. Default is 10
+            max_keepalive_connections: Maximum idle kept-alive connections. Default is 10
+            keepalive_expiry: Seconds an idle connection is kept. Default is 5.0
+            concurrency: Maximum requests in flight at once. Default is 10
+            base_url: API base URL. Default is https://www.wh00.ooo/
+            metrics: Metrics, or True, to record per-operation request metrics (optional)
+            http2: Multiplex concurrent calls over one HTTP/2 connection (requires h2)
+            single_flight: AsyncSingleFlight, or True, to let concurrent identical GETs
+                share one in-flight request (optional)
+            resolver: NameResolver memoizing resolve_user_id; False disables it
+                (default: NameResolver())
+            retry: RetryPolicy for transient failures; False disables retries
+                (default: RetryPolicy())
+            circuit_breaker: CircuitBreakers guarding each endpoint; False disables
+                them (default: CircuitBreakers())
+        """
+        if httpx is None:
+            raise ImportError("AsyncWhoopy requires httpx: pip install 'whoopy[async]'")
+
+        self.base = base_url if base_url.endswith('/') else base_url + '/'
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_keepalive_connections,
+                              keepalive_expiry=keepalive_expiry)
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ImportError("http2=True requires h2: pip install 'whoopy[http2]'") from None
+        self.client = httpx.AsyncClient(headers=DEFAULT_HEADERS, timeout=timeout, limits=limits, http2=http2)
+        self.headers = self.client.headers
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.metrics = Metrics() if metrics is True else metrics or None
+        self.single_flight = AsyncSingleFlight() if single_flight is True else single_flight or None
+        self.resolver = NameResolver() if resolver is None or resolver is True else resolver or None
+        self.retry = RetryPolicy() if retry is None else retry or None
+        self.breakers = CircuitBreakers() if circuit_breaker is None else circuit_breaker or None
+        self.verbose = verbose
+        self.token = None
+        self._access_token = access_token
+        self._email = email
+        self._password = password
+
+    async def __aenter__(self):
+        await self.login()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close pooled connections"""
+        await self.client.aclose()
+
+    async def _request(self, method, url, idempotent=None, **kwargs):
+        """
+        Send a request on the shared pool, bounded by the concurrency semaphore
+
+        Transient failures are retried and each endpoint is guarded by a
+        circuit breaker, as in the sync client. With single flight enabled,
+        concurrent identical GETs share one request.
+        """
+        single_flight = self.single_flight
+        if single_flight is not None and method == 'GET':
+            key = (url, _frozen(kwargs.get('params')), _frozen(kwargs.get('headers')))
+            return await single_flight.do(key, lambda: self._send(method, url, idempotent, **kwargs))
+        return await self._send(method, url, idempotent, **kwargs)
+
+    async def _send(self, method, url, idempotent=None, stream=False, **kwargs):
+        """Retry loop behind _request(), recording metrics when configured"""
+        metrics = self.metrics
+        event = metrics.request_started(method, url) if metrics is not None else None
+        try:
+            response = await self._attempts(method, url, idempotent, event, stream, kwargs)
+        except WhoopyError as err:
+            if event is not None:
+                metrics.request_finished(event, error=err)
+            raise
+        if event is not None:
+            metrics.request_finished(event, response, streamed=stream)
+        return response
+
+    async def _attempts(self, method, url, idempotent, event, stream, kwargs):
+        """Async counterpart of HTTPClient._send: retries and the endpoint's circuit breaker"""
+        retry = self.retry
+        breaker = self.breakers.get(endpoint_key(method, url)) if self.breakers is not None else None
+        if idempotent is None:
+            idempotent = retry is not None and retry.is_idempotent(method)
+
+        if breaker is not None:
+            breaker.before_request()
+
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    request = self.client.build_request(method, url, **kwargs)
+                    response = await self.client.send(request, stream=stream)
+            except httpx.HTTPError as err:
+                # Connect timeouts never reached the server, so any method may retry
+                connect_timeout = isinstance(err, httpx.ConnectTimeout)
+                error_cls = ConnectTimeoutError if connect_timeout else TransportError
+                retryable = idempotent or connect_timeout
+                delay = retry.delay(attempt) if retry is not None and retryable else None
+                if delay is None or attempt >= retry.max_retries:
+                    if breaker is not None:
+                        breaker.record_failure()
+                    raise error_cls(f"Request failed: {err}") from err
+            else:
+                status = response.status_code
+                delay = None
+                if retry is not None and attempt < retry.max_retries \
+                        and retry.should_retry_status(status, idempotent):
+                    delay = retry.delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+                if delay is None:
+                    if breaker is not None:
+                        if status >= 500:
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                    return response
+                await response.aclose()
+
+            await asyncio.sleep(delay)
+            attempt += 1
+            if event is not None:
+                event.retries = attempt
+
+    async def _stream_records(self, url, key, label, chunk_size):
+        """GET a JSON body and yield the items of its ``key`` array as they arrive"""
+        response = await self._send('GET', url, stream=True)
+        try:
+            if response.status_code != HttpStatus.OK:
+                await response.aread()
+                raise RequestError.from_response(response, label)
+            stream = RecordStream(key)
+            try:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    for item in stream.feed(chunk):
+                        yield item
+                    if stream.done:
+                        return
+            except httpx.HTTPError as err:
+                raise TransportError(f"Request failed: {err}") from err
+            for item in stream.end():
+                yield item
+        finally:
+            await response.aclose()
+
+    async def login(self):
+        """
+        Authenticate with the credentials given to the constructor
+
+        Returns:
+            bool: True if a token was validated, False without credentials
+        """
+        access_token = self._access_token
+
+        # Login with email/password
+        if access_token is None and self._email and self._password:
+            access_token = (await self.email_login(self._email, self._password))["access_token"]
+
+        if not access_token:
+            self.token = None
+            return False
+
+        # Token authentication
+        self.headers["Authorization"] = f"Bearer {access_token}"
+        response = await self._request('GET', f'{self.base}api/my')
+        if response.status_code == HttpStatus.OK:
+            self.token = True
+            if self.verbose:
+                print("Login successful!")
+            return True
+        else:
+            raise RequestError.from_response(response, 'auth')
+
+
+    ##############  Account Settings   ##############
+    @instrumented('email_login')
+    async def email_login(self, email, password):
+        """
+        Login with email address and password
+
+        Args:
+            email: Email address
+            password: Password
+
+        Returns:
+            Dict: Login information (includes access_token)
+        """
+        url = f'{self.base}api/email/login'
+        data = {
+            'email': email,
+            'password': password
+        }
+        response = await self._request('POST', url, data=data)
+        if response.status_code == HttpStatus.OK:
+            js = response.json()
+            self.headers["Authorization"] = f"Bearer {js['access_token']}"
+            return js
+        else:
+            raise RequestError.from_response(response, 'email login')
+
+    @instrumented('create_account')
+    async def create_account(self, email, password, name, profile_image, username, location=None):
+        """
+        Create a new account
+
+        Args:
+            email: Email address
+            password: Password
+            name: Display name
+            profile_image: Profile image URL
+            username: Username
+            location: Location information (optional, dict with latitude/longitude)
+
+        Returns:
+            Dict: Account information
+        """
+        url = f'{self.base}api/email/users'
+        data = {
+            'user[email]': email,
+            'user[password]': password,
+            'user[display_name]': name,
+            'user[profile_image]': profile_image,
+            'user[username]': username
+        }
+        response = await self._request('POST', url, data=data)
+
+        if response.status_code != HttpStatus.OK:
+            raise RequestError.from_response(response, 'account create')
+
+        js = response.json()
+        if location is None:
+            return js
+
+        # Set location information
+        headers = {'Authorization': f"Bearer {js['access_token']}"}
+        data = _location_form(location, DEFAULT_BATTERY_LEVEL, BatteryState.CHARGING, 0.0, None, None)
+        await self._request('PATCH', f'{self.base}api/user/location', headers=headers, data=data)
+        return js
+
+    @instrumented('update_account')
+    async def update_account(self, name=None, profile_image=None, username=None):
+        """
+        Update account information
+
+        Args:
+            name: Display name (optional)
+            profile_image: Profile image URL (optional)
+            username: Username (optional)
+
+        Returns:
+            Dict: Updated account information
+        """
+        url = f'{self.base}api/user'
+        data = {
+            'user[display_name]': name,
+            'user[profile_image]': profile_image,
+            'user[username]': username
+        }
+        data = {k: v for k, v in data.items() if v is not None}
+        try:
+            response = await self._request('PATCH', url, data=data, idempotent=True)
+        finally:
+            # Names this account was resolved by may have changed
+            if self.resolver is not None and (name is not None or username is not None):
+                self.resolver.invalidate()
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'account update')
+
+    @instrumented('delete_account')
+    async def delete_account(self, alert=True):
+        """
+        Delete account
+
+        Args:
+            alert: Show confirmation message
+
+        Returns:
+            str: 'Success' or 'Cancel'
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        if alert:
+            res = await asyncio.to_thread(input, 'Are you sure? (y/n): ')
+            if res != 'y':
+                return 'Cancel'
+
+        response = await self._request('DELETE', f'{self.base}api/user')
+
+        if response.status_code != HttpStatus.NO_CONTENT:
+            raise RequestError.from_response(response, 'account delete')
+
+        return 'Success'
+
+
+    ##############  Background Processing   ##############
+    @instrumented('info')
+    async def info(self):
+        """
+        Get current user information
+
+        Returns:
+            Dict: User information
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('GET', f'{self.base}api/my')
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'account info')
+
+    @instrumented('get_requested')
+    async def get_requested(self):
+        """
+        Get friend requests
+
+        Returns:
+            Dict: Friend request information
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('GET', f'{self.base}api/friends/requested')
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'get requested')
+
+    @instrumented('get_friends')
+    async def get_friends(self):
+        """
+        Get friends list
+
+        Returns:
+            Dict: Friends list
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('GET', f'{self.base}api/friends')
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'get my friends')
+
+    @instrumented('iter_friends')
+    async def iter_friends(self, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Stream the friends list, parsing the body as it arrives
+
+        Args:
+            chunk_size: Bytes read from the connection at a time. Default is 64 KiB
+
+        Yields:
+            Dict: One friend at a time
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+        async for friend in self._stream_records(f'{self.base}api/friends', 'friends',
+                                                 'get my friends', chunk_size):
+            yield friend
+
+    @instrumented('get_user')
+    async def get_user(self, user_id, friends=False):
+        """
+        Get specific user information
+
+        Friend pages are fetched concurrently and merged in page order.
+
+        Args:
+            user_id: User ID
+            friends: Also get friends list
+
+        Returns:
+            Dict: User information
+        """
+        js = await self._get_user_json(user_id)
+
+        if not friends:
+            del js["friends"], js["next_page"]
+            return js
+
+        if not js["next_page"]:
+            return js
+
+        # Get all friends with pagination
+        pages = await asyncio.gather(*(self._get_friends_page(user_id, page)
+                                       for page in range(1, js["next_page"] + 1)))
+        js["friends"] = list(chain.from_iterable(pages))
+
+        js["next_page"] = None
+        return js
+
+    @instrumented('get_users')
+    async def get_users(self, user_ids):
+        """
+        Get several users' information at once
+
+        Duplicate ids are fetched once and the rest concurrently (bounded by
+        ``concurrency``).
+
+        Args:
+            user_ids: User IDs
+
+        Returns:
+            List: get_user() result per id, in input order; a failed id holds
+            its exception instead of stopping the batch
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        user_ids = list(user_ids)
+        unique = list(dict.fromkeys(user_ids))
+        fetched = await asyncio.gather(*(self.get_user(user_id) for user_id in unique),
+                                       return_exceptions=True)
+        results = dict(zip(unique, fetched))
+        return [results[user_id] for user_id in user_ids]
+
+    @instrumented('iter_user_friends')
+    async def iter_user_friends(self, user_id, prefetch=4):
+        """
+        Iterate over a user's friends page by page
+
+        Args:
+            user_id: User ID
+            prefetch: Pages fetched ahead of the consumer. Default is 4
+
+        Yields:
+            Dict: Friend information, in page order
+        """
+        js = await self._get_user_json(user_id)
+        if not js["next_page"]:
+            for friend in js["friends"]:
+                yield friend
+            return
+
+        pages = iter(range(1, js["next_page"] + 1))
+        del js
+        pending = deque(asyncio.ensure_future(self._get_friends_page(user_id, page))
+                        for page in islice(pages, prefetch))
+        try:
+            while pending:
+                friends = await pending.popleft()
+                page = next(pages, None)
+                if page is not None:
+                    pending.append(asyncio.ensure_future(self._get_friends_page(user_id, page)))
+                for friend in friends:
+                    yield friend
+        finally:
+            for task in pending:
+                task.cancel()
+            # Reap them so no task is left pending or with an unretrieved exception
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _get_user_json(self, user_id):
+        """GET api/v2/users/{user_id} and return the decoded body"""
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('GET', f'{self.base}api/v2/users/{user_id}')
+
+        if response.status_code != HttpStatus.OK:
+            raise RequestError.from_response(response, 'get about user info')
+
+        return response.json()
+
+    async def _get_friends_page(self, user_id, page):
+        """GET one page of api/v2/users/{user_id}/friends"""
+        url = f'{self.base}api/v2/users/{user_id}/friends?page={page}'
+        response = await self._request('GET', url)
+
+        if response.status_code != HttpStatus.OK:
+            raise RequestError.from_response(response, 'get friends info')
+
+        return response.json()["friends"]
+
+    async def _search_page(self, user_name, page):
+        """GET one page of api/friends/search (the first if page is None)"""
+        response = await self._request('GET', f'{self.base}api/friends/search',
+                                       params=search_params(user_name, page))
+
+        if response.status_code != HttpStatus.OK:
+            raise RequestError.from_response(response, 'find user')
+
+        return response.json()
+
+    @instrumented('find_user')
+    async def find_user(self, user_name):
+        """
+        Search for user by display name
+
+        Args:
+            user_name: Display name to search for
+
+        Returns:
+            Dict: User information (first match)
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        friends = (await self._search_page(user_name, None)).get("friends")
+        if not isinstance(friends, list) or len(friends) == 0:
+            raise ValueError(f"No user found with name '{user_name}'.")
+
+        return friends[0]
+
+    @instrumented('search_users')
+    async def search_users(self, user_name):
+        """
+        Iterate over every user matching a display name, fetching result
+        pages as the iteration reaches them
+
+        Args:
+            user_name: Display name to search for
+
+        Yields:
+            Dict: User information, in result order
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        page = None
+        seen = set()
+        while True:
+            data = await self._search_page(user_name, page)
+            users = data.get("friends")
+            if not isinstance(users, list) or not users:
+                return
+            for user in users:
+                yield user
+            seen.add(page)
+            page = data.get("next_page")
+            if not page or page in seen:
+                return
+
+    @instrumented('find_users')
+    async def find_users(self, user_name, limit=None):
+        """
+        Search for every user matching a display name
+
+        Args:
+            user_name: Display name to search for
+            limit: Stop after this many matches (optional)
+
+        Returns:
+            List[Dict]: User information of each match (empty if none)
+        """
+        users = []
+        if limit is not None and limit <= 0:
+            return users
+        async for user in self.search_users(user_name):
+            users.append(user)
+            if limit is not None and len(users) >= limit:
+                break
+        return users
+
+    @instrumented('resolve_user_id')
+    async def resolve_user_id(self, user_name):
+        """
+        Get the user id for a display name, memoized in ``self.resolver``
+
+        Args:
+            user_name: Display name
+
+        Returns:
+            int: User ID, or None if no user matches
+        """
+        resolver = self.resolver
+        if resolver is not None:
+            found, user_id = resolver.lookup(user_name)
+            if found:
+                return user_id
+        user = best_match(await self.find_users(user_name), user_name)
+        user_id = user["id"] if user is not None else None
+        if resolver is not None:
+            resolver.set(user_name, user_id)
+        return user_id
+
+    @instrumented('reacquire_location')
+    async def reacquire_location(self, user_id):
+        """
+        Send location request to user
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Dict: Response information
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('GET', f'{self.base}api/users/{user_id}/location_request')
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'send location request')
+
+    @instrumented('update_location')
+    async def update_location(self, location: Dict, level: int = DEFAULT_BATTERY_LEVEL,
+                              state: BatteryState = DEFAULT_BATTERY_STATE,
+                              speed: float = 0.0, stayed_at: Optional[str] = None,
+                              horizontal_accuracy: Optional[float] = None) -> Dict:
+        """
+        Update user's location information
+
+        Args:
+            location: Location dictionary (includes latitude, longitude)
+            level: Battery level (0-100). Default is 100
+            state: Battery state (BatteryState). Default is 0 (unknown)
+            speed: Speed (km/h). Default is 0.0
+            stayed_at: Stay time. Optional
+            horizontal_accuracy: Horizontal accuracy. Optional
+
+        Returns:
+            Dict: Update result
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        data = _location_form(location, level, state, speed, stayed_at, horizontal_accuracy)
+        response = await self._request('PATCH', f'{self.base}api/user/location', data=data, idempotent=True)
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'post location')
+
+    @instrumented('get_locations')
+    async def get_locations(self, user_id=None):
+        """
+        Get friends' location information
+
+        Args:
+            user_id: Filter by specific user ID (optional)
+
+        Returns:
+            Dict: Location information (with Google Maps links)
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('GET', f'{self.base}api/locations')
+
+        if response.status_code != HttpStatus.OK:
+            raise RequestError.from_response(response, 'get locations')
+
+        return _index_locations(response.json()['locations'], user_id)
+
+    @instrumented('iter_locations')
+    async def iter_locations(self, user_id=None, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Stream friends' locations, parsing the body as it arrives
+
+        Args:
+            user_id: Filter by specific user ID (optional)
+            chunk_size: Bytes read from the connection at a time. Default is 64 KiB
+
+        Yields:
+            Tuple: (username, location dict with Google Maps links)
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+        async for loc in self._stream_records(f'{self.base}api/locations', 'locations',
+                                              'get locations', chunk_size):
+            if not user_id or user_id == loc['user']['id']:
+                yield _linked_location(loc)
+
+    @instrumented('online')
+    async def online(self):
+        """
+        Go online
+
+        Returns:
+            Dict: Response information
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('PATCH', f'{self.base}api/user/online', idempotent=True)
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'online')
+
+    @instrumented('offline')
+    async def offline(self):
+        """
+        Go offline
+
+        Returns:
+            str: 'success'
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('PATCH', f'{self.base}api/user/offline', idempotent=True)
+        if response.status_code == HttpStatus.NO_CONTENT:
+            return 'success'
+        else:
+            raise RequestError.from_response(response, 'offline')
+
+
+    ##############  Basic Operations   ##############
+    @instrumented('send_stamp')
+    async def send_stamp(self, user_id, stamp_id, quantity):
+        """
+        Send stamp message
+
+        Args:
+            user_id: Recipient user ID
+            stamp_id: Stamp ID
+            quantity: Send quantity
+
+        Returns:
+            Response: Response object
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        data = {
+            "message[user_id]": user_id,
+            "message[stamp_id]": stamp_id,
+            "message[stamp_count]": quantity
+        }
+        response = await self._request('POST', f'{self.base}api/stamp_messages', data=data)
+        if response.status_code == HttpStatus.NO_CONTENT:
+            return response
+        else:
+            raise RequestError.from_response(response, 'stamp message')
+
+    @instrumented('send_message')
+    async def send_message(self, room_id, content):
+        """
+        Send text message
+
+        Args:
+            room_id: Room ID
+            content: Message content
+
+        Returns:
+            Dict: Sent message information
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        data = {
+            "message[uid]": str(uuid4()),
+            "message[body]": content
+        }
+        response = await self._request('POST', f'{self.base}api/rooms/{room_id}/messages', data=data)
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'send message')
+
+    @instrumented('request_friend')
+    async def request_friend(self, user_id):
+        """
+        Send friend request
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Dict: Response information
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        data = {
+            "user_id": user_id
+        }
+        response = await self._request('POST', f'{self.base}api/friends', data=data)
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'request friend')
+
+    @instrumented('delete_requested')
+    async def delete_requested(self, user_id):
+        """
+        Delete sent friend request
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Dict: Response information
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        response = await self._request('DELETE', f'{self.base}api/friendships/{user_id}/retire')
+        if response.status_code == HttpStatus.OK:
+            return response.json()
+        else:
+            raise RequestError.from_response(response, 'delete requested')
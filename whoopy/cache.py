@@ -0,0 +1,225 @@
+"""In-process TTL + LRU cache for read endpoints."""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
+
+from .exceptions import WhoopyError
+
+
+# Seconds a cached response stays fresh, per read method
+DEFAULT_TTLS = {
+    'info': 30.0,
+    'get_friends': 30.0,
+    'get_requested': 10.0,
+    'get_user': 60.0,
+    'find_user': 300.0,
+    'find_users': 300.0,
+}
+DEFAULT_MAXSIZE = 256
+
+# Read endpoints made stale by each kind of write
+ACCOUNT_ENDPOINTS = ('info', 'get_user', 'find_user', 'find_users')
+PRESENCE_ENDPOINTS = ('info',)
+FRIENDSHIP_ENDPOINTS = ('get_requested', 'get_friends', 'get_user')
+ALL_ENDPOINTS = tuple(DEFAULT_TTLS)
+# Pseudo-endpoint for the names remembered by the client's NameResolver
+NAMES = 'resolve_user_id'
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL + LRU cache keyed by (endpoint, arguments).
+
+    Each endpoint has a generation counter that invalidation bumps. A read
+    that started before an invalidation is not stored when it completes, so
+    data fetched before one of our own writes never outlives that write.
+    """
+
+    def __init__(self, ttl: Union[float, Dict[str, float], None] = None, maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Initialize ResponseCache.
+
+        Args:
+            ttl: Seconds entries stay fresh; a number for every endpoint or a
+                dict overriding DEFAULT_TTLS per endpoint (optional)
+            maxsize: Maximum number of entries before LRU eviction (default: 256)
+        """
+        self.ttls = dict(DEFAULT_TTLS)
+        if isinstance(ttl, dict):
+            self.ttls.update(ttl)
+        elif ttl is not None:
+            self.ttls = {endpoint: float(ttl) for endpoint in self.ttls}
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+
+    def generation(self, endpoint: str) -> int:
+        """Current invalidation generation of an endpoint."""
+        return self._generations.get(endpoint, 0)
+
+    def get(self, endpoint: str, key: Hashable = ()) -> Any:
+        """
+        Look up a fresh entry.
+
+        Returns:
+            A deep copy of the cached value, or the module's _MISSING sentinel
+        """
+        full_key = (endpoint, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(full_key)
+                self.hits[endpoint] = self.hits.get(endpoint, 0) + 1
+                value = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[full_key]
+                self.misses[endpoint] = self.misses.get(endpoint, 0) + 1
+                return _MISSING
+        # Callers are free to mutate what they get back
+        return copy.deepcopy(value)
+
+    def set(self, endpoint: str, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store a value unless the endpoint was invalidated since ``generation``.
+
+        Args:
+            endpoint: Read method name
+            key: Hashable call arguments
+            value: Response to cache
+            generation: Generation observed before the request was sent
+        """
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation is not None and generation != self._generations.get(endpoint, 0):
+                return
+            full_key = (endpoint, key)
+            self._entries[full_key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *endpoints: str) -> None:
+        """
+        Drop every entry of the given endpoints (all endpoints if none given).
+
+        Args:
+            *endpoints: Read method names
+        """
+        with self._lock:
+            if not endpoints:
+                endpoints = tuple(set(self._generations) | set(self.ttls))
+            targets = set(endpoints)
+            for full_key in [k for k in self._entries if k[0] in targets]:
+                del self._entries[full_key]
+            for endpoint in targets:
+                self._generations[endpoint] = self._generations.get(endpoint, 0) + 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss statistics.
+
+        Returns:
+            Dict with totals, hit ratio and per-endpoint counters
+        """
+        with self._lock:
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+                'evictions': self.evictions,
+                'endpoints': {
+                    endpoint: {'hits': self.hits.get(endpoint, 0), 'misses': self.misses.get(endpoint, 0)}
+                    for endpoint in sorted(set(self.hits) | set(self.misses))
+                },
+            }
+
+
+def cached(endpoint: str):
+    """
+    Serve a Whoopy read method from ``self.cache`` and, for the endpoints it
+    keeps, ``self.persistent_cache`` when they are configured.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = self.cache
+            persistent = self.persistent_cache
+            if persistent is not None and endpoint not in persistent.stale_after:
+                persistent = None
+            if cache is None and persistent is None:
+                return func(self, *args, **kwargs)
+            key = (args, tuple(sorted(kwargs.items())))
+            if cache is not None:
+                value = cache.get(endpoint, key)
+                if value is not _MISSING:
+                    return value
+                generation = cache.generation(endpoint)
+            if persistent is not None:
+                # The store is shared between clients, so the output format is part of the key
+                value = persistent.fetch(self._cache_namespace(), endpoint, (key, self.raw),
+                                         lambda: func(self, *args, **kwargs))
+            else:
+                value = func(self, *args, **kwargs)
+            if cache is not None:
+                cache.set(endpoint, key, value, generation)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidate(client, *endpoints: str, persistent: bool = True) -> None:
+    """
+    Drop read endpoints from a Whoopy client's response cache and, unless
+    ``persistent`` is False, from its persistent cache. NAMES among the
+    endpoints clears the client's NameResolver.
+    """
+    if NAMES in endpoints:
+        if client.resolver is not None:
+            client.resolver.invalidate()
+        endpoints = tuple(endpoint for endpoint in endpoints if endpoint != NAMES)
+        if not endpoints:
+            return
+    if client.cache is not None:
+        client.cache.invalidate(*endpoints)
+    if persistent and client.persistent_cache is not None:
+        try:
+            namespace = client._cache_namespace()
+        except WhoopyError:
+            # The account cannot be looked up (e.g. it was just deleted)
+            return
+        client.persistent_cache.invalidate(namespace, *endpoints)
+
+
+def invalidates(*endpoints: str, persistent: bool = True):
+    """Invalidate cached read endpoints once a Whoopy write method returns or fails."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                invalidate(self, *endpoints, persistent=persistent)
+        return wrapper
+    return decorator
@@ -0,0 +1,446 @@
+"""
+``whoopy`` command line tool, with an optional warm background daemon.
+
+Every command prints its result as JSON::
+
+    whoopy info
+    whoopy locations --user-id 12345
+    whoopy online
+
+Credentials come from ``--token`` / ``WHOOPY_TOKEN`` or ``WHOOPY_EMAIL`` and
+``WHOOPY_PASSWORD`` (tokens from email login are kept in the default
+TokenStore). ``whoopy daemon start`` launches a background process that
+keeps one authenticated, pooled Whoopy client and its response cache;
+while it runs, commands are sent to it over a Unix socket instead of
+importing the HTTP stack and logging in on every invocation.
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+DEFAULT_SOCKET = os.path.join(os.path.expanduser('~'), '.whoopy', 'daemon.sock')
+DEFAULT_LOG = os.path.join(os.path.expanduser('~'), '.whoopy', 'daemon.log')
+START_TIMEOUT = 10.0
+
+
+def _fingerprint(token: str) -> str:
+    """Short hash identifying a token without revealing it"""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def _user_id(value: str):
+    """User ids are numbers in the API; keep anything else as given"""
+    return int(value) if value.isdigit() else value
+
+
+##############  Commands   ##############
+# name -> (handler(client, args), help, [(argument, options)])
+COMMANDS: Dict[str, tuple] = {}
+
+
+def _command(name: str, help: str, *arguments):
+    def decorator(func: Callable[[Any, Dict], Any]):
+        COMMANDS[name] = (func, help, arguments)
+        return func
+    return decorator
+
+
+@_command('info', 'Your account')
+def _info(cl, args):
+    return cl.info()
+
+
+@_command('friends', 'Your friends')
+def _friends(cl, args):
+    return cl.get_friends(raw=True)
+
+
+@_command('requested', 'Pending friend requests')
+def _requested(cl, args):
+    return cl.get_requested()
+
+
+@_command('locations', "Friends' locations, keyed by username",
+          ('--user-id', dict(type=_user_id, help='Only this user')))
+def _locations(cl, args):
+    return cl.get_locations(user_id=args.get('user_id'), raw=True)
+
+
+@_command('user', 'A user profile',
+          ('user_id', dict(type=_user_id)),
+          ('--friends', dict(action='store_true', help="Include the user's friends")))
+def _user(cl, args):
+    return cl.get_user(args['user_id'], friends=args.get('friends', False))
+
+
+@_command('find', 'Search users by display name', ('name', {}),
+          ('--all', dict(action='store_true', help='Every match instead of the first')))
+def _find(cl, args):
+    if args.get('all'):
+        return cl.find_users(args['name'])
+    return cl.find_user(args['name'])
+
+
+@_command('resolve', 'User id for a display name (remembered by the daemon)', ('name', {}))
+def _resolve(cl, args):
+    return {'user_id': cl.resolve_user_id(args['name'])}
+
+
+@_command('online', 'Go online')
+def _online(cl, args):
+    return cl.online()
+
+
+@_command('offline', 'Go offline')
+def _offline(cl, args):
+    return cl.offline()
+
+
+@_command('update-location', 'Send your location',
+          ('latitude', dict(type=float)), ('longitude', dict(type=float)),
+          ('--level', dict(type=int, help='Battery level 0-100')),
+          ('--speed', dict(type=float, help='Speed in km/h')))
+def _update_location(cl, args):
+    from .enums import DEFAULT_BATTERY_LEVEL
+
+    level = args.get('level')
+    return cl.update_location({"latitude": args['latitude'], "longitude": args['longitude']},
+                              level=DEFAULT_BATTERY_LEVEL if level is None else level,
+                              speed=args.get('speed') or 0.0)
+
+
+@_command('reacquire', "Ask a friend's device for a fresh location", ('user_id', dict(type=_user_id)))
+def _reacquire(cl, args):
+    return cl.reacquire_location(args['user_id'])
+
+
+@_command('message', 'Send a message to a room', ('room_id', {}), ('content', {}))
+def _message(cl, args):
+    return cl.send_message(args['room_id'], args['content'])
+
+
+@_command('request-friend', 'Send a friend request', ('user_id', dict(type=_user_id)))
+def _request_friend(cl, args):
+    return cl.request_friend(args['user_id'])
+
+
+@_command('cancel-request', 'Cancel a friend request', ('user_id', dict(type=_user_id)))
+def _cancel_request(cl, args):
+    return cl.delete_requested(args['user_id'])
+
+
+def run_command(cl, name: str, args: Dict) -> Dict:
+    """
+    Run one command and wrap the outcome.
+
+    Returns:
+        {"ok": True, "result": ...} or {"ok": False, "error": {...}}
+    """
+    try:
+        return {"ok": True, "result": COMMANDS[name][0](cl, args)}
+    except Exception as err:
+        return {"ok": False, "error": _error(err)}
+
+
+def _error(err: Exception) -> Dict:
+    error = {"type": type(err).__name__, "message": str(err)}
+    status = getattr(err, 'status_code', None)
+    if status is not None:
+        error["status_code"] = status
+    return error
+
+
+##############  Client   ##############
+def make_client(token: Optional[str] = None, base_url: Optional[str] = None, cache: bool = False):
+    """
+    Build a Whoopy client from a token or WHOOPY_* environment variables.
+
+    Args:
+        token: Access token (default: WHOOPY_TOKEN)
+        base_url: API base URL (default: WHOOPY_BASE_URL or the Whoo API)
+        cache: Enable the in-memory response cache
+
+    Returns:
+        Whoopy
+    """
+    from .client import Whoopy
+    from .enums import DEFAULT_BASE_URL
+    from .token_store import TokenStore
+
+    options = dict(verbose=False, lazy_validation=True, cache=cache or None,
+                   base_url=base_url or os.environ.get('WHOOPY_BASE_URL') or DEFAULT_BASE_URL)
+    token = token or os.environ.get('WHOOPY_TOKEN')
+    if token:
+        return Whoopy(access_token=token, **options)
+    email, password = os.environ.get('WHOOPY_EMAIL'), os.environ.get('WHOOPY_PASSWORD')
+    if email and password:
+        return Whoopy(email=email, password=password, token_store=TokenStore(), **options)
+    return Whoopy(**options)
+
+
+##############  Daemon   ##############
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.owner
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                name = request['command']
+            except (ValueError, KeyError, TypeError):
+                reply = {"ok": False, "error": {"type": "ProtocolError", "message": "bad request"}}
+            else:
+                reply = daemon.handle(name, request.get('args') or {})
+            self.wfile.write(json.dumps(reply, default=str).encode() + b'\n')
+            self.wfile.flush()
+
+
+class Daemon:
+    """
+    Unix socket server keeping one warm Whoopy client.
+
+    Requests and replies are single JSON lines:
+    ``{"command": "info", "args": {}}`` -> ``{"ok": true, "result": {...}}``.
+    Besides the COMMANDS it answers ``status`` and ``shutdown``.
+    """
+
+    def __init__(self, client, path: str = DEFAULT_SOCKET, idle_timeout: Optional[float] = None):
+        """
+        Initialize Daemon.
+
+        Args:
+            client: Whoopy client serving the commands
+            path: Socket path (default: ~/.whoopy/daemon.sock)
+            idle_timeout: Exit after this many seconds without a command (default: never)
+        """
+        self.client = client
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.started = time.time()
+        self.last_used = time.monotonic()
+        self.served = 0
+        self._lock = threading.Lock()
+        self.server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    def handle(self, name: str, args: Dict) -> Dict:
+        """Answer one request"""
+        with self._lock:
+            self.served += 1
+            self.last_used = time.monotonic()
+        if name == 'status':
+            return {"ok": True, "result": self.status()}
+        if name == 'shutdown':
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {"ok": True, "result": None}
+        if name not in COMMANDS:
+            return {"ok": False, "error": {"type": "UnknownCommand", "message": name}}
+        return run_command(self.client, name, args)
+
+    def status(self) -> Dict:
+        cache = self.client.cache
+        token = self.client.headers.get('Authorization', '')
+        return {"pid": os.getpid(), "socket": self.path, "uptime": time.time() - self.started,
+                "served": self.served, "cache": cache.stats() if cache is not None else None,
+                "base_url": self.client.base,
+                "token": _fingerprint(token.split(' ', 1)[-1]) if token else None}
+
+    def serve_forever(self) -> None:
+        """Listen on the socket until shutdown or the idle timeout"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            if _ping(self.path):
+                raise RuntimeError(f'A daemon is already listening on {self.path}')
+            os.unlink(self.path)
+
+        # Only the owner may connect: the socket acts with the daemon's credentials
+        umask = os.umask(0o177)
+        try:
+            self.server = socketserver.ThreadingUnixStreamServer(self.path, _DaemonHandler)
+        finally:
+            os.umask(umask)
+        self.server.daemon_threads = True
+        self.server.owner = self
+        if self.idle_timeout:
+            threading.Thread(target=self._watch_idle, daemon=True).start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.client.close()
+
+    def _watch_idle(self) -> None:
+        while True:
+            remaining = self.last_used + self.idle_timeout - time.monotonic()
+            if remaining <= 0:
+                self.server.shutdown()
+                return
+            time.sleep(min(remaining, 5.0))
+
+
+class DaemonError(Exception):
+    """A command reached the daemon but its reply was lost; it may have run"""
+
+
+def send(path: str, name: str, args: Optional[Dict] = None, timeout: Optional[float] = 60.0) -> Dict:
+    """
+    Send one command to a running daemon.
+
+    Returns:
+        Reply dict ({"ok": ..., "result"/"error": ...})
+
+    Raises:
+        OSError: If no daemon is listening on ``path`` (nothing was sent)
+        DaemonError: If the connection failed once the command was being sent
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        try:
+            sock.sendall(json.dumps({"command": name, "args": args or {}}).encode() + b'\n')
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    raise DaemonError(f'the daemon closed the connection before replying to {name}')
+                data += chunk
+            return json.loads(data)
+        except (OSError, ValueError) as err:
+            raise DaemonError(f'no reply from the daemon to {name}: {err}') from err
+
+
+def _ping(path: str) -> bool:
+    try:
+        return send(path, 'status', timeout=2.0)["ok"]
+    except (OSError, DaemonError):
+        return False
+
+
+def _serves(path: str, token: Optional[str], base_url: Optional[str]) -> bool:
+    """Whether the daemon on ``path`` acts with the given token and base URL (None: any)"""
+    if token is None and base_url is None:
+        return True
+    status = send(path, 'status', timeout=2.0).get("result") or {}
+    if token is not None and status.get("token") != _fingerprint(token):
+        return False
+    if base_url is not None and status.get("base_url") != (base_url if base_url.endswith('/') else base_url + '/'):
+        return False
+    return True
+
+
+def _start_daemon(args) -> Dict:
+    if _ping(args.socket):
+        if not _serves(args.socket, args.token, args.base_url):
+            return {"ok": False, "error": {"type": "DaemonError", "message":
+                    f'the daemon on {args.socket} uses another token or base URL; stop it first'}}
+        return {"ok": True, "result": send(args.socket, 'status')["result"]}
+    env = dict(os.environ)
+    if args.token:
+        # Passed in the environment rather than argv so it does not show in ps
+        env['WHOOPY_TOKEN'] = args.token
+    command = [sys.executable, '-m', 'whoopy.cli', '--socket', args.socket]
+    if args.base_url:
+        command += ['--base-url', args.base_url]
+    command += ['daemon', 'run']
+    if args.idle_timeout:
+        command += ['--idle-timeout', str(args.idle_timeout)]
+    os.makedirs(os.path.dirname(os.path.abspath(DEFAULT_LOG)), mode=0o700, exist_ok=True)
+    with open(DEFAULT_LOG, 'ab') as log:
+        process = subprocess.Popen(command, env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                   start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return {"ok": False, "error": {"type": "DaemonError",
+                                           "message": f'daemon exited with {process.returncode}, see {DEFAULT_LOG}'}}
+        if _ping(args.socket):
+            return {"ok": True, "result": send(args.socket, 'status')["result"]}
+        time.sleep(0.05)
+    return {"ok": False, "error": {"type": "DaemonError", "message": 'daemon did not start in time'}}
+
+
+def _daemon(args) -> Dict:
+    if args.action == 'run':
+        Daemon(make_client(args.token, args.base_url, cache=True), args.socket,
+               args.idle_timeout).serve_forever()
+        return {"ok": True, "result": None}
+    if args.action == 'start':
+        return _start_daemon(args)
+    if not _ping(args.socket):
+        if args.action == 'stop':
+            return {"ok": True, "result": None}
+        return {"ok": False, "error": {"type": "DaemonError", "message": f'no daemon on {args.socket}'}}
+    return send(args.socket, 'shutdown' if args.action == 'stop' else 'status')
+
+
+##############  Entry point   ##############
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='whoopy', description='Whoo API from the command line (JSON output)')
+    parser.add_argument('--token', help='Access token (default: WHOOPY_TOKEN)')
+    parser.add_argument('--base-url', help='API base URL (default: WHOOPY_BASE_URL or the Whoo API)')
+    parser.add_argument('--socket', default=os.environ.get('WHOOPY_SOCKET', DEFAULT_SOCKET),
+                        help='Daemon socket (default: WHOOPY_SOCKET or ~/.whoopy/daemon.sock)')
+    parser.add_argument('--no-daemon', action='store_true', help='Run in this process even if a daemon is up')
+    parser.add_argument('--indent', type=int, default=None, help='Pretty-print JSON output')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    for name, (_, help, arguments) in COMMANDS.items():
+        sub = commands.add_parser(name, help=help)
+        for argument, options in arguments:
+            sub.add_argument(argument, **options)
+
+    daemon = commands.add_parser('daemon', help='Manage the background daemon')
+    daemon.add_argument('action', choices=('start', 'stop', 'status', 'run'))
+    daemon.add_argument('--idle-timeout', type=float, default=None,
+                        help='Exit after this many idle seconds (default: never)')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == 'daemon':
+        reply = _daemon(args)
+    else:
+        values = {key: value for key, value in vars(args).items()
+                  if key not in ('token', 'base_url', 'socket', 'no_daemon', 'indent', 'command')}
+        reply = None
+        if not args.no_daemon and hasattr(socket, 'AF_UNIX') and os.path.exists(args.socket):
+            try:
+                # An explicit --token/--base-url must not be served by a daemon acting for another account
+                serves = _serves(args.socket, args.token, args.base_url)
+            except (OSError, DaemonError):
+                serves = False
+            if serves:
+                try:
+                    reply = send(args.socket, args.command, values)
+                except OSError:
+                    # Could not connect: nothing was sent, so running it here is safe
+                    reply = None
+                except DaemonError as err:
+                    # The daemon may have run it; running it again could repeat a write
+                    reply = {"ok": False, "error": _error(err)}
+        if reply is None:
+            cl = make_client(args.token, args.base_url)
+            with cl:
+                reply = run_command(cl, args.command, values)
+
+    if reply["ok"]:
+        if reply["result"] is not None:
+            print(json.dumps(reply["result"], default=str, ensure_ascii=False, indent=args.indent))
+        return 0
+    print(json.dumps({"error": reply["error"]}, ensure_ascii=False), file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
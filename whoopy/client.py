@@ -1,14 +1,88 @@
-import requests
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
 from uuid import uuid4
-from typing import Dict, Optional
-
-from .enums import BatteryState, HttpStatus, SPEED_CONVERSION_FACTOR, DEFAULT_BATTERY_LEVEL, DEFAULT_BATTERY_STATE
+from typing import Dict, List, Optional, Tuple
+
+from .cache import (ACCOUNT_ENDPOINTS, ALL_ENDPOINTS, FRIENDSHIP_ENDPOINTS, PRESENCE_ENDPOINTS,
+                    ResponseCache, cached, invalidate, invalidates)
+from .conditional import ConditionalCache
+from .decoding import decode_locations, iter_records, resolve_decoder
+from .enums import BatteryState, HttpStatus, SPEED_CONVERSION_FACTOR, DEFAULT_BASE_URL, DEFAULT_BATTERY_LEVEL, DEFAULT_BATTERY_STATE
+from .exceptions import RequestError, TokenRequiredError
+from .location import Location
+from .metrics import Metrics, bind_operation, instrumented
+from .models import FriendLocation, User as UserModel
+from .persistent import PersistentCache
+from .profile import Profile
+from .scheduler import RequestScheduler
+from .search import NameResolver, best_match, iter_matches, search_params
+from .singleflight import SingleFlight
+from .token_store import TokenStore
+from .user import User
+from .utils import HTTPClient, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+
+
+DEFAULT_PAGE_WORKERS = 4
+DEFAULT_BATCH_WORKERS = 8
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    'User-Agent': 'app.whoo/0.13.4 iOS/17.0',
+    'Accept-Language': 'ja-JP',
+    'Accept-Encoding': 'gzip, deflate, br'
+}
+
+
+def _location_form(location: Dict, level: int, state: BatteryState, speed: float,
+                   stayed_at: Optional[str], horizontal_accuracy: Optional[float]) -> Dict:
+    """Build the form body for PATCH api/user/location"""
+    data = {
+        "user_location[latitude]": str(location["latitude"]),
+        "user_location[longitude]": str(location["longitude"]),
+        "user_location[speed]": str(speed / SPEED_CONVERSION_FACTOR),
+        "user_battery[level]": str(level / 100),
+        "user_battery[state]": str(state.value)
+    }
+    if horizontal_accuracy:
+        data["user_location[horizontal_accuracy]"] = str(horizontal_accuracy)
+    if stayed_at:
+        data["user_location[stayed_at]"] = str(stayed_at)
+    return data
+
+
+def _linked_location(loc):
+    """Split an api/locations record into (username, record with Google Maps links)"""
+    # Copy so the decoded payload can be reused (e.g. after a 304)
+    user = dict(loc['user'])
+    name = user.pop('username')
+    loc = dict(loc, user=user)
+    loc["map"] = f"https://maps.google.com/maps?q={loc['latitude']},{loc['longitude']}&t=k&z=24"
+    loc['pano'] = f"https://www.google.com/maps/@?api=1&map_action=pano&viewpoint={loc['latitude']},{loc['longitude']}"
+    return name, loc
+
+
+def _index_locations(locations, user_id=None) -> Dict:
+    """Key api/locations records by username and add Google Maps links"""
+    return dict(_linked_location(loc) for loc in locations
+                if not user_id or user_id == loc['user']['id'])
 
 
 class Whoopy:
     """Whoopy class for Whoo API"""
 
-    def __init__(self, access_token=None, verbose=True, email=None, password=None):
+    def __init__(self, access_token=None, verbose=True, email=None, password=None,
+                 timeout: int = 30, pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE, pool_block: bool = False,
+                 keep_alive: bool = True, page_workers: int = DEFAULT_PAGE_WORKERS,
+                 token_store=None, lazy_validation: bool = False, cache=None,
+                 conditional=None, raw: bool = True, decoder='auto', retry=None,
+                 circuit_breaker=None, base_url: str = DEFAULT_BASE_URL, metrics=None,
+                 persistent_cache=None, transport='requests', single_flight=False,
+                 scheduler=None, resolver=None):
         """
         Initialize Whoopy
 
@@ -17,36 +91,249 @@ class Whoopy:
             verbose: Display login success message
             email: Email address (use with password)
             password: Password (use with email)
+            timeout: Request timeout in seconds. Default is 30
+            pool_connections: Number of per-host connection pools. Default is 10
+            pool_maxsize: Maximum kept-alive connections per host. Default is 10
+            pool_block: Wait for a free pooled connection instead of opening extra ones
+            keep_alive: Reuse connections between calls. Default is True
+            page_workers: Friend pages fetched concurrently by get_user. Default is 4
+            token_store: TokenStore or file path caching tokens for email login (optional)
+            lazy_validation: Check the token on the first call instead of here
+            cache: ResponseCache, or True for default TTLs, to cache read calls (optional)
+            conditional: ConditionalCache, or True, to revalidate get_locations and
+                get_friends with ETag/Last-Modified (optional)
+            raw: Return response dicts (True) or typed models from whoopy.models
+                (False) from get_locations and get_friends. Default is True
+            decoder: JSON decoder: 'auto' (orjson or msgspec when installed),
+                'orjson', 'msgspec', 'json' or a callable taking bytes
+            retry: RetryPolicy for transient failures; False disables retries
+                (default: RetryPolicy())
+            circuit_breaker: CircuitBreakers guarding each endpoint; False disables
+                them (default: CircuitBreakers())
+            base_url: API base URL, e.g. a local stand-in server. Default is
+                https://www.wh00.ooo/
+            metrics: Metrics, or True, to record per-operation request metrics (optional)
+            persistent_cache: PersistentCache, database path, or True for
+                ~/.whoopy/cache.db, to keep friends and profiles across restarts (optional)
+            transport: HTTP backend: 'requests', 'urllib3', 'httpx', 'http2' (httpx
+                with HTTP/2) or a whoopy.transport.Transport. Default is 'requests'
+            single_flight: SingleFlight, or True, to let concurrent identical GETs
+                share one in-flight request (optional)
+            scheduler: RequestScheduler, or True for 10 requests/s, to rate-limit calls
+                and send location/presence updates ahead of bulk reads (optional)
+            resolver: NameResolver memoizing resolve_user_id; False disables it
+                (default: NameResolver())
         """
-        self.base = 'https://www.wh00.ooo/'
-        self.headers = {
-            'Accept': 'application/json',
-            'User-Agent': 'app.whoo/0.13.4 iOS/17.0',
-            'Accept-Language': 'ja-JP',
-            'Accept-Encoding': 'gzip, deflate, br'
-        }
-
-        # Login with email/password
+        self.base = base_url if base_url.endswith('/') else base_url + '/'
+        self.metrics = Metrics() if metrics is True else metrics or None
+        # One pooled transport for every call; self.headers is its copy-on-write header map
+        self.client = HTTPClient(DEFAULT_HEADERS, timeout=timeout, pool_connections=pool_connections,
+                                 pool_maxsize=pool_maxsize, pool_block=pool_block,
+                                 keep_alive=keep_alive, retry=retry, breakers=circuit_breaker,
+                                 metrics=self.metrics, transport=transport,
+                                 single_flight=SingleFlight() if single_flight is True else single_flight or None,
+                                 scheduler=RequestScheduler() if scheduler is True else scheduler or None)
+        self.headers = self.client.headers
+        self.page_workers = page_workers
+        self.raw = raw
+        self._loads = resolve_decoder(decoder)
+        # get_locations may pick its own (msgspec) fast path only when the decoder was left to us
+        self._location_loads = None if decoder in (None, 'auto') else self._loads
+        self.cache = ResponseCache() if cache is True else cache or None
+        self.conditional = ConditionalCache() if conditional is True else conditional or None
+        self.resolver = NameResolver() if resolver is None or resolver is True else resolver or None
+        self._owns_persistent_cache = persistent_cache is True or isinstance(persistent_cache, str)
+        if self._owns_persistent_cache:
+            persistent_cache = PersistentCache(None if persistent_cache is True else persistent_cache)
+        self.persistent_cache = persistent_cache or None
+        self._namespace: Optional[Tuple[str, str]] = None
+        self.token_store = TokenStore(token_store) if isinstance(token_store, str) else token_store
+        self._credentials = None
+        self._validated = True
+        # Serializes re-login and the lazy creation of the helpers below
+        self._auth_lock = threading.RLock()
+        self._location = None
+        self._user = None
+        self._profile = None
+
+        # Login with email/password, reusing a cached token when available
         if access_token is None and email and password:
-            access_token = self.email_login(email, password)["access_token"]
+            if self.token_store is not None:
+                access_token = self.token_store.get(email)
+                self._credentials = (email, password)
+            if access_token is None:
+                self._credentials = None
+                access_token = self._login(email, password)
 
         # Token authentication
         if access_token:
-            self.headers["Authorization"] = f"Bearer {access_token}"
+            self._set_token(access_token)
+            self._validated = False
+            if lazy_validation:
+                return
             url = f'{self.base}api/my'
-            response = requests.get(url, headers=self.headers)
+            response = self._request('GET', url)
             if response.status_code == HttpStatus.OK:
-                self.token = True
                 if verbose:
                     print("Login successful!")
                 return
             else:
-                raise Exception(f'Request Error[{response.status_code}] (auth)')
+                raise RequestError.from_response(response, 'auth')
         else:
             self.token = None
 
+    def _set_token(self, access_token):
+        """Swap the access token; requests already sent keep the old one"""
+        self.headers["Authorization"] = f"Bearer {access_token}"
+        self.token = True
+
+    def _request(self, method, url, **kwargs):
+        """
+        Send a request on the pooled transport
+
+        The first response after authentication validates the token. If a
+        token taken from the token store is rejected, log in again with the
+        stored credentials and retry once. Safe to call from many threads:
+        only one of them logs in, and a request rejected because it was sent
+        with a token another thread has since replaced is retried with the new one.
+        """
+        sent_with = self.headers.get('Authorization')
+        response = self.client.request(method, url, **kwargs)
+        if response.status_code != HttpStatus.UNAUTHORIZED:
+            if not self._validated:
+                self._credentials = None
+                self._validated = True
+            return response
+
+        # Waits for a login running in another thread
+        with self._auth_lock:
+            credentials, self._credentials = self._credentials, None
+            self._validated = True
+            if credentials and self.headers.get('Authorization') == sent_with:
+                self._login(*credentials)
+        if self.headers.get('Authorization') != sent_with:
+            response.close()
+            response = self.client.request(method, url, **kwargs)
+        return response
+
+    def _decode(self, response):
+        """Decode a JSON response body with the configured decoder"""
+        return self._loads(response.content)
+
+    def _get_json(self, url, label):
+        """
+        GET a JSON body, revalidating with stored ETag/Last-Modified when
+        conditional requests are enabled
+        """
+        conditional = self.conditional
+        if conditional is None:
+            response = self._request('GET', url)
+        else:
+            response = self._request('GET', url, headers=conditional.request_headers(url))
+            if response.status_code == HttpStatus.NOT_MODIFIED:
+                data = conditional.revalidated(url)
+                if data is not None:
+                    return data
+                response = self._request('GET', url)
+
+        if response.status_code != HttpStatus.OK:
+            raise RequestError.from_response(response, label)
+
+        data = self._decode(response)
+        if conditional is not None:
+            conditional.store(url, response, data)
+        return data
+
+    def _stream_records(self, url, key, label, chunk_size):
+        """GET a JSON body and yield the items of its ``key`` array as they arrive"""
+        response = self._request('GET', url, stream=True)
+        try:
+            if response.status_code != HttpStatus.OK:
+                raise RequestError.from_response(response, label)
+            yield from iter_records(response.iter_content(chunk_size), key)
+        finally:
+            response.close()
+
+    def _login(self, email, password):
+        """Log in with email/password and cache the token in the token store"""
+        access_token = self.email_login(email, password)["access_token"]
+        if self.token_store is not None:
+            self.token_store.set(email, access_token)
+        return access_token
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close pooled connections"""
+        if self._owns_persistent_cache:
+            self.persistent_cache.close()
+        self.client.close()
+
+    def _invalidate(self, *endpoints: str) -> None:
+        """Drop cached reads made stale by a write sent through a helper"""
+        invalidate(self, *endpoints)
+
+    def _cache_namespace(self) -> str:
+        """
+        Persistent cache namespace of the signed-in account: a hash of the
+        base URL and its user id. It is looked up once per token and kept in
+        the store, so a restarted process serves stored responses without
+        waiting for (or reaching) the API
+        """
+        token = self.headers.get('Authorization', '')
+        memo = self._namespace
+        if memo is not None and memo[0] == token:
+            return memo[1]
+        credential = hashlib.sha256(f"{self.base} {token}".encode()).hexdigest()
+        namespace = self.persistent_cache.namespace(credential)
+        if namespace is None:
+            response = self._request('GET', f'{self.base}api/my')
+            if response.status_code != HttpStatus.OK:
+                raise RequestError.from_response(response, 'account info')
+            account = f"{self.base} {self._decode(response).get('id')}"
+            namespace = hashlib.sha256(account.encode()).hexdigest()[:16]
+            self.persistent_cache.remember_namespace(credential, namespace)
+        self._namespace = (token, namespace)
+        return namespace
+
+    @property
+    def location(self) -> Location:
+        """Location helper sharing this client's connection pool"""
+        if self._location is None:
+            with self._auth_lock:
+                if self._location is None:
+                    self._location = Location(self.headers, client=self.client, base_url=self.base,
+                                              on_write=self._invalidate)
+        return self._location
+
+    @property
+    def user(self) -> User:
+        """User helper sharing this client's connection pool"""
+        if self._user is None:
+            with self._auth_lock:
+                if self._user is None:
+                    self._user = User(self.headers, client=self.client, base_url=self.base)
+        return self._user
+
+    @property
+    def profile(self) -> Profile:
+        """Profile helper sharing this client's connection pool"""
+        if self._profile is None:
+            with self._auth_lock:
+                if self._profile is None:
+                    self._profile = Profile(self.headers, client=self.client, base_url=self.base,
+                                            on_write=self._invalidate)
+        return self._profile
+
 
     ##############  Account Settings   ##############
+    @instrumented('email_login')
+    # The persistent store is per account, so only the in-process cache may hold another account's data
+    @invalidates(*ALL_ENDPOINTS, persistent=False)
     def email_login(self, email, password):
         """
         Login with email address and password
@@ -63,14 +350,15 @@ class Whoopy:
             'email': email,
             'password': password
         }
-        response = requests.post(url, headers=self.headers, data=data)
+        response = self._request('POST', url, data=data)
         if response.status_code == HttpStatus.OK:
-            access_token = response.json()["access_token"]
-            self.headers["Authorization"] = f"Bearer {access_token}"
-            return response.json()
+            js = self._decode(response)
+            self._set_token(js['access_token'])
+            return js
         else:
-            raise Exception(f'Request Error[{response.status_code}] (email login)')
+            raise RequestError.from_response(response, 'email login')
 
+    @instrumented('create_account')
     def create_account(self, email, password, name, profile_image, username, location=None):
         """
         Create a new account
@@ -94,19 +382,19 @@ class Whoopy:
             'user[profile_image]': profile_image,
             'user[username]': username
         }
-        response = requests.post(url, headers=self.headers, data=data)
+        response = self._request('POST', url, data=data)
 
         if response.status_code != HttpStatus.OK:
-            raise Exception(f'Request Error[{response.status_code}] (account create)')
+            raise RequestError.from_response(response, 'account create')
 
         if location is None:
-            return response.json()
+            return self._decode(response)
 
         # Set location information
         headers = {
             'Accept': 'application/json',
             'User-Agent': 'app.whoo/0.13.4 iOS/17.0',
-            'Authorization': f"Bearer {response.json()['access_token']}",
+            'Authorization': f"Bearer {self._decode(response)['access_token']}",
             'Accept-Language': 'ja-JP',
             'Accept-Encoding': 'gzip, deflate, br'
         }
@@ -118,9 +406,11 @@ class Whoopy:
             "user_battery[state]": BatteryState.CHARGING
         }
         url = self.base + 'api/user/location'
-        response1 = requests.patch(url, headers=headers, data=data)
-        return response.json()
+        response1 = self._request('PATCH', url, headers=headers, data=data, idempotent=True)
+        return self._decode(response)
 
+    @instrumented('update_account')
+    @invalidates(*ACCOUNT_ENDPOINTS)
     def update_account(self, name=None, profile_image=None, username=None):
         """
         Update account information
@@ -139,12 +429,19 @@ class Whoopy:
             'user[profile_image]': profile_image,
             'user[username]': username
         }
-        response = requests.patch(url, headers=self.headers, data=data)
+        try:
+            response = self._request('PATCH', url, data=data, idempotent=True)
+        finally:
+            # Names this account was resolved by may have changed
+            if self.resolver is not None and (name is not None or username is not None):
+                self.resolver.invalidate()
         if response.status_code == HttpStatus.OK:
-            return response.json()
+            return self._decode(response)
         else:
-            raise Exception(f'Request Error[{response.status_code}] (account update)')
+            raise RequestError.from_response(response, 'account update')
 
+    @instrumented('delete_account')
+    @invalidates(*ALL_ENDPOINTS)
     def delete_account(self, alert=True):
         """
         Delete account
@@ -156,7 +453,7 @@ class Whoopy:
             str: 'Success' or 'Cancel'
         """
         if not self.token:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
         if alert:
             res = input('Are you sure? (y/n): ')
@@ -164,15 +461,17 @@ class Whoopy:
                 return 'Cancel'
 
         url = f'{self.base}api/user'
-        response = requests.delete(url, headers=self.headers)
+        response = self._request('DELETE', url)
 
         if response.status_code != HttpStatus.NO_CONTENT:
-            raise Exception(f'Request Error[{response.status_code}] (account delete)')
+            raise RequestError.from_response(response, 'account delete')
 
         return 'Success'
 
 
     ##############  Background Processing   ##############
+    @instrumented('info')
+    @cached('info')
     def info(self):
         """
         Get current user information
@@ -182,14 +481,16 @@ class Whoopy:
         """
         if self.token:
             url = f'{self.base}api/my'
-            response = requests.get(url, headers=self.headers)
+            response = self._request('GET', url)
             if response.status_code == HttpStatus.OK:
-                return response.json()
+                return self._decode(response)
             else:
-                raise Exception(f'Request Error[{response.status_code}] (account info)')
+                raise RequestError.from_response(response, 'account info')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
+    @instrumented('get_requested')
+    @cached('get_requested')
     def get_requested(self):
         """
         Get friend requests
@@ -199,35 +500,68 @@ class Whoopy:
         """
         if self.token:
             url = f'{self.base}api/friends/requested'
-            response = requests.get(url, headers=self.headers)
+            response = self._request('GET', url)
             if response.status_code == HttpStatus.OK:
-                return response.json()
+                return self._decode(response)
             else:
-                raise Exception(f'Request Error[{response.status_code}] (get requested)')
+                raise RequestError.from_response(response, 'get requested')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
-    def get_friends(self):
+    @instrumented('get_friends')
+    @cached('get_friends')
+    def get_friends(self, raw=None):
         """
         Get friends list
 
+        Args:
+            raw: Return the response dict instead of User models. Default is the
+                client's ``raw`` setting
+
         Returns:
-            Dict: Friends list
+            Dict: Friends list (List[User] when raw is False)
         """
         if self.token:
             url = f'{self.base}api/friends'
-            response = requests.get(url, headers=self.headers)
-            if response.status_code == HttpStatus.OK:
-                return response.json()
-            else:
-                raise Exception(f'Request Error[{response.status_code}] (get my friends)')
+            js = self._get_json(url, 'get my friends')
+            if self.raw if raw is None else raw:
+                return js
+            return [UserModel.from_dict(friend) for friend in js['friends']]
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
+    @instrumented('iter_friends')
+    def iter_friends(self, raw=None, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Stream the friends list, parsing the body as it arrives
+
+        Memory stays bounded by one chunk plus one friend, and the first
+        friend is available before the whole body has been received. Not
+        cached; the request is sent when iteration starts.
+
+        Args:
+            raw: Yield dicts instead of User models. Default is the client's ``raw`` setting
+            chunk_size: Bytes read from the connection at a time. Default is 64 KiB
+
+        Yields:
+            Dict (or User model): One friend at a time
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+        raw = self.raw if raw is None else raw
+        for friend in self._stream_records(f'{self.base}api/friends', 'friends',
+                                           'get my friends', chunk_size):
+            yield friend if raw else UserModel.from_dict(friend)
+
+    @instrumented('get_user')
+    @cached('get_user')
     def get_user(self, user_id, friends=False):
         """
         Get specific user information
 
+        Friend pages are fetched concurrently (up to page_workers at a time)
+        and merged in page order.
+
         Args:
             user_id: User ID
             friends: Also get friends list
@@ -235,16 +569,7 @@ class Whoopy:
         Returns:
             Dict: User information
         """
-        if not self.token:
-            raise Exception('Message: Token is required.')
-
-        url = f'{self.base}api/v2/users/{user_id}'
-        response = requests.get(url, headers=self.headers)
-
-        if response.status_code != HttpStatus.OK:
-            raise Exception(f'Request Error[{response.status_code}] (get about user info)')
-
-        js = response.json()
+        js = self._get_user_json(user_id)
 
         if not friends:
             del js["friends"], js["next_page"]
@@ -254,48 +579,211 @@ class Whoopy:
             return js
 
         # Get all friends with pagination
-        js["friends"] = []
-        for i in range(js["next_page"]):
-            url = f'{self.base}api/v2/users/{user_id}/friends?page={i + 1}'
-            response = requests.get(url, headers=self.headers)
-
-            if response.status_code != HttpStatus.OK:
-                raise Exception(f'Request Error[{response.status_code}] (get friends info)')
-
-            js["friends"] += response.json()["friends"]
+        pages = range(1, js["next_page"] + 1)
+        with ThreadPoolExecutor(max_workers=min(self.page_workers, len(pages))) as pool:
+            results = pool.map(bind_operation(lambda page: self._get_friends_page(user_id, page)), pages)
+            js["friends"] = list(chain.from_iterable(results))
 
         js["next_page"] = None
         return js
 
-    def find_user(self, user_name):
+    @instrumented('get_users')
+    def get_users(self, user_ids, workers: Optional[int] = None) -> List:
         """
-        Search for user by display name
+        Get several users' information at once
+
+        Duplicate ids are fetched once, cached users are served from the
+        response cache, and the rest are fetched concurrently, so the batch
+        takes about one round trip instead of one per user.
 
         Args:
-            user_name: Display name to search for
+            user_ids: User IDs
+            workers: Users fetched at a time. Default is 8
 
         Returns:
-            Dict: User information (first match)
+            List: get_user() result per id, in input order; a failed id holds
+            its exception instead of stopping the batch
         """
         if not self.token:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
+
+        user_ids = list(user_ids)
+        unique = list(dict.fromkeys(user_ids))
+        results = {}
+
+        def fetch(user_id):
+            try:
+                return self.get_user(user_id)
+            except Exception as err:
+                return err
+
+        if len(unique) == 1:
+            results[unique[0]] = fetch(unique[0])
+        elif unique:
+            with ThreadPoolExecutor(max_workers=min(workers or DEFAULT_BATCH_WORKERS, len(unique))) as pool:
+                results = dict(zip(unique, pool.map(bind_operation(fetch), unique)))
+        return [results[user_id] for user_id in user_ids]
+
+    @instrumented('iter_user_friends')
+    def iter_user_friends(self, user_id, prefetch=None):
+        """
+        Iterate over a user's friends page by page
 
-        params = {
-            "display_name": user_name
-        }
+        Pages are requested ahead of the caller (at most ``prefetch`` at a
+        time), so processing can start with the first page while memory stays
+        bounded by the look-ahead window.
+
+        Args:
+            user_id: User ID
+            prefetch: Pages fetched ahead of the consumer. Default is page_workers
+
+        Yields:
+            Dict: Friend information, in page order
+        """
+        js = self._get_user_json(user_id)
+        if not js["next_page"]:
+            yield from js["friends"]
+            return
+
+        pages = iter(range(1, js["next_page"] + 1))
+        del js
+        prefetch = prefetch or self.page_workers
+        fetch = bind_operation(self._get_friends_page)
+        pool = ThreadPoolExecutor(max_workers=prefetch)
+        pending = deque()
+        try:
+            pending.extend(pool.submit(fetch, user_id, page) for page in islice(pages, prefetch))
+            while pending:
+                friends = pending.popleft().result()
+                page = next(pages, None)
+                if page is not None:
+                    pending.append(pool.submit(fetch, user_id, page))
+                yield from friends
+        finally:
+            # Pages not started yet are dropped when the consumer stops early
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def _get_user_json(self, user_id):
+        """GET api/v2/users/{user_id} and return the decoded body"""
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        url = f'{self.base}api/v2/users/{user_id}'
+        response = self._request('GET', url)
+
+        if response.status_code != HttpStatus.OK:
+            raise RequestError.from_response(response, 'get about user info')
+
+        return self._decode(response)
+
+    def _get_friends_page(self, user_id, page):
+        """GET one page of api/v2/users/{user_id}/friends"""
+        url = f'{self.base}api/v2/users/{user_id}/friends?page={page}'
+        response = self._request('GET', url)
+
+        if response.status_code != HttpStatus.OK:
+            raise RequestError.from_response(response, 'get friends info')
+
+        return self._decode(response)["friends"]
+
+    def _search_page(self, user_name, page):
+        """GET one page of api/friends/search (the first if page is None)"""
         url = f'{self.base}api/friends/search'
-        response = requests.get(url, params=params, headers=self.headers)
+        response = self._request('GET', url, params=search_params(user_name, page))
 
         if response.status_code != HttpStatus.OK:
-            raise Exception(f'Request Error[{response.status_code}] (find user)')
+            raise RequestError.from_response(response, 'find user')
 
-        data = response.json()
-        friends = data.get("friends")
+        return self._decode(response)
+
+    @instrumented('find_user')
+    @cached('find_user')
+    def find_user(self, user_name):
+        """
+        Search for user by display name
+
+        Args:
+            user_name: Display name to search for
+
+        Returns:
+            Dict: User information (first match)
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        friends = self._search_page(user_name, None).get("friends")
         if not isinstance(friends, list) or len(friends) == 0:
             raise ValueError(f"No user found with name '{user_name}'.")
 
         return friends[0]
 
+    @instrumented('search_users')
+    def search_users(self, user_name):
+        """
+        Iterate over every user matching a display name
+
+        Result pages are requested as the iteration reaches them, so stopping
+        early saves the remaining requests.
+
+        Args:
+            user_name: Display name to search for
+
+        Yields:
+            Dict: User information, in result order
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        yield from iter_matches(lambda page: self._search_page(user_name, page))
+
+    @instrumented('find_users')
+    @cached('find_users')
+    def find_users(self, user_name, limit=None):
+        """
+        Search for every user matching a display name
+
+        Args:
+            user_name: Display name to search for
+            limit: Stop after this many matches (optional)
+
+        Returns:
+            List[Dict]: User information of each match (empty if none)
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        return list(islice(iter_matches(lambda page: self._search_page(user_name, page)), limit))
+
+    @instrumented('resolve_user_id')
+    def resolve_user_id(self, user_name):
+        """
+        Get the user id for a display name, memoized in ``self.resolver``
+
+        A user whose display name (or username) equals ``user_name`` is
+        preferred over other matches. Names without a match are remembered
+        too, for ``resolver.negative_ttl`` seconds.
+
+        Args:
+            user_name: Display name
+
+        Returns:
+            int: User ID, or None if no user matches
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+
+        if self.resolver is None:
+            return self._lookup_user_id(user_name)
+        return self.resolver.resolve(user_name, self._lookup_user_id)
+
+    def _lookup_user_id(self, user_name):
+        """Search for user_name and return the id of the best match"""
+        user = best_match(iter_matches(lambda page: self._search_page(user_name, page)), user_name)
+        return user["id"] if user is not None else None
+
+    @instrumented('reacquire_location')
     def reacquire_location(self, user_id):
         """
         Send location request to user
@@ -308,14 +796,16 @@ class Whoopy:
         """
         if self.token:
             url = self.base + f'api/users/{user_id}/location_request'
-            response = requests.get(url, headers=self.headers)
+            response = self._request('GET', url)
             if response.status_code == HttpStatus.OK:
-                return response.json()
+                return self._decode(response)
             else:
-                raise Exception(f'Request Error[{response.status_code}] (send location request)')
+                raise RequestError.from_response(response, 'send location request')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
+    @instrumented('update_location')
+    @invalidates(*PRESENCE_ENDPOINTS)
     def update_location(self, location: Dict, level: int = DEFAULT_BATTERY_LEVEL,
                        state: BatteryState = DEFAULT_BATTERY_STATE,
                        speed: float = 0.0, stayed_at: Optional[str] = None,
@@ -336,58 +826,82 @@ class Whoopy:
         """
         if self.token:
             url = f'{self.base}api/user/location'
-            data = {
-                "user_location[latitude]": str(location["latitude"]),
-                "user_location[longitude]": str(location["longitude"]),
-                "user_location[speed]": str(speed / SPEED_CONVERSION_FACTOR),
-                "user_battery[level]": str(level / 100),
-                "user_battery[state]": str(state.value)
-            }
-            if horizontal_accuracy:
-                data["user_location[horizontal_accuracy]"] = str(horizontal_accuracy)
-            if stayed_at:
-                data["user_location[stayed_at]"] = str(stayed_at)
-            response = requests.patch(url, headers=self.headers, data=data)
+            data = _location_form(location, level, state, speed, stayed_at, horizontal_accuracy)
+            response = self._request('PATCH', url, data=data, idempotent=True)
             if response.status_code == HttpStatus.OK:
-                return response.json()
+                return self._decode(response)
             else:
-                raise Exception(f'Request Error[{response.status_code}] (post location)')
+                raise RequestError.from_response(response, 'post location')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
-    def get_locations(self, user_id=None):
+    @instrumented('get_locations')
+    def get_locations(self, user_id=None, raw=None):
         """
         Get friends' location information
 
         Args:
             user_id: Filter by specific user ID (optional)
+            raw: Return dicts instead of FriendLocation models. Default is the
+                client's ``raw`` setting
 
         Returns:
-            Dict: Location information (with Google Maps links)
+            Dict: Location information keyed by username (with Google Maps links)
         """
         if not self.token:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
         url = self.base + 'api/locations'
-        response = requests.get(url, headers=self.headers)
+        raw = self.raw if raw is None else raw
+        if self.conditional is None:
+            # Decode straight from the body so filtered-out records are skipped
+            response = self._request('GET', url)
+            if response.status_code != HttpStatus.OK:
+                raise RequestError.from_response(response, 'get locations')
+            locations = decode_locations(response.content, self._location_loads, user_id, typed=not raw)
+        else:
+            locations = self._get_json(url, 'get locations')['locations']
+            if not raw:
+                locations = [FriendLocation.from_dict(loc) for loc in locations
+                             if not user_id or user_id == loc['user']['id']]
 
-        if response.status_code != HttpStatus.OK:
-            raise Exception(f'Request Error[{response.status_code}] (get locations)')
+        if raw:
+            return _index_locations(locations, user_id)
+        return {loc.user.username: loc for loc in locations}
 
-        js = {}
-        for loc in response.json()['locations']:
-            name = loc['user']['username']
-            del loc['user']['username']
+    @instrumented('iter_locations')
+    def iter_locations(self, user_id=None, raw=None, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE):
+        """
+        Stream friends' locations, parsing the body as it arrives
 
-            if user_id and user_id != loc['user']['id']:
-                continue
+        Yields the same pairs as ``get_locations().items()`` one at a time, so
+        memory stays bounded by one chunk plus one record however many
+        friends there are. The request is sent when iteration starts.
 
-            loc["map"] = f"https://maps.google.com/maps?q={loc['latitude']},{loc['longitude']}&t=k&z=24"
-            loc['pano'] = f'https://www.google.com/maps/@?api=1&map_action=pano&viewpoint={loc['latitude']},{loc['longitude']}'
-            js[name] = loc
+        Args:
+            user_id: Filter by specific user ID (optional)
+            raw: Yield dicts instead of FriendLocation models. Default is the
+                client's ``raw`` setting
+            chunk_size: Bytes read from the connection at a time. Default is 64 KiB
 
-        return js
+        Yields:
+            Tuple: (username, location dict with Google Maps links, or FriendLocation)
+        """
+        if not self.token:
+            raise TokenRequiredError('Message: Token is required.')
+        raw = self.raw if raw is None else raw
+        for loc in self._stream_records(self.base + 'api/locations', 'locations',
+                                        'get locations', chunk_size):
+            if user_id and user_id != loc['user']['id']:
+                continue
+            if raw:
+                yield _linked_location(loc)
+            else:
+                loc = FriendLocation.from_dict(loc)
+                yield loc.user.username, loc
 
+    @instrumented('online')
+    @invalidates(*PRESENCE_ENDPOINTS)
     def online(self):
         """
         Go online
@@ -397,14 +911,16 @@ class Whoopy:
         """
         if self.token:
             url = self.base + f'api/user/online'
-            response = requests.patch(url, headers=self.headers)
+            response = self._request('PATCH', url, idempotent=True)
             if response.status_code == HttpStatus.OK:
-                return response.json()
+                return self._decode(response)
             else:
-                raise Exception(f'Request Error[{response.status_code}] (online)')
+                raise RequestError.from_response(response, 'online')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
+    @instrumented('offline')
+    @invalidates(*PRESENCE_ENDPOINTS)
     def offline(self):
         """
         Go offline
@@ -414,16 +930,17 @@ class Whoopy:
         """
         if self.token:
             url = self.base + f'api/user/offline'
-            response = requests.patch(url, headers=self.headers)
+            response = self._request('PATCH', url, idempotent=True)
             if response.status_code == HttpStatus.NO_CONTENT:
                 return 'success'
             else:
-                raise Exception(f'Request Error[{response.status_code}] (offline)')
+                raise RequestError.from_response(response, 'offline')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
 
     ##############  Basic Operations   ##############
+    @instrumented('send_stamp')
     def send_stamp(self, user_id, stamp_id, quantity):
         """
         Send stamp message
@@ -443,14 +960,15 @@ class Whoopy:
                 "message[stamp_id]": stamp_id,
                 "message[stamp_count]": quantity
             }
-            response = requests.post(url, headers=self.headers, data=data)
+            response = self._request('POST', url, data=data)
             if response.status_code == HttpStatus.NO_CONTENT:
                 return response
             else:
-                raise Exception(f'Request Error[{response.status_code}] (stamp message)')
+                raise RequestError.from_response(response, 'stamp message')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
+    @instrumented('send_message')
     def send_message(self, room_id, content):
         """
         Send text message
@@ -468,14 +986,16 @@ class Whoopy:
                 "message[uid]": uuid4(),
                 "message[body]": content
             }
-            response = requests.post(url, headers=self.headers, data=data)
+            response = self._request('POST', url, data=data)
             if response.status_code == HttpStatus.OK:
-                return response.json()
+                return self._decode(response)
             else:
-                raise Exception(f'Request Error[{response.status_code}] (send message)')
+                raise RequestError.from_response(response, 'send message')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
+    @instrumented('request_friend')
+    @invalidates(*FRIENDSHIP_ENDPOINTS)
     def request_friend(self, user_id):
         """
         Send friend request
@@ -491,14 +1011,16 @@ class Whoopy:
             data = {
                 "user_id": user_id
             }
-            response = requests.post(url, headers=self.headers, data=data)
+            response = self._request('POST', url, data=data)
             if response.status_code == HttpStatus.OK:
-                return response.json()
+                return self._decode(response)
             else:
-                raise Exception(f'Request Error[{response.status_code}] (request friend)')
+                raise RequestError.from_response(response, 'request friend')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
 
+    @instrumented('delete_requested')
+    @invalidates(*FRIENDSHIP_ENDPOINTS)
     def delete_requested(self, user_id):
         """
         Delete sent friend request
@@ -511,10 +1033,10 @@ class Whoopy:
         """
         if self.token:
             url = self.base + f'api/friendships/{user_id}/retire'
-            response = requests.delete(url, headers=self.headers)
+            response = self._request('DELETE', url)
             if response.status_code == HttpStatus.OK:
-                return response.json()
+                return self._decode(response)
             else:
-                raise Exception(f'Request Error[{response.status_code}] (delete requested)')
+                raise RequestError.from_response(response, 'delete requested')
         else:
-            raise Exception('Message: Token is required.')
+            raise TokenRequiredError('Message: Token is required.')
@@ -0,0 +1,121 @@
+"""ETag / Last-Modified revalidation for polled endpoints."""
+import copy
+import threading
+from typing import Any, Dict, Optional
+
+
+class _Entry:
+    __slots__ = ('etag', 'last_modified', 'data', 'size')
+
+    def __init__(self, etag, last_modified, data, size):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.data = data
+        self.size = size
+
+
+class ConditionalCache:
+    """
+    Per-URL validators and parsed bodies for conditional GETs.
+
+    The last 200 response of each URL is kept together with its ``ETag`` and
+    ``Last-Modified`` headers. Those are sent back as ``If-None-Match`` /
+    ``If-Modified-Since`` and a ``304 Not Modified`` answer is served from the
+    stored, already-decoded body. As in ResponseCache, bodies are copied in
+    and out, so callers may mutate what they get back.
+    """
+
+    def __init__(self):
+        """Initialize ConditionalCache."""
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+        self.bytes_saved = 0
+
+    def request_headers(self, url: str) -> Optional[Dict[str, str]]:
+        """
+        Validator headers for the next request to ``url``.
+
+        Returns:
+            Conditional request headers, or None if nothing is stored
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers or None
+
+    def store(self, url: str, response, data: Any) -> None:
+        """
+        Record a 200 response.
+
+        Args:
+            url: Request URL
+            response: HTTP response carrying the validators
+            data: Decoded response body
+        """
+        size = int(response.headers.get('Content-Length') or len(response.content))
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            data = copy.deepcopy(data)
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += size
+            if etag or last_modified:
+                self._entries[url] = _Entry(etag, last_modified, data, size)
+            else:
+                self._entries.pop(url, None)
+
+    def revalidated(self, url: str) -> Optional[Any]:
+        """
+        Record a 304 response.
+
+        Returns:
+            The stored body for ``url``, or None if it was dropped meanwhile
+        """
+        with self._lock:
+            self.requests += 1
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            self.not_modified += 1
+            self.bytes_saved += entry.size
+            data = entry.data
+        # Callers are free to mutate what they get back
+        return copy.deepcopy(data)
+
+    def invalidate(self, url: Optional[str] = None) -> None:
+        """
+        Forget stored validators.
+
+        Args:
+            url: URL to forget (all URLs if omitted)
+        """
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(url, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Revalidation counters.
+
+        Returns:
+            Dict with request, 304 and byte counters and the 304 ratio
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'not_modified': self.not_modified,
+                'not_modified_ratio': self.not_modified / self.requests if self.requests else 0.0,
+                'bytes_received': self.bytes_received,
+                'bytes_saved': self.bytes_saved,
+            }
@@ -0,0 +1,295 @@
+"""Pluggable JSON decoding (orjson / msgspec / stdlib json)."""
+import codecs
+import json
+import re
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Union
+
+from .models import Battery, FriendLocation, User, battery_state
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+Loads = Callable[[Union[bytes, str]], Any]
+
+
+def resolve_decoder(decoder: Union[str, Loads, None] = 'auto') -> Loads:
+    """
+    Pick a JSON ``loads`` function.
+
+    Args:
+        decoder: 'auto' (fastest installed), 'orjson', 'msgspec', 'json', or a
+            callable taking bytes
+
+    Returns:
+        Callable decoding bytes into Python objects
+
+    Raises:
+        ImportError: If the requested decoder is not installed
+        ValueError: If the decoder name is unknown
+    """
+    if callable(decoder):
+        return decoder
+    if decoder in (None, 'auto'):
+        decoder = 'orjson' if orjson is not None else 'msgspec' if msgspec is not None else 'json'
+
+    if decoder == 'json':
+        return json.loads
+    if decoder == 'orjson':
+        if orjson is None:
+            raise ImportError("decoder='orjson' requires orjson: pip install 'whoopy[fast]'")
+        return orjson.loads
+    if decoder == 'msgspec':
+        if msgspec is None:
+            raise ImportError("decoder='msgspec' requires msgspec: pip install 'whoopy[fast]'")
+        return _any
+    raise ValueError(f"Unknown decoder '{decoder}'")
+
+
+if msgspec is not None:
+    class _UserStruct(msgspec.Struct):
+        id: Any
+        username: Optional[str] = None
+        display_name: Optional[str] = None
+        profile_image: Optional[str] = None
+
+    class _BatteryStruct(msgspec.Struct):
+        level: Optional[float] = None
+        state: Optional[int] = None
+
+    class _LocationStruct(msgspec.Struct):
+        user: _UserStruct
+        latitude: float
+        longitude: float
+        speed: Optional[float] = None
+        horizontal_accuracy: Optional[float] = None
+        battery_level: Optional[float] = None
+        battery_state: Optional[int] = None
+        battery: Optional[_BatteryStruct] = None
+        updated_at: Optional[str] = None
+        stayed_at: Optional[str] = None
+
+    class _UserIdStruct(msgspec.Struct):
+        id: Any
+
+    class _RecordUserId(msgspec.Struct):
+        user: _UserIdStruct
+
+    class _RawLocations(msgspec.Struct):
+        locations: List[msgspec.Raw]
+
+    class _TypedLocations(msgspec.Struct):
+        locations: List[_LocationStruct]
+
+    # strict=False accepts numbers sent as strings (e.g. "35.6762")
+    _raw_locations = msgspec.json.Decoder(_RawLocations).decode
+    _record_user_id = msgspec.json.Decoder(_RecordUserId, strict=False).decode
+    _typed_locations = msgspec.json.Decoder(_TypedLocations, strict=False).decode
+    _typed_location = msgspec.json.Decoder(_LocationStruct, strict=False).decode
+    _any = msgspec.json.Decoder().decode
+
+
+def _from_struct(loc) -> FriendLocation:
+    battery = loc.battery
+    level = battery.level if battery is not None else loc.battery_level
+    state = battery.state if battery is not None else loc.battery_state
+    user = loc.user
+    return FriendLocation(
+        User(user.id, user.username, user.display_name, user.profile_image),
+        loc.latitude, loc.longitude, loc.speed, loc.horizontal_accuracy,
+        Battery(level, battery_state(state)), loc.updated_at, loc.stayed_at,
+    )
+
+
+def decode_locations(body: bytes, loads: Optional[Loads] = None, user_id=None,
+                     typed: bool = False) -> list:
+    """
+    Decode an ``api/locations`` body into location records.
+
+    When ``loads`` is None (auto) or the msgspec decoder and msgspec is
+    installed, filtering by ``user_id`` only decodes each record's
+    ``user.id`` and fully decodes the matching record, and typed decoding
+    builds FriendLocation models without intermediate dicts. Otherwise the
+    body is decoded with ``loads`` and filtered afterwards.
+
+    Args:
+        body: Raw response body
+        loads: Decoder from resolve_decoder, or None to pick the fastest (default)
+        user_id: Only return this user's record (optional)
+        typed: Return FriendLocation models instead of dicts
+
+    Returns:
+        List of record dicts (or FriendLocation models when typed)
+    """
+    if msgspec is not None and (loads is None or loads is _any):
+        if user_id:
+            matches = [raw for raw in _raw_locations(body).locations
+                       if _record_user_id(raw).user.id == user_id]
+            if typed:
+                return [_from_struct(_typed_location(raw)) for raw in matches]
+            return [_any(raw) for raw in matches]
+        if typed:
+            return [_from_struct(loc) for loc in _typed_locations(body).locations]
+
+    if loads is None:
+        loads = resolve_decoder()
+    locations = loads(body)['locations']
+    if user_id:
+        locations = [loc for loc in locations if loc['user']['id'] == user_id]
+    if typed:
+        return [FriendLocation.from_dict(loc) for loc in locations]
+    return locations
+
+
+_TOKEN = re.compile(r'["\[\]{}]')
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+_SKIP = re.compile(r'[\s,]*')
+# Looser than JSON so a number cut off after '.', 'e' or a sign still matches up to the cut
+_NUMBER = re.compile(r'-?\d*(?:\.\d*)?(?:[eE][+-]?\d*)?')
+_raw_decode = json.JSONDecoder().raw_decode
+
+
+class RecordStream:
+    """
+    Push parser for the items of the top-level ``key`` array of a JSON object.
+
+    Feed the body in arbitrary pieces; each item is decoded as soon as its
+    closing bracket has arrived and the consumed text is dropped, so memory
+    stays at about one piece plus one item however long the array is.
+    """
+
+    def __init__(self, key: str):
+        """
+        Initialize RecordStream.
+
+        Args:
+            key: Name of the array member, e.g. 'locations'
+        """
+        self.key = key
+        self.done = False
+        self._key_token = json.dumps(key)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._depth = 0
+        self._key_seen = False
+        self._in_array = False
+
+    def feed(self, data: bytes) -> List[Any]:
+        """
+        Add body bytes.
+
+        Returns:
+            Items completed by this piece (empty once the array has closed)
+        """
+        if self.done:
+            return []
+        self._buf = self._buf[self._pos:] + self._text.decode(data)
+        self._pos = 0
+        return self._parse(False)
+
+    def end(self) -> List[Any]:
+        """
+        Signal the end of the body.
+
+        Returns:
+            Items still pending (e.g. a trailing number)
+
+        Raises:
+            ValueError: If the body ended before the array closed or is not valid JSON
+        """
+        if self.done:
+            return []
+        self._buf = self._buf[self._pos:] + self._text.decode(b'', final=True)
+        self._pos = 0
+        items = self._parse(True)
+        if not self.done:
+            raise ValueError(f"JSON body ended before the '{self.key}' array was complete")
+        return items
+
+    def _parse(self, final: bool) -> List[Any]:
+        items = []
+        buf, pos = self._buf, self._pos
+        if not self._in_array:
+            pos = self._seek(buf, pos)
+        if self._in_array:
+            while True:
+                pos = _SKIP.match(buf, pos).end()
+                if pos == len(buf):
+                    break
+                if buf[pos] == ']':
+                    self.done = True
+                    pos += 1
+                    break
+                number_end = _NUMBER.match(buf, pos).end()
+                # A number may continue in the next piece unless something follows it
+                if number_end == len(buf) and not final:
+                    break
+                try:
+                    item, end = _raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Most likely cut off mid-item: wait for more
+                    if final:
+                        raise
+                    break
+                if end < number_end:
+                    # e.g. '2500.' followed by a delimiter
+                    raise json.JSONDecodeError('Invalid number', buf, end)
+                items.append(item)
+                pos = end
+        self._pos = pos
+        return items
+
+    def _seek(self, buf: str, pos: int) -> int:
+        """Scan the top-level members up to the opening bracket of the array"""
+        while True:
+            match = _TOKEN.search(buf, pos)
+            if match is None:
+                return len(buf)
+            start, token = match.start(), match.group()
+            if token == '"':
+                tail = _STRING_TAIL.match(buf, start + 1)
+                if tail is None:
+                    return start
+                self._key_seen = self._depth == 1 and buf[start:tail.end()] == self._key_token
+                pos = tail.end()
+                continue
+            pos = start + 1
+            if token == '[' and self._key_seen:
+                self._in_array = True
+                return pos
+            self._key_seen = False
+            self._depth += 1 if token in '[{' else -1
+            if self._depth <= 0:
+                raise ValueError(f"JSON body has no '{self.key}' array")
+
+
+def iter_records(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    Incrementally decode the items of the top-level ``key`` array of a JSON object.
+
+    Anything after the array is not read.
+
+    Args:
+        chunks: Body bytes in arbitrary pieces (e.g. Response.iter_content())
+        key: Name of the array member, e.g. 'locations'
+
+    Yields:
+        Decoded array items
+
+    Raises:
+        ValueError: If the body ends early or is not valid JSON
+    """
+    stream = RecordStream(key)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+        if stream.done:
+            return
+    yield from stream.end()
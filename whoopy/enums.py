@@ -13,14 +13,20 @@ class HttpStatus(IntEnum):
     """Enum representing HTTP status codes"""
     OK = 200
     NO_CONTENT = 204
+    NOT_MODIFIED = 304
     BAD_REQUEST = 400
     UNAUTHORIZED = 401
     FORBIDDEN = 403
     NOT_FOUND = 404
+    TOO_MANY_REQUESTS = 429
     INTERNAL_SERVER_ERROR = 500
+    BAD_GATEWAY = 502
+    SERVICE_UNAVAILABLE = 503
+    GATEWAY_TIMEOUT = 504
 
 
 # Other constants
+DEFAULT_BASE_URL = 'https://www.wh00.ooo/'
 SPEED_CONVERSION_FACTOR = 3.6  # Conversion factor from km/h to m/s
 DEFAULT_BATTERY_LEVEL = 100
 DEFAULT_BATTERY_STATE = BatteryState.UNKNOWN
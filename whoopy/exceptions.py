@@ -0,0 +1,109 @@
+"""Exception types raised by Whoopy."""
+from typing import Optional
+
+from .enums import HttpStatus
+
+
+class WhoopyError(Exception):
+    """Base class for all Whoopy errors"""
+
+
+class TokenRequiredError(WhoopyError):
+    """The call needs an authenticated client"""
+
+
+class RequestError(WhoopyError):
+    """The API answered with an unexpected status code"""
+
+    retryable = False
+
+    def __init__(self, message: str, status_code: Optional[int] = None, operation: Optional[str] = None,
+                 response=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.operation = operation
+        self.response = response
+
+    @classmethod
+    def from_response(cls, response, operation: str) -> 'RequestError':
+        """
+        Build the most specific error for a response.
+
+        Args:
+            response: HTTP response with an unexpected status
+            operation: Short description of the failed call
+
+        Returns:
+            RequestError subclass instance
+        """
+        status = response.status_code
+        if status == HttpStatus.TOO_MANY_REQUESTS:
+            error_cls = RateLimitError
+        elif status in (HttpStatus.UNAUTHORIZED, HttpStatus.FORBIDDEN):
+            error_cls = AuthenticationError
+        elif status == HttpStatus.NOT_FOUND:
+            error_cls = NotFoundError
+        elif status >= HttpStatus.INTERNAL_SERVER_ERROR:
+            error_cls = ServerError
+        else:
+            error_cls = RequestError
+        return error_cls(f'Request Error[{status}] ({operation})', status, operation, response)
+
+
+class AuthenticationError(RequestError):
+    """The token or credentials were rejected (401/403)"""
+
+
+class NotFoundError(RequestError):
+    """The requested resource does not exist (404)"""
+
+
+class RateLimitError(RequestError):
+    """Too many requests (429); retry after ``retry_after`` seconds if set"""
+
+    retryable = True
+
+    @property
+    def retry_after(self) -> Optional[float]:
+        from .retry import parse_retry_after
+        if self.response is None:
+            return None
+        return parse_retry_after(self.response.headers.get('Retry-After'))
+
+
+class ServerError(RequestError):
+    """The server failed to handle the request (5xx)"""
+
+    retryable = True
+
+
+class TransportError(WhoopyError):
+    """The request could not be completed (connection error, timeout)"""
+
+    retryable = True
+
+
+class ConnectTimeoutError(TransportError):
+    """Connecting timed out, so the request never reached the server"""
+
+
+class CircuitOpenError(WhoopyError):
+    """The endpoint failed repeatedly and calls are failing fast"""
+
+    retryable = True
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f'Circuit open for {endpoint}; retry in {retry_in:.1f}s')
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class QueueFullError(WhoopyError):
+    """The request scheduler shed the call: its queue was full or the wait timed out"""
+
+    retryable = True
+
+    def __init__(self, endpoint: str, reason: str):
+        super().__init__(f'Request to {endpoint} shed by the scheduler ({reason})')
+        self.endpoint = endpoint
+        self.reason = reason
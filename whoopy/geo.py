@@ -0,0 +1,36 @@
+"""Geodesic helpers shared by location features."""
+from math import asin, atan2, cos, degrees, radians, sin, sqrt
+
+EARTH_RADIUS_M = 6371008.8  # Mean Earth radius in meters
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points.
+
+    Args:
+        lat1: Latitude of the first point in degrees
+        lon1: Longitude of the first point in degrees
+        lat2: Latitude of the second point in degrees
+        lon2: Longitude of the second point in degrees
+
+    Returns:
+        Distance in meters
+    """
+    phi1, phi2 = radians(lat1), radians(lat2)
+    a = sin((phi2 - phi1) / 2) ** 2 + cos(phi1) * cos(phi2) * sin(radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * asin(min(1.0, sqrt(a)))
+
+
+def bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Initial bearing from the first point to the second.
+
+    Returns:
+        Bearing in degrees clockwise from north (0-360)
+    """
+    phi1, phi2 = radians(lat1), radians(lat2)
+    dlon = radians(lon2 - lon1)
+    y = sin(dlon) * cos(phi2)
+    x = cos(phi1) * sin(phi2) - sin(phi1) * cos(phi2) * cos(dlon)
+    return (degrees(atan2(y, x)) + 360.0) % 360.0
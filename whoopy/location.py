@@ -1,28 +1,47 @@
 """Location management for Whoopy API."""
+from typing import Callable, Optional, Union
+from .cache import PRESENCE_ENDPOINTS
+from .enums import DEFAULT_BASE_URL
+from .transport import DEFAULT_TRANSPORT, Transport
 from .utils import HTTPClient
 
 
 class Location:
     """Handle location-related API operations."""
 
-    def __init__(self, headers: dict):
+    def __init__(self, headers: dict, client: Optional[HTTPClient] = None,
+                 base_url: str = DEFAULT_BASE_URL, transport: Union[str, Transport] = DEFAULT_TRANSPORT,
+                 on_write: Optional[Callable[..., None]] = None):
         """
         Initialize Location instance.
 
         Args:
             headers: HTTP headers for API requests
+            client: Shared HTTP client to reuse pooled connections (optional)
+            base_url: API base URL (default: https://www.wh00.ooo/)
+            transport: HTTP backend when no client is given (default: 'requests')
+            on_write: Called with the cached read endpoints each write makes stale (optional)
         """
-        self.client = HTTPClient(headers)
+        self.client = client if client is not None else HTTPClient(headers, transport=transport)
+        self.base = base_url
+        self.on_write = on_write
+
+    def _patch(self, url: str, endpoints, **kwargs) -> None:
+        try:
+            self.client.patch(url, idempotent=True, **kwargs)
+        finally:
+            if self.on_write is not None:
+                self.on_write(*endpoints)
 
     def online(self) -> None:
         """Set user status to online."""
-        url = 'https://www.wh00.ooo/api/user/online'
-        self.client.patch(url)
+        url = f'{self.base}api/user/online'
+        self._patch(url, PRESENCE_ENDPOINTS)
 
     def offline(self) -> None:
         """Set user status to offline."""
-        url = 'https://www.wh00.ooo/api/user/offline'
-        self.client.patch(url)
+        url = f'{self.base}api/user/offline'
+        self._patch(url, PRESENCE_ENDPOINTS)
 
     def update_location(
         self,
@@ -44,7 +63,7 @@ class Location:
             stayed_at: Timestamp of stay
             speed: Speed in km/h
         """
-        url = 'https://www.wh00.ooo/api/user/location'
+        url = f'{self.base}api/user/location'
         params = {
             "user_location": {
                 "latitude": latitude,
@@ -57,4 +76,4 @@ class Location:
                 "state": battery_status
             }
         }
-        self.client.patch(url, json=params)
+        self._patch(url, PRESENCE_ENDPOINTS, json=params)
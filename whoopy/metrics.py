@@ -0,0 +1,383 @@
+"""Per-operation metrics and request hooks."""
+import bisect
+import contextvars
+import inspect
+import threading
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .retry import endpoint_key
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Logical operation (Whoopy method name) the current request belongs to
+_operation: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('whoopy_operation', default=None)
+
+
+@dataclass
+class RequestEvent:
+    """
+    One HTTP request, passed to request hooks.
+
+    The same instance is given to the start and the end hooks; the response
+    fields are filled in before the end hooks run.
+    """
+    operation: str
+    method: str
+    url: str
+    started: float
+    status: Optional[int] = None
+    elapsed: Optional[float] = None
+    retries: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    error: Optional[BaseException] = None
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile ``q`` (inf past the last bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': dict(zip(self.buckets + (float('inf'),), self.counts)),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class _OperationStats:
+    __slots__ = ('calls', 'failures', 'latency', 'requests', 'errors', 'retries',
+                 'bytes_sent', 'bytes_received', 'request_latency')
+
+    def __init__(self, buckets):
+        self.calls = 0
+        self.failures = 0
+        self.latency = Histogram(buckets)
+        self.requests = 0
+        self.errors: Dict[str, int] = {}
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.request_latency = Histogram(buckets)
+
+
+class Metrics:
+    """
+    Thread-safe counters and latency histograms per logical operation.
+
+    Operations are Whoopy method names (``get_locations``,
+    ``update_location``, ...); requests made outside them are grouped by
+    endpoint (``GET /api/my``). Each operation tracks:
+
+    - calls, failed calls and call latency (including cache hits)
+    - HTTP requests, retries, bytes in/out and request latency
+    - request errors by status code, or by exception name for transport
+      failures
+
+    Hooks registered with on_request_start/on_request_end are called with a
+    RequestEvent around every HTTP request, on the calling thread.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize Metrics.
+
+        Args:
+            buckets: Latency histogram bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._stats: Dict[str, _OperationStats] = {}
+        self._start_hooks: List[Callable[[RequestEvent], Any]] = []
+        self._end_hooks: List[Callable[[RequestEvent], Any]] = []
+        self._lock = threading.Lock()
+
+    def on_request_start(self, hook: Callable[[RequestEvent], Any]) -> Callable:
+        """Register a hook called before each request (usable as a decorator)"""
+        self._start_hooks.append(hook)
+        return hook
+
+    def on_request_end(self, hook: Callable[[RequestEvent], Any]) -> Callable:
+        """Register a hook called after each request, failed or not (usable as a decorator)"""
+        self._end_hooks.append(hook)
+        return hook
+
+    def _get(self, operation: str) -> _OperationStats:
+        stats = self._stats.get(operation)
+        if stats is None:
+            stats = self._stats[operation] = _OperationStats(self.buckets)
+        return stats
+
+    def request_started(self, method: str, url: str) -> RequestEvent:
+        """Start timing a request; called by the transport"""
+        operation = _operation.get() or endpoint_key(method, url)
+        event = RequestEvent(operation, method, url, time.perf_counter())
+        for hook in self._start_hooks:
+            hook(event)
+        return event
+
+    def request_finished(self, event: RequestEvent, response=None, error: Optional[BaseException] = None,
+                         streamed: bool = False) -> None:
+        """
+        Record a completed request; called by the transport.
+
+        Args:
+            event: Event returned by request_started
+            response: Final response (optional)
+            error: Exception that ended the request (optional)
+            streamed: The body is still unread, so only Content-Length counts as received bytes
+        """
+        event.elapsed = time.perf_counter() - event.started
+        event.error = error
+        if response is not None:
+            event.status = response.status_code
+            body = response.request.content if hasattr(response.request, 'content') else response.request.body
+            event.bytes_sent = len(body or b'')
+            length = response.headers.get('Content-Length')
+            event.bytes_received = int(length) if length else 0 if streamed else len(response.content)
+
+        with self._lock:
+            stats = self._get(event.operation)
+            stats.requests += 1
+            stats.retries += event.retries
+            stats.bytes_sent += event.bytes_sent
+            stats.bytes_received += event.bytes_received
+            stats.request_latency.observe(event.elapsed)
+            if error is not None or event.status >= 400:
+                key = type(error).__name__ if error is not None else str(event.status)
+                stats.errors[key] = stats.errors.get(key, 0) + 1
+
+        for hook in self._end_hooks:
+            hook(event)
+
+    def record_call(self, operation: str, elapsed: float, error: Optional[BaseException] = None) -> None:
+        """Record one call of a logical operation"""
+        with self._lock:
+            stats = self._get(operation)
+            stats.calls += 1
+            stats.latency.observe(elapsed)
+            if error is not None:
+                stats.failures += 1
+
+    def reset(self) -> None:
+        """Drop all recorded values (hooks are kept)"""
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Current values per operation.
+
+        Returns:
+            Dict mapping operation to its counters and latency histograms
+        """
+        with self._lock:
+            return {
+                operation: {
+                    'calls': stats.calls,
+                    'failures': stats.failures,
+                    'latency': stats.latency.snapshot(),
+                    'requests': stats.requests,
+                    'errors': dict(stats.errors),
+                    'retries': stats.retries,
+                    'bytes_sent': stats.bytes_sent,
+                    'bytes_received': stats.bytes_received,
+                    'request_latency': stats.request_latency.snapshot(),
+                }
+                for operation, stats in self._stats.items()
+            }
+
+    def export_prometheus(self, prefix: str = 'whoopy') -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix (default: 'whoopy')
+
+        Returns:
+            Text suitable for a /metrics endpoint
+        """
+        counters = (
+            ('calls_total', 'calls', 'Operation calls'),
+            ('call_failures_total', 'failures', 'Operation calls that raised'),
+            ('requests_total', 'requests', 'HTTP requests'),
+            ('retries_total', 'retries', 'HTTP request retries'),
+            ('bytes_sent_total', 'bytes_sent', 'Request body bytes sent'),
+            ('bytes_received_total', 'bytes_received', 'Response body bytes received'),
+        )
+        snapshot = self.snapshot()
+        lines = []
+        for name, field, help_text in counters:
+            lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} counter']
+            lines += [f'{prefix}_{name}{{operation="{op}"}} {values[field]}' for op, values in snapshot.items()]
+
+        lines += [f'# HELP {prefix}_request_errors_total Failed HTTP requests by status or error',
+                  f'# TYPE {prefix}_request_errors_total counter']
+        for op, values in snapshot.items():
+            lines += [f'{prefix}_request_errors_total{{operation="{op}",status="{status}"}} {count}'
+                      for status, count in values['errors'].items()]
+
+        for name, field, help_text in (('call_duration_seconds', 'latency', 'Operation call latency'),
+                                       ('request_duration_seconds', 'request_latency', 'HTTP request latency')):
+            lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} histogram']
+            for op, values in snapshot.items():
+                histogram = values[field]
+                cumulative = 0
+                for bound, count in histogram['buckets'].items():
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{prefix}_{name}_bucket{{operation="{op}",le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_{name}_sum{{operation="{op}"}} {histogram["sum"]}')
+                lines.append(f'{prefix}_{name}_count{{operation="{op}"}} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def bind_operation(func: Callable) -> Callable:
+    """Carry the current operation (and request priority) into calls made from worker threads"""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A copy per call, since one context cannot be entered by several threads at once
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+
+def instrumented(operation: str):
+    """Record calls of a Whoopy/AsyncWhoopy method in ``self.metrics`` when one is configured."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                metrics = self.metrics
+                if metrics is None:
+                    return await func(self, *args, **kwargs)
+                token = _operation.set(operation)
+                start = time.perf_counter()
+                error = None
+                try:
+                    return await func(self, *args, **kwargs)
+                except Exception as err:
+                    error = err
+                    raise
+                finally:
+                    metrics.record_call(operation, time.perf_counter() - start, error)
+                    _operation.reset(token)
+            return async_wrapper
+
+        if inspect.isasyncgenfunction(func):
+            @wraps(func)
+            def async_gen_wrapper(self, *args, **kwargs):
+                metrics = self.metrics
+                if metrics is None:
+                    return func(self, *args, **kwargs)
+                return _instrumented_aiter(metrics, operation, func(self, *args, **kwargs))
+            return async_gen_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def gen_wrapper(self, *args, **kwargs):
+                metrics = self.metrics
+                if metrics is None:
+                    return func(self, *args, **kwargs)
+                return _instrumented_iter(metrics, operation, func(self, *args, **kwargs))
+            return gen_wrapper
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if metrics is None:
+                return func(self, *args, **kwargs)
+            token = _operation.set(operation)
+            start = time.perf_counter()
+            error = None
+            try:
+                return func(self, *args, **kwargs)
+            except Exception as err:
+                error = err
+                raise
+            finally:
+                metrics.record_call(operation, time.perf_counter() - start, error)
+                _operation.reset(token)
+        return wrapper
+    return decorator
+
+
+def _instrumented_iter(metrics: Metrics, operation: str, gen):
+    """
+    Run a generator with ``operation`` bound while it produces each item.
+
+    The recorded duration excludes the consumer's time between items.
+    """
+    elapsed = 0.0
+    error = None
+    try:
+        while True:
+            token = _operation.set(operation)
+            start = time.perf_counter()
+            try:
+                item = next(gen)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+                _operation.reset(token)
+            yield item
+    except Exception as err:
+        error = err
+        raise
+    finally:
+        gen.close()
+        metrics.record_call(operation, elapsed, error)
+
+
+async def _instrumented_aiter(metrics: Metrics, operation: str, agen):
+    """Async counterpart of _instrumented_iter"""
+    elapsed = 0.0
+    error = None
+    try:
+        while True:
+            token = _operation.set(operation)
+            start = time.perf_counter()
+            try:
+                item = await agen.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+                _operation.reset(token)
+            yield item
+    except Exception as err:
+        error = err
+        raise
+    finally:
+        await agen.aclose()
+        metrics.record_call(operation, elapsed, error)
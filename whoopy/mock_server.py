@@ -0,0 +1,519 @@
+"""
+Local stand-in for the Whoo API, for benchmarks and offline development.
+
+Implements the endpoints used by Whoopy with generated data, configurable
+latency, payload sizes and error injection::
+
+    with MockWhooServer(latency=0.02, friends=500) as server:
+        cl = Whoopy(access_token=server.token, base_url=server.url)
+
+With ``http2=True`` (requires h2) it speaks cleartext HTTP/2 with prior
+knowledge instead, serving each stream in its own thread so concurrent
+requests multiplex over one connection.
+
+It can also be run standalone: ``python -m whoopy.mock_server --port 8000``.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter
+from email.message import Message
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlsplit
+from uuid import uuid4
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.exceptions
+except ImportError:  # pragma: no cover - optional dependency
+    h2 = None
+
+
+DEFAULT_TOKEN = 'mock-token'
+
+
+class MockWhooServer:
+    """Threaded HTTP/1.1 keep-alive (or HTTP/2) server implementing the Whoo endpoints"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 friends: int = 50, page_size: int = 20, error_rate: float = 0.0, error_status: int = 503,
+                 error_paths: Optional[Iterable[str]] = None, drift: int = 0, token: str = DEFAULT_TOKEN,
+                 seed: Optional[int] = 0, http2: bool = False):
+        """
+        Initialize MockWhooServer.
+
+        Args:
+            host: Interface to bind (default: 127.0.0.1)
+            port: Port to bind, 0 for any free port (default: 0)
+            latency: Seconds added to every response (default: 0.0)
+            jitter: Extra random latency of up to this many seconds (default: 0.0)
+            friends: Number of friends and friend locations (default: 50)
+            page_size: Users per api/v2/users/{id}/friends and api/friends/search page (default: 20)
+            error_rate: Probability of answering with error_status (default: 0.0)
+            error_status: Status used for injected errors (default: 503)
+            error_paths: Only inject errors for paths containing one of these (optional)
+            drift: Friends moved on every api/locations request (default: 0)
+            token: Accepted bearer token (default: 'mock-token')
+            seed: Random seed for generated data and injected errors (default: 0)
+            http2: Serve cleartext HTTP/2 (prior knowledge) instead of HTTP/1.1;
+                requires h2 (default: False)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_paths = tuple(error_paths or ())
+        self.drift = drift
+        self.token = token
+        self.previous_token: Optional[str] = None
+        self.rejected = 0
+        self.random = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.lock = threading.Lock()
+
+        self.me = {"id": 1, "username": "me", "display_name": "Me",
+                   "profile_image": "profile_images/images/default.jpeg", "online": False}
+        self.friends = [self._make_user(1000 + i) for i in range(friends)]
+        self.locations = {user["id"]: self._make_location(user) for user in self.friends}
+        self.requested = []
+        self.version = 0
+
+        if http2:
+            if h2 is None:
+                raise ImportError("http2=True requires h2: pip install h2")
+            self.httpd = _H2Server((host, port), _H2Handler)
+        else:
+            self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to Whoopy(base_url=...)"""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self) -> 'MockWhooServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def move(self, count: int = 1) -> None:
+        """Move ``count`` random friends, changing the api/locations payload"""
+        with self.lock:
+            for user in self.random.sample(self.friends, min(count, len(self.friends))):
+                loc = self.locations[user["id"]]
+                loc["latitude"] = round(loc["latitude"] + self.random.uniform(-0.001, 0.001), 6)
+                loc["longitude"] = round(loc["longitude"] + self.random.uniform(-0.001, 0.001), 6)
+                loc["updated_at"] = _now()
+            self.version += 1
+
+    def rotate_token(self) -> str:
+        """
+        Issue a new token (returned by api/email/login from now on). The
+        previous token stays accepted until the next rotation, like a grace period.
+
+        Returns:
+            str: The new token
+        """
+        with self.lock:
+            self.previous_token = self.token
+            self.token = f'{DEFAULT_TOKEN}-{uuid4().hex[:12]}'
+            return self.token
+
+    def accepted(self) -> tuple:
+        """Authorization headers currently accepted"""
+        tokens = (self.token, self.previous_token)
+        return tuple(f'Bearer {token}' for token in tokens if token)
+
+    def _make_user(self, user_id: int) -> Dict:
+        return {"id": user_id, "username": f"user{user_id}", "display_name": f"User {user_id}",
+                "profile_image": f"profile_images/images/{user_id}.jpeg"}
+
+    def _make_location(self, user: Dict) -> Dict:
+        return {
+            "latitude": round(35.68 + self.random.uniform(-0.2, 0.2), 6),
+            "longitude": round(139.76 + self.random.uniform(-0.2, 0.2), 6),
+            "speed": round(self.random.uniform(0, 3), 2),
+            "horizontal_accuracy": 10.0,
+            "battery_level": round(self.random.uniform(0.1, 1.0), 2),
+            "battery_state": self.random.randint(0, 3),
+            "updated_at": _now(),
+            "stayed_at": None,
+            "user": dict(user),
+        }
+
+
+def _now() -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    routes = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        _respond(self, self.server.mock, method, self.path, self.rfile.read(length) if length else b'')
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _H2Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+class _H2Stream:
+    """One HTTP/2 request, with the headers/_send() interface routes use"""
+
+    def __init__(self, connection, stream_id, headers):
+        self.connection = connection
+        self.stream_id = stream_id
+        self.headers = Message()
+        self.pseudo = {}
+        for name, value in headers:
+            if name.startswith(':'):
+                self.pseudo[name] = value
+            else:
+                self.headers[name] = value
+        self.body = bytearray()
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b''
+        response = [(':status', str(status))]
+        if body is not None:
+            response.append(('content-type', 'application/json'))
+        response.extend((name.lower(), value) for name, value in (headers or {}).items())
+        response.append(('content-length', str(len(data))))
+        self.connection.respond(self.stream_id, response, data)
+
+
+class _H2Handler(socketserver.BaseRequestHandler):
+    """
+    HTTP/2 connection: one reader loop, one thread per request stream.
+
+    H2Connection is not thread-safe: every ``self.conn`` call and socket
+    write happens with ``self.cond`` held.
+    """
+
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+        self.cond = threading.Condition()
+        self.closed = False
+        streams = {}
+        with self.cond:
+            self.conn.initiate_connection()
+            self._flush()
+        try:
+            while not self.closed:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                ready = []
+                with self.cond:
+                    try:
+                        events = self.conn.receive_data(data)
+                    except h2.exceptions.ProtocolError:
+                        # e.g. HEADERS out of stream id order: a connection error, answered with GOAWAY
+                        self.conn.close_connection(error_code=h2.errors.ErrorCodes.PROTOCOL_ERROR)
+                        self._flush()
+                        break
+                    for event in events:
+                        if isinstance(event, h2.events.RequestReceived):
+                            streams[event.stream_id] = _H2Stream(self, event.stream_id, event.headers)
+                        elif isinstance(event, h2.events.DataReceived):
+                            streams[event.stream_id].body += event.data
+                            self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                        elif isinstance(event, h2.events.StreamEnded):
+                            ready.append(streams.pop(event.stream_id))
+                        elif isinstance(event, h2.events.StreamReset):
+                            streams.pop(event.stream_id, None)
+                        elif isinstance(event, h2.events.ConnectionTerminated):
+                            self.closed = True
+                    self._flush()
+                    # Window updates may unblock responses waiting for flow control
+                    self.cond.notify_all()
+                for stream in ready:
+                    threading.Thread(target=self._serve, args=(stream,), daemon=True).start()
+        except OSError:
+            pass
+        finally:
+            with self.cond:
+                self.closed = True
+                self.cond.notify_all()
+
+    def _flush(self):
+        """Write what the connection has queued; the caller holds self.cond"""
+        self.request.sendall(self.conn.data_to_send())
+
+    def _serve(self, stream):
+        _respond(stream, self.server.mock, stream.pseudo[':method'], stream.pseudo[':path'], bytes(stream.body))
+
+    def respond(self, stream_id, headers, data):
+        """Send a response, waiting for flow-control window as needed"""
+        try:
+            with self.cond:
+                if self.closed:
+                    return
+                self.conn.send_headers(stream_id, headers, end_stream=not data)
+                self._flush()
+            while data:
+                with self.cond:
+                    while True:
+                        if self.closed:
+                            return
+                        size = min(self.conn.local_flow_control_window(stream_id),
+                                   self.conn.max_outbound_frame_size, len(data))
+                        if size > 0:
+                            break
+                        self.cond.wait()
+                    chunk, data = data[:size], data[size:]
+                    self.conn.send_data(stream_id, chunk, end_stream=not data)
+                    self._flush()
+        except (h2.exceptions.H2Error, OSError):
+            # Stream reset or connection gone
+            pass
+
+
+def _respond(handler, mock, method, target, body):
+    """Route one request; ``handler`` provides headers and _send()"""
+    parts = urlsplit(target)
+    path = parts.path
+    handler.query = parse_qs(parts.query)
+    handler.form = parse_qs(body.decode()) if body else {}
+
+    with mock.lock:
+        mock.requests[f'{method} {path}'] += 1
+    delay = mock.latency + (mock.random.uniform(0, mock.jitter) if mock.jitter else 0)
+    if delay:
+        time.sleep(delay)
+
+    if mock.error_rate and (not mock.error_paths or any(p in path for p in mock.error_paths)) \
+            and mock.random.random() < mock.error_rate:
+        headers = {'Retry-After': '0'} if mock.error_status in (429, 503) else None
+        return handler._send(mock.error_status, {"error": "injected"}, headers)
+
+    for route_method, pattern, route, public in _Handler.routes:
+        match = pattern.fullmatch(path)
+        if match and route_method == method:
+            if not public and handler.headers.get('Authorization') not in mock.accepted():
+                with mock.lock:
+                    mock.rejected += 1
+                return handler._send(401, {"error": "unauthorized"})
+            return route(handler, mock, *match.groups())
+    handler._send(404, {"error": "not found"})
+
+
+def _route(method, pattern, public=False):
+    def decorator(func):
+        _Handler.routes.append((method, re.compile(pattern), func, public))
+        return func
+    return decorator
+
+
+@_route('POST', r'/api/email/login', public=True)
+def _email_login(handler, mock):
+    handler._send(200, {"access_token": mock.token, "user": mock.me})
+
+
+@_route('POST', r'/api/email/users', public=True)
+def _create_account(handler, mock):
+    handler._send(200, {"access_token": mock.token, "user": mock.me})
+
+
+@_route('GET', r'/api/my')
+def _my(handler, mock):
+    handler._send(200, mock.me)
+
+
+@_route('PATCH', r'/api/user')
+def _update_account(handler, mock):
+    for key in ('display_name', 'profile_image', 'username'):
+        value = handler.form.get(f'user[{key}]')
+        if value:
+            mock.me[key] = value[0]
+    handler._send(200, mock.me)
+
+
+@_route('DELETE', r'/api/user')
+def _delete_account(handler, mock):
+    handler._send(204)
+
+
+@_route('GET', r'/api/friends')
+def _friends(handler, mock):
+    body = {"friends": mock.friends}
+    etag = '"' + hashlib.md5(json.dumps(body).encode()).hexdigest() + '"'
+    if handler.headers.get('If-None-Match') == etag:
+        return handler._send(304, headers={'ETag': etag})
+    handler._send(200, body, {'ETag': etag})
+
+
+@_route('GET', r'/api/friends/requested')
+def _requested(handler, mock):
+    handler._send(200, {"requested": mock.requested})
+
+
+@_route('GET', r'/api/friends/search')
+def _search(handler, mock):
+    name = (handler.query.get('display_name') or [''])[0]
+    page = int((handler.query.get('page') or ['1'])[0])
+    matches = [u for u in mock.friends if name and name in u["display_name"]]
+    start = (page - 1) * mock.page_size
+    more = start + mock.page_size < len(matches)
+    handler._send(200, {"friends": matches[start:start + mock.page_size], "next_page": page + 1 if more else None})
+
+
+@_route('POST', r'/api/friends')
+def _request_friend(handler, mock):
+    user_id = int(handler.form.get('user_id', ['0'])[0])
+    mock.requested.append(mock._make_user(user_id))
+    handler._send(200, {"user_id": user_id})
+
+
+@_route('DELETE', r'/api/friendships/(\d+)/retire')
+def _delete_requested(handler, mock, user_id):
+    mock.requested = [u for u in mock.requested if u["id"] != int(user_id)]
+    handler._send(200, {"user_id": int(user_id)})
+
+
+@_route('GET', r'/api/locations')
+def _locations(handler, mock):
+    if mock.drift:
+        mock.move(mock.drift)
+    etag = '"' + hashlib.md5(str(mock.version).encode()).hexdigest() + '"'
+    if handler.headers.get('If-None-Match') == etag:
+        return handler._send(304, headers={'ETag': etag})
+    handler._send(200, {"locations": list(mock.locations.values())}, {'ETag': etag})
+
+
+@_route('GET', r'/api/v2/users/(\d+)')
+def _user(handler, mock, user_id):
+    user = mock._make_user(int(user_id))
+    pages = -(-len(mock.friends) // mock.page_size)
+    handler._send(200, dict(user, friends=mock.friends[:mock.page_size], next_page=pages or None))
+
+
+@_route('GET', r'/api/v2/users/(\d+)/friends')
+def _user_friends(handler, mock, user_id):
+    page = int((handler.query.get('page') or ['1'])[0])
+    start = (page - 1) * mock.page_size
+    handler._send(200, {"friends": mock.friends[start:start + mock.page_size]})
+
+
+@_route('GET', r'/api/users/(\d+)/location_request')
+def _location_request(handler, mock, user_id):
+    handler._send(200, {"user_id": int(user_id)})
+
+
+@_route('PATCH', r'/api/user/location')
+def _update_location(handler, mock):
+    mock.me["location"] = {key: values[0] for key, values in handler.form.items()}
+    handler._send(200, mock.me)
+
+
+@_route('PATCH', r'/api/user/online')
+def _online(handler, mock):
+    mock.me["online"] = True
+    handler._send(200, mock.me)
+
+
+@_route('PATCH', r'/api/user/offline')
+def _offline(handler, mock):
+    mock.me["online"] = False
+    handler._send(204)
+
+
+@_route('POST', r'/api/stamp_messages')
+def _stamp(handler, mock):
+    handler._send(204)
+
+
+@_route('POST', r'/api/rooms/([^/]+)/messages')
+def _message(handler, mock, room_id):
+    body = (handler.form.get('message[body]') or [''])[0]
+    handler._send(200, {"id": str(uuid4()), "room_id": room_id, "body": body})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Whoo API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--friends', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--drift', type=int, default=0)
+    parser.add_argument('--token', default=DEFAULT_TOKEN)
+    parser.add_argument('--http2', action='store_true', help='Serve cleartext HTTP/2 (requires h2)')
+    args = parser.parse_args()
+
+    server = MockWhooServer(args.host, args.port, args.latency, args.jitter, args.friends, args.page_size,
+                            args.error_rate, args.error_status, drift=args.drift, token=args.token,
+                            http2=args.http2)
+    print(f'Mock Whoo API on {server.url} (token: {server.token})')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Compact typed models for Whoo API responses."""
+from typing import Any, Mapping, Optional
+
+from .enums import BatteryState
+
+# Bypasses the immutable __setattr__ below during construction
+_set = object.__setattr__
+_BATTERY_STATES = {state.value: state for state in BatteryState}
+
+
+def battery_state(value: Any) -> BatteryState:
+    """BatteryState for a raw value, UNKNOWN when missing or unrecognised"""
+    state = _BATTERY_STATES.get(value)
+    if state is None:
+        try:
+            state = _BATTERY_STATES.get(int(value), BatteryState.UNKNOWN)
+        except (TypeError, ValueError):
+            state = BatteryState.UNKNOWN
+    return state
+
+
+class _Model:
+    """Base class providing equality, repr and dict conversion over __slots__."""
+    __slots__ = ()
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    # Immutable, so copies can share the instance; __init__ takes the slots in order
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+    def to_dict(self) -> dict:
+        """Convert to a plain dict (nested models included)."""
+        out = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            out[name] = value.to_dict() if isinstance(value, _Model) else value
+        return out
+
+
+class Battery(_Model):
+    """Battery level (0.0-1.0) and state"""
+    __slots__ = ('level', 'state')
+
+    def __init__(self, level: Optional[float], state: BatteryState = BatteryState.UNKNOWN):
+        _set(self, 'level', level)
+        _set(self, 'state', state)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Battery':
+        """Read flat ``battery_level``/``battery_state`` or a nested ``battery`` object."""
+        nested = data.get('battery')
+        if isinstance(nested, Mapping):
+            level, state = nested.get('level'), nested.get('state')
+        else:
+            level, state = data.get('battery_level'), data.get('battery_state')
+        return cls(float(level) if level is not None else None, battery_state(state))
+
+
+class User(_Model):
+    """Whoo user"""
+    __slots__ = ('id', 'username', 'display_name', 'profile_image')
+
+    def __init__(self, id: Any, username: Optional[str] = None, display_name: Optional[str] = None,
+                 profile_image: Optional[str] = None):
+        _set(self, 'id', id)
+        _set(self, 'username', username)
+        _set(self, 'display_name', display_name)
+        _set(self, 'profile_image', profile_image)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'User':
+        return cls(data['id'], data.get('username'), data.get('display_name'), data.get('profile_image'))
+
+
+class FriendLocation(_Model):
+    """A friend's last reported location"""
+    __slots__ = ('user', 'latitude', 'longitude', 'speed', 'horizontal_accuracy',
+                 'battery', 'updated_at', 'stayed_at')
+
+    def __init__(self, user: User, latitude: float, longitude: float, speed: Optional[float] = None,
+                 horizontal_accuracy: Optional[float] = None, battery: Optional[Battery] = None,
+                 updated_at: Optional[str] = None, stayed_at: Optional[str] = None):
+        _set(self, 'user', user)
+        _set(self, 'latitude', latitude)
+        _set(self, 'longitude', longitude)
+        _set(self, 'speed', speed)
+        _set(self, 'horizontal_accuracy', horizontal_accuracy)
+        _set(self, 'battery', battery)
+        _set(self, 'updated_at', updated_at)
+        _set(self, 'stayed_at', stayed_at)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'FriendLocation':
+        speed = data.get('speed')
+        accuracy = data.get('horizontal_accuracy')
+        return cls(
+            User.from_dict(data['user']),
+            float(data['latitude']),
+            float(data['longitude']),
+            float(speed) if speed is not None else None,
+            float(accuracy) if accuracy is not None else None,
+            Battery.from_dict(data),
+            data.get('updated_at'),
+            data.get('stayed_at'),
+        )
+
+    @property
+    def map(self) -> str:
+        """Google Maps satellite link"""
+        return f"https://maps.google.com/maps?q={self.latitude},{self.longitude}&t=k&z=24"
+
+    @property
+    def pano(self) -> str:
+        """Google Street View link"""
+        return f"https://www.google.com/maps/@?api=1&map_action=pano&viewpoint={self.latitude},{self.longitude}"
@@ -0,0 +1,287 @@
+"""SQLite-backed cache of friend lists and profiles that survives restarts."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.whoopy', 'cache.db')
+
+# Seconds after which a stored response is served stale and refreshed in the background
+DEFAULT_STALE_AFTER = {
+    'get_friends': 300.0,
+    'get_requested': 60.0,
+    'get_user': 3600.0,
+}
+DEFAULT_MAX_AGE = 7 * 24 * 3600.0
+DEFAULT_LEASE = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    namespace TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    lease_until REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, endpoint, key)
+);
+CREATE TABLE IF NOT EXISTS generations (
+    namespace TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    generation INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, endpoint)
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    credential TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL
+)
+"""
+
+# generations row bumped when a whole namespace is invalidated
+_ALL = '*'
+
+
+class PersistentCache:
+    """
+    Stale-while-revalidate cache in an SQLite database (WAL mode).
+
+    A stored response is returned immediately, even after a restart. Once
+    it is older than its endpoint's ``stale_after`` it is still returned,
+    and one refresh runs in a background thread. Refreshes take a lease in
+    the database first, so when several worker processes share the file only
+    one of them refetches a given entry.
+
+    Entries are scoped by a namespace (one per account) and stored as JSON;
+    responses that are not JSON serializable (e.g. models) are not stored.
+    The namespace of a credential is remembered too, so a restarted process
+    can serve stored responses before it reaches the API.
+    As in ResponseCache, invalidation bumps a generation (kept in the
+    database, so it covers every process): a response loaded before an
+    invalidation is not stored when it arrives.
+    """
+
+    def __init__(self, path: Optional[str] = None, stale_after: Union[float, Dict[str, float], None] = None,
+                 max_age: float = DEFAULT_MAX_AGE, workers: int = 2, lease: float = DEFAULT_LEASE):
+        """
+        Initialize PersistentCache.
+
+        Args:
+            path: Database file (default: ~/.whoopy/cache.db)
+            stale_after: Seconds before a refresh; a number for every endpoint or a
+                dict overriding DEFAULT_STALE_AFTER (optional)
+            max_age: Entries older than this many seconds are not served (default: 7 days)
+            workers: Background refresh threads (default: 2)
+            lease: Seconds one process may spend refreshing an entry before
+                another may try (default: 60)
+        """
+        self.path = path or DEFAULT_CACHE_PATH
+        self.stale_after = dict(DEFAULT_STALE_AFTER)
+        if isinstance(stale_after, dict):
+            self.stale_after.update(stale_after)
+        elif stale_after is not None:
+            self.stale_after = {endpoint: float(stale_after) for endpoint in self.stale_after}
+        self.max_age = max_age
+        self.workers = workers
+        self.lease = lease
+        self.stats = {'hits': 0, 'stale': 0, 'misses': 0, 'refreshed': 0, 'errors': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not shared across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Only this thread uses it; close() may close it from another one
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._lock:
+                dead = [entry for entry in self._connections if not entry[0].is_alive()]
+                self._connections = [entry for entry in self._connections if entry[0].is_alive()]
+                self._connections.append((threading.current_thread(), conn))
+            for _, old in dead:
+                old.close()
+        return conn
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, default=str, separators=(',', ':'))
+
+    def get(self, namespace: str, endpoint: str, key: Hashable = ()) -> Optional[tuple]:
+        """
+        Look up a stored response.
+
+        Returns:
+            (value, fetched_at) or None when missing or older than max_age
+        """
+        row = self._conn().execute(
+            'SELECT value, fetched_at FROM responses WHERE namespace=? AND endpoint=? AND key=?',
+            (namespace, endpoint, self._key(key))).fetchone()
+        if row is None or time.time() - row[1] > self.max_age:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def generation(self, namespace: str, endpoint: str) -> int:
+        """Current invalidation generation of an endpoint of a namespace"""
+        row = self._conn().execute(
+            'SELECT COALESCE(SUM(generation), 0) FROM generations WHERE namespace=? AND endpoint IN (?, ?)',
+            (namespace, endpoint, _ALL)).fetchone()
+        return row[0]
+
+    def namespace(self, credential: str) -> Optional[str]:
+        """Namespace remembered for a credential hash, or None"""
+        row = self._conn().execute(
+            'SELECT namespace FROM namespaces WHERE credential=?', (credential,)).fetchone()
+        return row and row[0]
+
+    def remember_namespace(self, credential: str, namespace: str) -> None:
+        """
+        Remember the namespace of a credential.
+
+        Args:
+            credential: Hash identifying the credential (never the token itself)
+            namespace: Account namespace
+        """
+        self._conn().execute('INSERT OR REPLACE INTO namespaces (credential, namespace) VALUES (?, ?)',
+                             (credential, namespace))
+
+    def set(self, namespace: str, endpoint: str, key: Hashable, value: Any,
+            generation: Optional[int] = None) -> bool:
+        """
+        Store a response (and release any refresh lease on it) unless the
+        endpoint was invalidated since ``generation``.
+
+        Args:
+            namespace: Account namespace
+            endpoint: Endpoint name
+            key: Call arguments
+            value: Response to store
+            generation: Generation observed before the response was loaded
+
+        Returns:
+            bool: False if the value was not stored (invalidated meanwhile, or not JSON serializable)
+        """
+        try:
+            data = json.dumps(value, separators=(',', ':'))
+        except (TypeError, ValueError):
+            return False
+        row = (namespace, endpoint, self._key(key), data, time.time())
+        if generation is None:
+            cursor = self._conn().execute(
+                'INSERT OR REPLACE INTO responses (namespace, endpoint, key, value, fetched_at, lease_until) '
+                'VALUES (?, ?, ?, ?, ?, 0)', row)
+        else:
+            # Checked in the same statement so an invalidation from another process cannot slip in between
+            cursor = self._conn().execute(
+                'INSERT OR REPLACE INTO responses (namespace, endpoint, key, value, fetched_at, lease_until) '
+                'SELECT ?, ?, ?, ?, ?, 0 WHERE (SELECT COALESCE(SUM(generation), 0) FROM generations '
+                'WHERE namespace=? AND endpoint IN (?, ?)) = ?', row + (namespace, endpoint, _ALL, generation))
+        return cursor.rowcount == 1
+
+    def invalidate(self, namespace: str, *endpoints: str) -> None:
+        """
+        Drop stored responses.
+
+        Args:
+            namespace: Account namespace
+            *endpoints: Endpoints to drop (all of the namespace if omitted)
+        """
+        conn = self._conn()
+        # Bump first: a load still in flight then finds its generation outdated
+        bumped = [(namespace, endpoint) for endpoint in endpoints or (_ALL,)]
+        conn.executemany('INSERT OR IGNORE INTO generations (namespace, endpoint) VALUES (?, ?)', bumped)
+        conn.executemany('UPDATE generations SET generation=generation+1 WHERE namespace=? AND endpoint=?', bumped)
+        if not endpoints:
+            conn.execute('DELETE FROM responses WHERE namespace=?', (namespace,))
+        else:
+            conn.executemany('DELETE FROM responses WHERE namespace=? AND endpoint=?',
+                             [(namespace, endpoint) for endpoint in endpoints])
+
+    def fetch(self, namespace: str, endpoint: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Serve a response from the store, loading it on a miss.
+
+        Args:
+            namespace: Account namespace
+            endpoint: Endpoint name
+            key: Call arguments
+            loader: Fetches a fresh response
+
+        Returns:
+            Stored or freshly loaded response
+        """
+        entry = self.get(namespace, endpoint, key)
+        if entry is None:
+            self._count('misses')
+            generation = self.generation(namespace, endpoint)
+            value = loader()
+            self.set(namespace, endpoint, key, value, generation)
+            return value
+
+        value, fetched_at = entry
+        if time.time() - fetched_at < self.stale_after.get(endpoint, float('inf')):
+            self._count('hits')
+        else:
+            self._count('stale')
+            if self._take_lease(namespace, endpoint, key):
+                self._submit(self._refresh, namespace, endpoint, key, loader)
+        return value
+
+    def _take_lease(self, namespace: str, endpoint: str, key: Hashable) -> bool:
+        """Claim the refresh of an entry unless another thread or process holds it"""
+        now = time.time()
+        cursor = self._conn().execute(
+            'UPDATE responses SET lease_until=? WHERE namespace=? AND endpoint=? AND key=? AND lease_until<?',
+            (now + self.lease, namespace, endpoint, self._key(key), now))
+        return cursor.rowcount == 1
+
+    def _submit(self, func, *args) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='whoopy-revalidate')
+            self._executor.submit(func, *args)
+
+    def _refresh(self, namespace: str, endpoint: str, key: Hashable, loader: Callable[[], Any]) -> None:
+        generation = self.generation(namespace, endpoint)
+        try:
+            value = loader()
+        except Exception:
+            self._count('errors')
+            self._conn().execute(
+                'UPDATE responses SET lease_until=0 WHERE namespace=? AND endpoint=? AND key=?',
+                (namespace, endpoint, self._key(key)))
+            return
+        self.set(namespace, endpoint, key, value, generation)
+        self._count('refreshed')
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop background refreshes (waiting for running ones by default) and
+        close every thread's database connection. Using the cache afterwards
+        opens new connections.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for _, conn in connections:
+            conn.close()
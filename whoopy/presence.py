@@ -0,0 +1,198 @@
+"""Background online heartbeat that marks the account offline on exit."""
+import atexit
+import logging
+import random
+import signal
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .enums import BatteryState, DEFAULT_BATTERY_LEVEL, DEFAULT_BATTERY_STATE
+
+
+DEFAULT_HEARTBEAT_INTERVAL = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceSession:
+    """
+    Keep the account online from a background thread.
+
+    online() is sent right after start() and then every ``interval`` seconds,
+    each wait spread by up to ``jitter`` (a fraction of the interval) so many
+    processes do not beat in lockstep. When a location is known (set_location()
+    or the ``location`` callable), it is sent with every heartbeat. Nothing
+    here blocks the caller on the network: requests run on the sender thread
+    over the client's pooled connection.
+
+    stop() (or leaving the ``with`` block) sends offline(). So does
+    interpreter exit, and with ``handle_signals=True`` also SIGTERM/SIGINT.
+    """
+
+    def __init__(self, client, interval: float = DEFAULT_HEARTBEAT_INTERVAL, jitter: float = 0.1,
+                 location: Optional[Callable[[], Optional[Dict]]] = None, offline_on_stop: bool = True,
+                 handle_signals: bool = False, on_error: Optional[Callable[[Exception], None]] = None):
+        """
+        Initialize PresenceSession.
+
+        Args:
+            client: Whoopy instance used to send heartbeats
+            interval: Seconds between heartbeats (default: 60.0)
+            jitter: Random spread of each wait, as a fraction of interval (default: 0.1)
+            location: Called before each heartbeat for the location dict to send with
+                it; None skips the location (optional)
+            offline_on_stop: Send offline() when stopping (default: True)
+            handle_signals: Stop and go offline on SIGTERM/SIGINT, then run the
+                previous handler; must be started from the main thread (default: False)
+            on_error: Called with the exception when a heartbeat fails; what it
+                raises is logged and does not stop the heartbeats (optional)
+        """
+        if interval <= 0:
+            raise ValueError('interval must be positive')
+        self.client = client
+        self.interval = interval
+        self.jitter = jitter
+        self.location = location
+        self.offline_on_stop = offline_on_stop
+        self.handle_signals = handle_signals
+        self.on_error = on_error
+        self.last_error: Optional[Exception] = None
+        self.last_beat_at: Optional[float] = None
+        self.stats: Dict[str, int] = {'heartbeats': 0, 'locations': 0, 'errors': 0, 'offline': 0}
+
+        self._fix: Optional[Dict] = None
+        self._beat_now = False
+        self._stopping = False
+        self._offline = offline_on_stop
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._previous_handlers: Dict[int, object] = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self) -> 'PresenceSession':
+        """Start the heartbeat thread (the first heartbeat is sent at once)"""
+        with self._cond:
+            if self._thread is not None:
+                return self
+            self._stopping = False
+            self._offline = self.offline_on_stop
+            self._thread = threading.Thread(target=self._run, name='whoopy-presence', daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+        if self.handle_signals:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                self._previous_handlers[signum] = signal.signal(signum, self._on_signal)
+        return self
+
+    def stop(self, offline: Optional[bool] = None, timeout: Optional[float] = None) -> None:
+        """
+        Stop heartbeats and wait for the thread.
+
+        Args:
+            offline: Send offline() before the thread exits (default: offline_on_stop)
+            timeout: Seconds to wait for the thread (default: wait until done)
+        """
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            if offline is not None:
+                self._offline = offline
+            self._cond.notify_all()
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+        atexit.unregister(self.stop)
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+        self._previous_handlers.clear()
+
+    def set_location(self, location: Dict, level: int = DEFAULT_BATTERY_LEVEL,
+                     state: BatteryState = DEFAULT_BATTERY_STATE, speed: float = 0.0,
+                     stayed_at: Optional[str] = None, horizontal_accuracy: Optional[float] = None) -> None:
+        """Location to send with the next heartbeats; same arguments as Whoopy.update_location"""
+        with self._cond:
+            self._fix = {'location': location, 'level': level, 'state': state, 'speed': speed,
+                         'stayed_at': stayed_at, 'horizontal_accuracy': horizontal_accuracy}
+
+    def beat(self) -> None:
+        """Send a heartbeat now instead of at the next scheduled time (does not wait for it)"""
+        with self._cond:
+            self._beat_now = True
+            self._cond.notify_all()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def _on_signal(self, signum, frame) -> None:
+        previous = self._previous_handlers.get(signum)
+        self.stop()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            raise SystemExit(128 + signum)
+
+    def _next_wait(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _run(self) -> None:
+        wait = 0.0
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + wait
+                while not self._stopping and not self._beat_now:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    break
+                self._beat_now = False
+                fix = self._fix
+            self._heartbeat(fix)
+            wait = self._next_wait()
+
+        if self._offline:
+            self._call('offline', self.client.offline)
+
+    def _heartbeat(self, fix: Optional[Dict]) -> None:
+        if self._call('heartbeats', self.client.online):
+            self.last_beat_at = time.time()
+        if fix is None and self.location is not None:
+            try:
+                location = self.location()
+            except Exception as err:
+                self._failed(err)
+                return
+            if location is not None:
+                fix = {'location': location}
+        if fix is not None:
+            self._call('locations', lambda: self.client.update_location(**fix))
+
+    def _call(self, name: str, func: Callable) -> bool:
+        try:
+            func()
+        except Exception as err:
+            self._failed(err)
+            return False
+        with self._cond:
+            self.stats[name] += 1
+        return True
+
+    def _failed(self, error: Exception) -> None:
+        with self._cond:
+            self.stats['errors'] += 1
+            self.last_error = error
+        if self.on_error is not None:
+            try:
+                self.on_error(error)
+            except Exception:
+                logger.exception('PresenceSession on_error callback failed')
@@ -1,19 +1,37 @@
 """Profile management for Whoopy API."""
-from typing import Optional
+from typing import Callable, Optional, Union
+from .cache import ACCOUNT_ENDPOINTS, NAMES
+from .enums import DEFAULT_BASE_URL
+from .transport import DEFAULT_TRANSPORT, Transport
 from .utils import HTTPClient
 
 
 class Profile:
     """Handle profile-related API operations."""
 
-    def __init__(self, headers: dict):
+    def __init__(self, headers: dict, client: Optional[HTTPClient] = None,
+                 base_url: str = DEFAULT_BASE_URL, transport: Union[str, Transport] = DEFAULT_TRANSPORT,
+                 on_write: Optional[Callable[..., None]] = None):
         """
         Initialize Profile instance.
 
         Args:
             headers: HTTP headers for API requests
+            client: Shared HTTP client to reuse pooled connections (optional)
+            base_url: API base URL (default: https://www.wh00.ooo/)
+            transport: HTTP backend when no client is given (default: 'requests')
+            on_write: Called with the cached read endpoints each write makes stale (optional)
         """
-        self.client = HTTPClient(headers)
+        self.client = client if client is not None else HTTPClient(headers, transport=transport)
+        self.base = base_url
+        self.on_write = on_write
+
+    def _patch(self, url: str, endpoints, **kwargs) -> None:
+        try:
+            self.client.patch(url, idempotent=True, **kwargs)
+        finally:
+            if self.on_write is not None:
+                self.on_write(*endpoints)
 
     def update_profile(
         self,
@@ -35,7 +53,7 @@ class Profile:
         if name is None and profile_image is None and username is None:
             raise ValueError("At least one parameter must be provided")
 
-        url = "https://www.wh00.ooo/api/user"
+        url = f"{self.base}api/user"
         params = {}
         if name is not None:
             params["display_name"] = name
@@ -44,4 +62,6 @@ class Profile:
         if username is not None:
             params["username"] = username
 
-        self.client.patch(url, json=params)
+        # Names the account was resolved by may have changed
+        renamed = (NAMES,) if name is not None or username is not None else ()
+        self._patch(url, ACCOUNT_ENDPOINTS + renamed, json=params)
@@ -0,0 +1,208 @@
+"""Background, coalescing sender for update_location."""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .enums import BatteryState, DEFAULT_BATTERY_LEVEL, DEFAULT_BATTERY_STATE
+from .geo import haversine
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Fix:
+    __slots__ = ('latitude', 'longitude', 'level', 'state', 'speed', 'stayed_at',
+                 'horizontal_accuracy', 'received_at')
+
+    def __init__(self, location, level, state, speed, stayed_at, horizontal_accuracy):
+        self.latitude = float(location["latitude"])
+        self.longitude = float(location["longitude"])
+        self.level = level
+        self.state = state
+        self.speed = speed
+        self.stayed_at = stayed_at
+        self.horizontal_accuracy = horizontal_accuracy
+        self.received_at = time.monotonic()
+
+
+class LocationPublisher:
+    """
+    Send GPS fixes to the server from a background thread, as few as needed.
+
+    publish() never blocks on the network. A fix is dropped unless, relative
+    to the last accepted fix, it moved at least ``distance`` meters, changed
+    speed or battery level by the given thresholds, changed battery state, or
+    came ``max_interval`` seconds later. Accepted fixes replace any fix still
+    waiting, so only the latest one is sent, at most once every
+    ``min_interval`` seconds. stop() sends the waiting fix before returning.
+    """
+
+    def __init__(self, client, distance: float = 10.0, speed: Optional[float] = None,
+                 battery: Optional[float] = None, min_interval: float = 5.0,
+                 max_interval: Optional[float] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        """
+        Initialize LocationPublisher.
+
+        Args:
+            client: Whoopy instance used to send locations
+            distance: Minimum movement in meters to accept a fix (default: 10.0)
+            speed: Minimum speed change in km/h to accept a fix (default: ignore speed)
+            battery: Minimum battery level change (0-100) to accept a fix (default: ignore battery)
+            min_interval: Minimum seconds between two sends (default: 5.0)
+            max_interval: Accept a fix anyway once this many seconds passed since the
+                last accepted one (default: never)
+            on_error: Called with the exception when a send fails; what it raises
+                is logged and does not stop the sender (optional)
+        """
+        self.client = client
+        self.distance = distance
+        self.speed = speed
+        self.battery = battery
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.on_error = on_error
+        self.last_error: Optional[Exception] = None
+        self.stats: Dict[str, int] = {'received': 0, 'dropped': 0, 'coalesced': 0, 'sent': 0, 'errors': 0}
+
+        self._accepted: Optional[_Fix] = None
+        self._pending: Optional[_Fix] = None
+        self._sending = False
+        self._last_sent_at = float('-inf')
+        self._flush = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self) -> 'LocationPublisher':
+        """Start the sender thread"""
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='whoopy-location-publisher', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, flush: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Stop the sender thread.
+
+        Args:
+            flush: Send the waiting fix first, ignoring min_interval (default: True)
+            timeout: Seconds to wait for the thread (default: wait until done)
+        """
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            if not flush:
+                self._pending = None
+            self._cond.notify_all()
+        thread.join(timeout)
+        self._thread = None
+
+    def publish(self, location: Dict, level: int = DEFAULT_BATTERY_LEVEL,
+                state: BatteryState = DEFAULT_BATTERY_STATE, speed: float = 0.0,
+                stayed_at: Optional[str] = None, horizontal_accuracy: Optional[float] = None) -> bool:
+        """
+        Offer a fix; same arguments as Whoopy.update_location.
+
+        Returns:
+            bool: True if the fix was accepted, False if it was dropped
+        """
+        fix = _Fix(location, level, state, speed, stayed_at, horizontal_accuracy)
+        with self._cond:
+            self.stats['received'] += 1
+            if self._accepted is not None and not self._significant(self._accepted, fix):
+                self.stats['dropped'] += 1
+                return False
+            if self._pending is not None:
+                self.stats['coalesced'] += 1
+            self._accepted = self._pending = fix
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send the waiting fix now, ignoring min_interval, and wait for it.
+
+        Returns:
+            bool: True if nothing is left to send
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            errors = self.stats['errors']
+            self._flush = True
+            self._cond.notify_all()
+            while self._pending is not None or self._sending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or self._thread is None \
+                        or self.stats['errors'] != errors:
+                    break
+                self._cond.wait(remaining)
+            return self._pending is None and not self._sending
+
+    def _significant(self, last: _Fix, fix: _Fix) -> bool:
+        if haversine(last.latitude, last.longitude, fix.latitude, fix.longitude) >= self.distance:
+            return True
+        if self.speed is not None and abs(fix.speed - last.speed) >= self.speed:
+            return True
+        if self.battery is not None and abs(fix.level - last.level) >= self.battery:
+            return True
+        if fix.state != last.state:
+            return True
+        return self.max_interval is not None and fix.received_at - last.received_at >= self.max_interval
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending is not None:
+                        wait = self._last_sent_at + self.min_interval - time.monotonic()
+                        if wait <= 0 or self._flush or self._stopping:
+                            break
+                    elif self._stopping:
+                        return
+                    else:
+                        wait = None
+                        self._flush = False
+                    self._cond.wait(wait)
+                fix, self._pending = self._pending, None
+                self._sending = True
+
+            try:
+                self.client.update_location(
+                    {"latitude": fix.latitude, "longitude": fix.longitude}, fix.level, fix.state,
+                    fix.speed, fix.stayed_at, fix.horizontal_accuracy)
+            except Exception as err:
+                error = err
+            else:
+                error = None
+
+            with self._cond:
+                self._sending = False
+                self._last_sent_at = time.monotonic()
+                if error is None:
+                    self.stats['sent'] += 1
+                else:
+                    self.stats['errors'] += 1
+                    self.last_error = error
+                    self._flush = False
+                    # Retry with this fix unless a newer one arrived meanwhile
+                    if self._pending is None and not self._stopping:
+                        self._pending = fix
+                self._cond.notify_all()
+
+            if error is not None and self.on_error is not None:
+                try:
+                    self.on_error(error)
+                except Exception:
+                    logger.exception('LocationPublisher on_error callback failed')
@@ -0,0 +1,190 @@
+"""Retry policy and circuit breaker used by HTTPClient."""
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Optional
+from urllib.parse import urlsplit
+
+from .enums import HttpStatus
+from .exceptions import CircuitOpenError
+
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUSES = frozenset({
+    HttpStatus.TOO_MANY_REQUESTS,
+    HttpStatus.INTERNAL_SERVER_ERROR,
+    HttpStatus.BAD_GATEWAY,
+    HttpStatus.SERVICE_UNAVAILABLE,
+    HttpStatus.GATEWAY_TIMEOUT,
+})
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """
+    Group requests by endpoint, e.g. ``GET /api/v2/users/{id}/friends``.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+
+    Returns:
+        Method and path with numeric ids replaced by ``{id}``
+    """
+    return f"{method.upper()} {_ID_SEGMENT.sub('/{id}', urlsplit(url).path)}"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header.
+
+    Args:
+        value: Header value (delay in seconds or an HTTP date)
+
+    Returns:
+        Seconds to wait, or None if missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Idempotency-aware retries with jittered exponential backoff.
+
+    Idempotent requests are retried on connection errors and on
+    ``retry_statuses``. Other requests are only retried when the server
+    cannot have processed them: connect timeouts and 429 responses.
+    ``Retry-After`` is honoured, up to ``max_retry_after`` seconds.
+    """
+
+    def __init__(self, max_retries: int = 2, backoff: float = 0.2, max_backoff: float = 5.0,
+                 max_retry_after: float = 30.0, retry_statuses: FrozenSet[int] = RETRY_STATUSES,
+                 idempotent_methods: FrozenSet[str] = IDEMPOTENT_METHODS):
+        """
+        Initialize RetryPolicy.
+
+        Args:
+            max_retries: Retries after the first attempt (default: 2)
+            backoff: Base delay in seconds, doubled per attempt (default: 0.2)
+            max_backoff: Upper bound of the backoff delay in seconds (default: 5.0)
+            max_retry_after: Longest Retry-After delay honoured in seconds (default: 30.0)
+            retry_statuses: Status codes worth retrying
+            idempotent_methods: Methods safe to repeat
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = retry_statuses
+        self.idempotent_methods = idempotent_methods
+
+    def is_idempotent(self, method: str) -> bool:
+        return method.upper() in self.idempotent_methods
+
+    def should_retry_status(self, status: int, idempotent: bool) -> bool:
+        if status == HttpStatus.TOO_MANY_REQUESTS:
+            return True
+        return idempotent and status in self.retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to sleep before retry number ``attempt`` (0-based).
+
+        Returns:
+            Delay in seconds, or None if Retry-After asks for longer than allowed
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        # Full jitter keeps many clients from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one endpoint.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast with CircuitOpenError for ``reset_timeout`` seconds. Then
+    one trial call is let through (half-open); its outcome closes or reopens
+    the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_request(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the circuit is open (or a trial is already running)
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError(self.endpoint, max(0.0, remaining))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class CircuitBreakers:
+    """Per-endpoint CircuitBreaker registry"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize CircuitBreakers.
+
+        Args:
+            failure_threshold: Consecutive failures that open a circuit (default: 5)
+            reset_timeout: Seconds a circuit stays open before a trial call (default: 30.0)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    endpoint, CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout))
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        """Current state of every known endpoint"""
+        return {endpoint: breaker.state for endpoint, breaker in self._breakers.items()}
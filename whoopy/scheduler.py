@@ -0,0 +1,273 @@
+"""Client-side token-bucket rate limiting with priority scheduling of requests."""
+import contextvars
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .exceptions import QueueFullError
+from .retry import endpoint_key
+
+
+class Priority(IntEnum):
+    """Scheduling class of a request; lower values are served first"""
+    URGENT = 0
+    NORMAL = 1
+    BULK = 2
+
+
+# Endpoint (see retry.endpoint_key) -> priority; anything else is NORMAL
+DEFAULT_PRIORITIES = {
+    'PATCH /api/user/location': Priority.URGENT,
+    'PATCH /api/user/online': Priority.URGENT,
+    'PATCH /api/user/offline': Priority.URGENT,
+    'POST /api/email/login': Priority.URGENT,
+    'GET /api/friends': Priority.BULK,
+    'GET /api/friends/search': Priority.BULK,
+    'GET /api/v2/users/{id}': Priority.BULK,
+    'GET /api/v2/users/{id}/friends': Priority.BULK,
+}
+DEFAULT_RATE = 10.0
+DEFAULT_MAX_QUEUE = 64
+
+BLOCK = 'block'
+SHED = 'shed'
+
+# Priority set with priority() for requests made in this context
+_priority: contextvars.ContextVar[Optional[Priority]] = contextvars.ContextVar('whoopy_priority', default=None)
+
+
+@contextmanager
+def priority(level: Union[Priority, int]) -> Iterator[None]:
+    """
+    Schedule every request made inside the block with ``level``.
+
+    Example:
+        with priority(Priority.BULK):
+            cl.get_friends()
+    """
+    token = _priority.set(Priority(level))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    ``rate`` tokens per second, holding at most ``burst``.
+
+    Not thread-safe on its own; RequestScheduler guards it with its lock.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float, need: float = 1.0) -> float:
+        """Seconds until ``need`` tokens are available (0 if they are now)"""
+        self._refill(now)
+        missing = min(need, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+class _Ticket:
+    __slots__ = ('priority', 'seq', 'endpoint', 'shed')
+
+    def __init__(self, priority: Priority, seq: int, endpoint: str):
+        self.priority = priority
+        self.seq = seq
+        self.endpoint = endpoint
+        self.shed = False
+
+    @property
+    def rank(self) -> Tuple[int, int]:
+        return self.priority, self.seq
+
+
+class RequestScheduler:
+    """
+    Admits requests under a client-wide and per-endpoint token-bucket rate
+    limit, serving waiting requests by priority class (FIFO within a class).
+
+    ``reserve`` tokens of the client-wide bucket may only be spent by URGENT
+    requests, so location and presence updates are sent at once even while
+    background calls use up the rest of the budget.
+
+    At most ``max_queue`` requests wait. When the queue is full a new NORMAL
+    or BULK request either waits for room (``overflow='block'``, backpressure
+    on the calling threads) or is shed (``overflow='shed'``): the newest
+    waiter of a lower class than the newcomer is dropped, otherwise the
+    newcomer, raising QueueFullError. URGENT requests are always queued.
+    """
+
+    def __init__(self, rate: Optional[float] = DEFAULT_RATE, burst: Optional[float] = None,
+                 endpoint_limits: Optional[Dict[str, Union[float, Tuple[float, float]]]] = None,
+                 priorities: Optional[Dict[str, Priority]] = None, max_queue: int = DEFAULT_MAX_QUEUE,
+                 overflow: str = BLOCK, reserve: float = 1.0, timeout: Optional[float] = None):
+        """
+        Initialize RequestScheduler.
+
+        Args:
+            rate: Requests per second for the whole client; None for no limit (default: 10)
+            burst: Requests that may be sent at once after idling (default: rate)
+            endpoint_limits: Endpoint (e.g. 'GET /api/friends/search') to rate or
+                (rate, burst) (optional)
+            priorities: Endpoint to Priority, overriding DEFAULT_PRIORITIES (optional)
+            max_queue: Maximum number of waiting requests (default: 64)
+            overflow: 'block' or 'shed' when the queue is full (default: 'block')
+            reserve: Client-wide tokens kept for URGENT requests (default: 1)
+            timeout: Longest a request may wait before QueueFullError (optional)
+        """
+        if overflow not in (BLOCK, SHED):
+            raise ValueError(f"overflow must be '{BLOCK}' or '{SHED}'")
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.endpoint_buckets: Dict[str, TokenBucket] = {}
+        for endpoint, limit in (endpoint_limits or {}).items():
+            self.endpoint_buckets[endpoint] = TokenBucket(*limit) if isinstance(limit, tuple) else TokenBucket(limit)
+        self.priorities = dict(DEFAULT_PRIORITIES)
+        self.priorities.update(priorities or {})
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.reserve = reserve
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._waiting: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._stats = {level: {'admitted': 0, 'shed': 0, 'waited': 0.0, 'max_wait': 0.0} for level in Priority}
+
+    def priority_of(self, endpoint: str) -> Priority:
+        """Priority of a request: the one set with priority(), else the endpoint's"""
+        level = _priority.get()
+        return level if level is not None else self.priorities.get(endpoint, Priority.NORMAL)
+
+    def acquire(self, method: str, url: str) -> None:
+        """
+        Wait until the request may be sent.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+
+        Raises:
+            QueueFullError: If the request was shed or waited longer than the timeout
+        """
+        endpoint = endpoint_key(method, url)
+        level = self.priority_of(endpoint)
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout is not None else None
+
+        with self._cond:
+            ticket = _Ticket(level, next(self._seq), endpoint)
+            if level != Priority.URGENT:
+                self._make_room(ticket, deadline)
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    if ticket.shed:
+                        raise QueueFullError(endpoint, 'queue full')
+                    now = time.monotonic()
+                    delay = self._ready_in(ticket, now)
+                    if delay == 0.0:
+                        self._admit(ticket, now, now - start)
+                        return
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise QueueFullError(endpoint, 'timed out')
+                        delay = min(delay, deadline - now)
+                    self._cond.wait(delay)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    self._stats[level]['shed'] += 1
+                    self._cond.notify_all()
+                raise
+
+    def _make_room(self, ticket: _Ticket, deadline: Optional[float]) -> None:
+        """Apply the queue bound to a new non-urgent request (lock held)"""
+        while len(self._waiting) >= self.max_queue:
+            if self.overflow == SHED:
+                victim = max(self._waiting, key=lambda waiting: waiting.rank)
+                if victim.priority <= ticket.priority:
+                    self._stats[ticket.priority]['shed'] += 1
+                    raise QueueFullError(ticket.endpoint, 'queue full')
+                self._waiting.remove(victim)
+                self._stats[victim.priority]['shed'] += 1
+                victim.shed = True
+                self._cond.notify_all()
+                return
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self._stats[ticket.priority]['shed'] += 1
+                raise QueueFullError(ticket.endpoint, 'timed out')
+            self._cond.wait(remaining)
+
+    def _ready_in(self, ticket: _Ticket, now: float) -> float:
+        """Seconds before ``ticket`` may go; 0 when it may go now (lock held)"""
+        endpoint_bucket = self.endpoint_buckets.get(ticket.endpoint)
+        endpoint_wait = endpoint_bucket.wait_time(now) if endpoint_bucket is not None else 0.0
+        if endpoint_wait:
+            return endpoint_wait
+        bucket = self.bucket
+        if bucket is None:
+            return 0.0
+
+        # Client-wide tokens go to the best-ranked request whose endpoint is not throttled
+        for other in self._waiting:
+            if other.rank < ticket.rank and not other.shed:
+                other_bucket = self.endpoint_buckets.get(other.endpoint)
+                if other_bucket is None or not other_bucket.wait_time(now):
+                    return max(bucket.wait_time(now, self._need(other)), 0.001)
+        return bucket.wait_time(now, self._need(ticket))
+
+    def _need(self, ticket: _Ticket) -> float:
+        return 1.0 if ticket.priority == Priority.URGENT else 1.0 + self.reserve
+
+    def _admit(self, ticket: _Ticket, now: float, waited: float) -> None:
+        if self.bucket is not None:
+            self.bucket.take(now)
+        endpoint_bucket = self.endpoint_buckets.get(ticket.endpoint)
+        if endpoint_bucket is not None:
+            endpoint_bucket.take(now)
+        self._waiting.remove(ticket)
+        stats = self._stats[ticket.priority]
+        stats['admitted'] += 1
+        stats['waited'] += waited
+        stats['max_wait'] = max(stats['max_wait'], waited)
+        self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Scheduling counters per priority class.
+
+        Returns:
+            Dict mapping 'urgent'/'normal'/'bulk' to admitted, shed, waiting,
+            mean_wait and max_wait (seconds)
+        """
+        with self._cond:
+            result = {}
+            for level, stats in self._stats.items():
+                admitted = stats['admitted']
+                result[level.name.lower()] = {
+                    'admitted': admitted,
+                    'shed': stats['shed'],
+                    'waiting': sum(1 for ticket in self._waiting if ticket.priority == level),
+                    'mean_wait': stats['waited'] / admitted if admitted else 0.0,
+                    'max_wait': stats['max_wait'],
+                }
+            return result
@@ -0,0 +1,160 @@
+"""User search: every match of api/friends/search and memoized name to user id resolution."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .singleflight import SingleFlight
+
+
+DEFAULT_RESOLVE_TTL = 600.0
+DEFAULT_NEGATIVE_TTL = 60.0
+DEFAULT_RESOLVE_MAXSIZE = 1024
+
+
+def search_params(user_name: str, page: Optional[int] = None) -> Dict[str, Any]:
+    """Query parameters of api/friends/search for one page (the first if page is None)"""
+    params: Dict[str, Any] = {"display_name": user_name}
+    if page is not None:
+        params["page"] = page
+    return params
+
+
+def iter_matches(fetch_page: Callable[[Optional[int]], Dict]) -> Iterator[Dict]:
+    """
+    Yield the users of every search result page, following ``next_page``
+    when the server paginates.
+
+    Args:
+        fetch_page: Returns the decoded body of a page (None for the first)
+
+    Yields:
+        Dict: User information, in result order
+    """
+    page = None
+    seen = set()
+    while True:
+        data = fetch_page(page)
+        users = data.get("friends")
+        if not isinstance(users, list) or not users:
+            return
+        yield from users
+        seen.add(page)
+        page = data.get("next_page")
+        if not page or page in seen:
+            return
+
+
+def best_match(users: Iterable[Dict], user_name: str) -> Optional[Dict]:
+    """
+    The user whose display name equals ``user_name``, else the first whose
+    username does, else the first match. Stops consuming ``users`` at an
+    exact display name match.
+    """
+    first = by_username = None
+    for user in users:
+        if user.get("display_name") == user_name:
+            return user
+        if by_username is None and user.get("username") == user_name:
+            by_username = user
+        if first is None:
+            first = user
+    return by_username if by_username is not None else first
+
+
+class NameResolver:
+    """
+    Thread-safe memo of display name -> user id with TTL and LRU eviction.
+
+    Names without a match are remembered too (for ``negative_ttl``), so
+    repeated lookups of unknown names do not reach the server either.
+    Concurrent lookups of the same name share one request.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_RESOLVE_TTL, negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 maxsize: int = DEFAULT_RESOLVE_MAXSIZE):
+        """
+        Initialize NameResolver.
+
+        Args:
+            ttl: Seconds a resolved id is kept (default: 600)
+            negative_ttl: Seconds a name without a match is kept; 0 disables (default: 60)
+            maxsize: Maximum number of names before LRU eviction (default: 1024)
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[str, Tuple[float, Optional[int]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, user_name: str) -> Tuple[bool, Optional[int]]:
+        """
+        Look up a remembered name.
+
+        Returns:
+            (True, user id or None for a remembered miss), or (False, None)
+            when the name is not remembered
+        """
+        with self._lock:
+            entry = self._entries.get(user_name)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_name)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[user_name]
+            self.misses += 1
+            return False, None
+
+    def set(self, user_name: str, user_id: Optional[int]) -> None:
+        """Remember the id of a name (None: no user has it)"""
+        ttl = self.ttl if user_id is not None else self.negative_ttl
+        if not ttl:
+            return
+        with self._lock:
+            self._entries[user_name] = (time.monotonic() + ttl, user_id)
+            self._entries.move_to_end(user_name)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def resolve(self, user_name: str, lookup: Callable[[str], Optional[int]]) -> Optional[int]:
+        """
+        Remembered id of a name, calling ``lookup`` on a miss.
+
+        Args:
+            user_name: Display name
+            lookup: Fetches the id (None when nobody has the name)
+
+        Returns:
+            User id, or None if no user has the name
+        """
+        found, user_id = self.lookup(user_name)
+        if found:
+            return user_id
+
+        def load():
+            user_id = lookup(user_name)
+            self.set(user_name, user_id)
+            return user_id
+        return self._flight.do(user_name, load)
+
+    def invalidate(self, *user_names: str) -> None:
+        """Forget the given names (every name if none given)"""
+        with self._lock:
+            if not user_names:
+                self._entries.clear()
+            for user_name in user_names:
+                self._entries.pop(user_name, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Lookup counters.
+
+        Returns:
+            Dict with size, hits and misses
+        """
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,134 @@
+"""Collapse concurrent identical requests into one in-flight call."""
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread-level single flight: while a call for a key is running, callers
+    asking for the same key wait for it and receive its result or exception
+    instead of starting their own.
+
+    Nothing is cached: a call starting after the previous one finished runs again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run ``func`` unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the call, e.g. (method, url, params)
+            func: Performs the call
+
+        Returns:
+            The result of the (possibly shared) call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Collapse counters.
+
+        Returns:
+            Dict with calls (executed), collapsed (callers that shared one) and in_flight
+        """
+        with self._lock:
+            return {'calls': self.calls, 'collapsed': self.collapsed, 'in_flight': len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight.
+
+    The shared call runs as its own task, so cancelling one waiter does not
+    cancel it for the others.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, 'asyncio.Future'] = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await ``func()`` unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the call, e.g. (method, url, params)
+            func: Coroutine function performing the call
+
+        Returns:
+            The result of the (possibly shared) call
+        """
+        # Imported here so that the sync client does not load asyncio
+        import asyncio
+
+        task = self._tasks.get(key)
+        if task is not None:
+            self.collapsed += 1
+        else:
+            task = self._tasks[key] = asyncio.ensure_future(func())
+            self.calls += 1
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: 'asyncio.Future') -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Collapse counters.
+
+        Returns:
+            Dict with calls (executed), collapsed (callers that shared one) and in_flight
+        """
+        return {'calls': self.calls, 'collapsed': self.collapsed, 'in_flight': len(self._tasks)}
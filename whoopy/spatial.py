@@ -0,0 +1,273 @@
+"""Grid index over friend locations for nearest / radius / bounding-box queries."""
+import heapq
+from math import asin, cos, degrees, floor, pi, radians, sin
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from .geo import EARTH_RADIUS_M, haversine
+from .tracker import LocationDelta, _coordinates, _user_id
+
+DEFAULT_CELL_SIZE = 1000.0  # Cell edge in meters (north-south)
+
+
+class SpatialIndex:
+    """
+    Friend locations bucketed into a latitude/longitude grid.
+
+    Queries only compute haversine distances for entries in cells that can
+    hold matches, and update()/move() re-bucket just the friends whose
+    position changed, so an index can be kept across polls instead of being
+    rebuilt. Records are the get_locations() values (dicts or FriendLocation
+    models), keyed by user id.
+    """
+
+    def __init__(self, locations: Union[Mapping[str, Any], Iterable[Any], None] = None,
+                 cell_size: float = DEFAULT_CELL_SIZE):
+        """
+        Initialize SpatialIndex.
+
+        Args:
+            locations: get_locations() result, raw records or FriendLocation models (optional)
+            cell_size: Grid cell size in meters; about the typical query radius works
+                best (default: 1000.0)
+        """
+        self.cell_size = cell_size
+        self._cell_deg = degrees(cell_size / EARTH_RADIUS_M)
+        self._lat_cells = int(180.0 / self._cell_deg) + 1
+        # Longitude cells tile the full circle exactly so the grid wraps cleanly
+        self._lon_cells = max(1, int(360.0 / self._cell_deg))
+        self._lon_deg = 360.0 / self._lon_cells
+        self._points: Dict[Any, Tuple[float, float, Tuple[int, int], Any]] = {}
+        self._cells: Dict[Tuple[int, int], Set[Any]] = {}
+        if locations is not None:
+            self.update(locations, prune=False)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, user_id):
+        return user_id in self._points
+
+    def get(self, user_id) -> Optional[Any]:
+        """Record stored for a user, or None"""
+        point = self._points.get(user_id)
+        return point[3] if point is not None else None
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (floor((latitude + 90.0) / self._cell_deg),
+                floor((longitude + 180.0) / self._lon_deg) % self._lon_cells)
+
+    ##############  Updates   ##############
+    def move(self, user_id, latitude: float, longitude: float, record: Any = None) -> None:
+        """
+        Insert or move one friend.
+
+        Args:
+            user_id: User ID
+            latitude: Latitude in degrees
+            longitude: Longitude in degrees
+            record: Value returned by queries (default: the user id)
+        """
+        cell = self._cell(latitude, longitude)
+        old = self._points.get(user_id)
+        if old is not None and old[2] != cell:
+            self._discard(user_id, old[2])
+        if old is None or old[2] != cell:
+            self._cells.setdefault(cell, set()).add(user_id)
+        self._points[user_id] = (latitude, longitude, cell, user_id if record is None else record)
+
+    def remove(self, user_id) -> None:
+        """Remove a friend if present"""
+        old = self._points.pop(user_id, None)
+        if old is not None:
+            self._discard(user_id, old[2])
+
+    def _discard(self, user_id, cell) -> None:
+        members = self._cells[cell]
+        members.discard(user_id)
+        if not members:
+            del self._cells[cell]
+
+    def update(self, locations: Union[Mapping[str, Any], Iterable[Any]], prune: bool = True) -> None:
+        """
+        Apply a new get_locations() snapshot.
+
+        Unchanged friends are left in place; only moved ones are re-bucketed.
+
+        Args:
+            locations: get_locations() result, raw records or FriendLocation models
+            prune: Remove friends missing from the snapshot (default: True)
+        """
+        if isinstance(locations, Mapping):
+            locations = locations.values()
+        seen = set()
+        for loc in locations:
+            user_id = _user_id(loc)
+            seen.add(user_id)
+            self.move(user_id, *_coordinates(loc), loc)
+        if prune:
+            for user_id in [user_id for user_id in self._points if user_id not in seen]:
+                self.remove(user_id)
+
+    def apply(self, delta: LocationDelta) -> None:
+        """Apply a LocationTracker delta (added, changed and removed friends)"""
+        for changes in (delta.added, delta.changed):
+            for user_id, loc in changes.items():
+                self.move(user_id, *_coordinates(loc), loc)
+        for user_id in delta.removed:
+            self.remove(user_id)
+
+    ##############  Queries   ##############
+    def _box(self, lat_cell: int, lon_cell: int, lat_reach: int, lon_reach: Optional[int]):
+        """Non-empty cells within the given cell offsets (longitudes wrap; None for all)"""
+        lat_range = range(max(0, lat_cell - lat_reach), min(self._lat_cells, lat_cell + lat_reach + 1))
+        lon_count = self._lon_cells
+        if lon_reach is None or 2 * lon_reach + 1 >= lon_count:
+            lon_reach = None
+            width = lon_count
+        else:
+            width = 2 * lon_reach + 1
+
+        if len(lat_range) * width > len(self._cells):
+            # Cheaper to filter the occupied cells than to enumerate the box
+            for (i, j), members in self._cells.items():
+                if i in lat_range and (lon_reach is None or
+                                       min((j - lon_cell) % lon_count, (lon_cell - j) % lon_count) <= lon_reach):
+                    yield (i, j), members
+            return
+        lon_cells = range(lon_count) if lon_reach is None \
+            else [(lon_cell + offset) % lon_count for offset in range(-lon_reach, lon_reach + 1)]
+        for i in lat_range:
+            for j in lon_cells:
+                members = self._cells.get((i, j))
+                if members:
+                    yield (i, j), members
+
+    def within(self, latitude: float, longitude: float, radius: float) -> List[Tuple[Any, float]]:
+        """
+        Friends within ``radius`` meters of a point.
+
+        Args:
+            latitude: Latitude in degrees
+            longitude: Longitude in degrees
+            radius: Radius in meters
+
+        Returns:
+            List of (record, distance in meters), nearest first
+        """
+        angle = radius / EARTH_RADIUS_M
+        edge = radians(abs(latitude)) + angle
+        if angle >= pi / 2 or edge >= pi / 2:
+            # The circle reaches a pole: every longitude
+            lon_reach = None
+        else:
+            span = degrees(asin(min(1.0, sin(angle) / cos(edge))))
+            lon_reach = int(span / self._lon_deg) + 1
+        lat_reach = int(degrees(angle) / self._cell_deg) + 1
+
+        points = self._points
+        found = []
+        for _, members in self._box(*self._cell(latitude, longitude), lat_reach, lon_reach):
+            for user_id in members:
+                lat, lon, _, record = points[user_id]
+                distance = haversine(latitude, longitude, lat, lon)
+                if distance <= radius:
+                    found.append((distance, record))
+        found.sort(key=lambda item: item[0])
+        return [(record, distance) for distance, record in found]
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> List[Tuple[Any, float]]:
+        """
+        The ``k`` friends nearest to a point.
+
+        Rings of cells are searched outward until no unvisited cell can hold
+        anything closer than the k-th match.
+
+        Args:
+            latitude: Latitude in degrees
+            longitude: Longitude in degrees
+            k: Number of friends (default: 1)
+
+        Returns:
+            List of (record, distance in meters), nearest first
+        """
+        points = self._points
+        if k <= 0 or not points:
+            return []
+
+        lat_cell, lon_cell = self._cell(latitude, longitude)
+        phi = radians(latitude)
+        lat_rad, lon_rad = radians(self._cell_deg), radians(self._lon_deg)
+        lon_offset = radians((longitude + 180.0) % self._lon_deg)
+        best: List[Tuple[float, int, Any]] = []  # min-heap of (-distance, tiebreak, user_id)
+        visited_cells = set()
+        visited = 0
+        ring = 0
+        while True:
+            for cell, members in self._box(lat_cell, lon_cell, ring, ring):
+                if cell in visited_cells:
+                    continue
+                visited_cells.add(cell)
+                for user_id in members:
+                    lat, lon, _, _ = points[user_id]
+                    item = (-haversine(latitude, longitude, lat, lon), visited, user_id)
+                    visited += 1
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            if visited >= len(points):
+                break
+
+            # Closest possible point outside the searched box: across one of
+            # its parallels, or across one of its bounding meridians
+            south = radians(-90.0) + (lat_cell - ring) * lat_rad
+            north = south + (2 * ring + 1) * lat_rad
+            bound = EARTH_RADIUS_M * min(phi - south, north - phi)
+            if 2 * ring + 1 < self._lon_cells:
+                lon_span = min(pi / 2, ring * lon_rad + min(lon_offset, lon_rad - lon_offset))
+                bound = min(bound, EARTH_RADIUS_M * asin(sin(lon_span) * cos(phi)))
+            if len(best) == k and -best[0][0] <= bound:
+                break
+            # Widen geometrically so sparse areas and the poles take few rings
+            ring = ring + 1 if ring < 2 else ring * 2
+
+        best.sort(reverse=True)
+        return [(points[user_id][3], -distance) for distance, _, user_id in best]
+
+    def bbox(self, south: float, west: float, north: float, east: float) -> List[Any]:
+        """
+        Friends inside a latitude/longitude box.
+
+        Args:
+            south: Southern latitude
+            west: Western longitude
+            north: Northern latitude
+            east: Eastern longitude (smaller than west when crossing the antimeridian)
+
+        Returns:
+            List of records
+        """
+        points = self._points
+        lon_count = self._lon_cells
+        crosses = east < west
+        lat_range = range(max(0, floor((south + 90.0) / self._cell_deg)),
+                          min(self._lat_cells, floor((north + 90.0) / self._cell_deg) + 1))
+        first = min(lon_count - 1, floor((west + 180.0) / self._lon_deg))
+        last = min(lon_count - 1, floor((east + 180.0) / self._lon_deg))
+        lon_cells = list(range(first, lon_count)) + list(range(0, last + 1)) if crosses \
+            else range(first, last + 1)
+
+        if len(lat_range) * len(lon_cells) > len(self._cells):
+            lon_set = set(lon_cells)
+            cells = [members for (i, j), members in self._cells.items() if i in lat_range and j in lon_set]
+        else:
+            cells = [self._cells[i, j] for i in lat_range for j in lon_cells if (i, j) in self._cells]
+
+        found = []
+        for members in cells:
+            for user_id in members:
+                lat, lon, _, record = points[user_id]
+                inside_lon = (lon >= west or lon <= east) if crosses else west <= lon <= east
+                if south <= lat <= north and inside_lon:
+                    found.append(record)
+        return found
@@ -0,0 +1,171 @@
+"""Columnar view of friend locations with vectorized geo math."""
+from array import array
+from typing import Any, Iterable, List, Mapping, Sequence, Union
+
+from .geo import EARTH_RADIUS_M, bearing as _bearing, haversine as _haversine
+from .models import FriendLocation
+from .tracker import _battery_level, _coordinates, _timestamp, _user_id
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+_NAN = float('nan')
+COLUMNS = ('latitude', 'longitude', 'speed', 'accuracy', 'battery', 'updated_at')
+
+
+def _float(value) -> float:
+    return _NAN if value is None else float(value)
+
+
+def _column(values: List[float]):
+    return np.array(values, dtype=np.float64) if np is not None else array('d', values)
+
+
+class LocationTable:
+    """
+    Friend locations stored column by column.
+
+    ``latitude``, ``longitude``, ``speed``, ``accuracy``, ``battery`` and
+    ``updated_at`` (epoch seconds) are float64 NumPy arrays when NumPy is
+    installed and ``array('d')`` otherwise; missing values are NaN. ``ids``
+    and ``records`` (the source records) share the same row order.
+
+    With NumPy, distance/bearing run as single vectorized expressions and
+    comparisons such as ``table.battery < 0.2`` give masks for filter().
+    Without it the same methods loop in Python and return ``array('d')``.
+    """
+
+    def __init__(self, ids: Sequence, records: Sequence, latitude, longitude, speed, accuracy,
+                 battery, updated_at):
+        self.ids = ids
+        self.records = records
+        self.latitude = latitude
+        self.longitude = longitude
+        self.speed = speed
+        self.accuracy = accuracy
+        self.battery = battery
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_locations(cls, locations: Union[Mapping[str, Any], Iterable[Any]]) -> 'LocationTable':
+        """
+        Build a table from get_locations() output.
+
+        Args:
+            locations: get_locations() result (keyed by username), raw
+                ``api/locations`` records or FriendLocation models
+
+        Returns:
+            LocationTable
+        """
+        if isinstance(locations, Mapping):
+            locations = locations.values()
+        records = list(locations)
+        ids, lats, lons, speeds, accuracies, batteries, times = [], [], [], [], [], [], []
+        for loc in records:
+            ids.append(_user_id(loc))
+            lat, lon = _coordinates(loc)
+            lats.append(lat)
+            lons.append(lon)
+            if isinstance(loc, FriendLocation):
+                speed, accuracy, updated_at = loc.speed, loc.horizontal_accuracy, loc.updated_at
+            else:
+                speed, accuracy, updated_at = loc.get('speed'), loc.get('horizontal_accuracy'), loc.get('updated_at')
+            speeds.append(_float(speed))
+            accuracies.append(_float(accuracy))
+            batteries.append(_float(_battery_level(loc)))
+            times.append(_float(_timestamp(updated_at)))
+        return cls(np.array(ids) if np is not None else ids, records, _column(lats), _column(lons),
+                   _column(speeds), _column(accuracies), _column(batteries), _column(times))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, mask) -> 'LocationTable':
+        return self.filter(mask)
+
+    def filter(self, mask: Sequence[bool]) -> 'LocationTable':
+        """
+        Rows where ``mask`` is true.
+
+        Args:
+            mask: Boolean NumPy array or sequence of bools, one per row
+
+        Returns:
+            New LocationTable
+        """
+        if np is not None:
+            mask = np.asarray(mask, dtype=bool)
+            records = [record for record, keep in zip(self.records, mask) if keep]
+            return type(self)(self.ids[mask], records,
+                              *(getattr(self, name)[mask] for name in COLUMNS))
+        rows = [i for i, keep in enumerate(mask) if keep]
+        return type(self)([self.ids[i] for i in rows], [self.records[i] for i in rows],
+                          *(array('d', (getattr(self, name)[i] for i in rows)) for name in COLUMNS))
+
+    ##############  Geo   ##############
+    def distance(self, latitude, longitude):
+        """
+        Haversine distance in meters from one or many points to every friend.
+
+        Args:
+            latitude: Latitude in degrees, or a sequence of m latitudes
+            longitude: Longitude in degrees, or a sequence of m longitudes
+
+        Returns:
+            Array of len(self) distances, or an (m, len(self)) array for many
+            points (a list of arrays without NumPy)
+        """
+        if np is not None:
+            lat1, lon1 = _points(latitude, longitude)
+            phi1, phi2 = np.radians(lat1), np.radians(self.latitude)
+            a = np.sin((phi2 - phi1) / 2) ** 2 + \
+                np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(self.longitude - lon1) / 2) ** 2
+            out = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+            return out if np.ndim(latitude) else out[0]
+        return self._pure(_haversine, latitude, longitude)
+
+    def bearing(self, latitude, longitude):
+        """
+        Initial bearing in degrees (0-360) from one or many points to every friend.
+
+        Args:
+            latitude: Latitude in degrees, or a sequence of m latitudes
+            longitude: Longitude in degrees, or a sequence of m longitudes
+
+        Returns:
+            Array of len(self) bearings, or an (m, len(self)) array for many
+            points (a list of arrays without NumPy)
+        """
+        if np is not None:
+            lat1, lon1 = _points(latitude, longitude)
+            phi1, phi2 = np.radians(lat1), np.radians(self.latitude)
+            dlon = np.radians(self.longitude - lon1)
+            y = np.sin(dlon) * np.cos(phi2)
+            x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlon)
+            out = (np.degrees(np.arctan2(y, x)) + 360.0) % 360.0
+            return out if np.ndim(latitude) else out[0]
+        return self._pure(_bearing, latitude, longitude)
+
+    def within(self, latitude: float, longitude: float, radius: float) -> 'LocationTable':
+        """Friends within ``radius`` meters of a point"""
+        distances = self.distance(latitude, longitude)
+        if np is not None:
+            return self.filter(distances <= radius)
+        return self.filter([d <= radius for d in distances])
+
+    def _pure(self, func, latitude, longitude):
+        if isinstance(latitude, (int, float)):
+            return array('d', map(func, [latitude] * len(self), [longitude] * len(self),
+                                  self.latitude, self.longitude))
+        return [self._pure(func, lat, lon) for lat, lon in zip(latitude, longitude)]
+
+
+def _points(latitude, longitude):
+    """Query points as (m, 1) columns so they broadcast against the friend rows"""
+    return (np.asarray(latitude, dtype=np.float64).reshape(-1, 1),
+            np.asarray(longitude, dtype=np.float64).reshape(-1, 1))
+
@@ -0,0 +1,105 @@
+"""On-disk access token cache shared between processes."""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+DEFAULT_TOKEN_PATH = os.path.join(os.path.expanduser('~'), '.whoopy', 'tokens.json')
+
+
+class TokenStore:
+    """
+    JSON file of access tokens keyed by login email.
+
+    Writes go to a temporary file that is atomically renamed over the store,
+    so readers never see a partial file. Read-modify-write cycles hold an
+    exclusive ``flock`` on a sidecar lock file, so several processes can log
+    in concurrently without losing each other's tokens.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize TokenStore.
+
+        Args:
+            path: Store file path (default: ~/.whoopy/tokens.json)
+        """
+        self.path = path or DEFAULT_TOKEN_PATH
+        self.lock_path = self.path + '.lock'
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """Hold an inter-process lock on the store."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+        with open(self.lock_path, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, tokens: dict) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tokens-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                json.dump(tokens, fh)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def get(self, email: str) -> Optional[str]:
+        """
+        Get the cached access token for an email.
+
+        Args:
+            email: Login email address
+
+        Returns:
+            Access token, or None if not cached
+        """
+        with self._locked(exclusive=False):
+            return self._read().get(email)
+
+    def set(self, email: str, access_token: str) -> None:
+        """
+        Cache an access token for an email.
+
+        Args:
+            email: Login email address
+            access_token: Access token to store
+        """
+        with self._locked(exclusive=True):
+            tokens = self._read()
+            tokens[email] = access_token
+            self._write(tokens)
+
+    def delete(self, email: str) -> None:
+        """
+        Remove the cached access token for an email.
+
+        Args:
+            email: Login email address
+        """
+        with self._locked(exclusive=True):
+            tokens = self._read()
+            if tokens.pop(email, None) is not None:
+                self._write(tokens)
@@ -0,0 +1,160 @@
+"""Incremental friend location feed built on top of get_locations."""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, Union
+
+from .geo import haversine
+from .models import FriendLocation
+
+
+def _user_id(loc) -> Any:
+    if isinstance(loc, FriendLocation):
+        return loc.user.id
+    return loc['user']['id']
+
+
+def _coordinates(loc) -> Tuple[float, float]:
+    if isinstance(loc, FriendLocation):
+        return loc.latitude, loc.longitude
+    return float(loc['latitude']), float(loc['longitude'])
+
+
+def _battery_level(loc) -> Optional[float]:
+    """Battery level of a location record, flat or nested under ``battery``."""
+    if isinstance(loc, FriendLocation):
+        return loc.battery.level if loc.battery is not None else None
+    level = loc.get('battery_level')
+    if level is None and isinstance(loc.get('battery'), Mapping):
+        level = loc['battery'].get('level')
+    # Numbers may arrive as strings, as with coordinates
+    return float(level) if level is not None else None
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds of a numeric or ISO 8601 timestamp."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+@dataclass
+class LocationDelta:
+    """Changes between two polls, keyed by user id"""
+    added: Dict[Any, Dict] = field(default_factory=dict)
+    changed: Dict[Any, Dict] = field(default_factory=dict)
+    removed: Dict[Any, Dict] = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def __len__(self):
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+
+class LocationTracker:
+    """
+    Keep the last reported location of every friend and emit only changes.
+
+    A friend counts as changed when they moved at least ``distance`` meters,
+    their battery level moved by at least ``battery``, or their timestamp
+    advanced by at least ``interval`` seconds since the last *reported*
+    record, so slow drift still gets reported once it adds up.
+    """
+
+    timestamp_key = 'updated_at'
+
+    def __init__(self, client=None, distance: float = 10.0, battery: Optional[float] = None,
+                 interval: Optional[float] = None):
+        """
+        Initialize LocationTracker.
+
+        Args:
+            client: Whoopy instance used by poll() (optional)
+            distance: Minimum movement in meters to report (default: 10.0)
+            battery: Minimum battery level change to report (default: ignore battery)
+            interval: Minimum timestamp advance in seconds to report (default: ignore timestamps)
+        """
+        self.client = client
+        self.distance = distance
+        self.battery = battery
+        self.interval = interval
+        self.snapshot: Dict[Any, Dict] = {}
+
+    def poll(self) -> LocationDelta:
+        """
+        Fetch friends' locations with the client and return what changed.
+
+        Returns:
+            LocationDelta since the previous poll
+        """
+        if self.client is None:
+            raise ValueError("LocationTracker.poll() requires a client")
+        return self.update(self.client.get_locations())
+
+    def update(self, locations: Union[Mapping[str, Dict], Iterable[Dict]]) -> LocationDelta:
+        """
+        Feed a new snapshot and return what changed.
+
+        Args:
+            locations: get_locations() result (keyed by username), raw
+                ``api/locations`` records or FriendLocation models
+
+        Returns:
+            LocationDelta since the previous snapshot
+        """
+        if isinstance(locations, Mapping):
+            locations = locations.values()
+
+        delta = LocationDelta()
+        previous = self.snapshot
+        current = {}
+        for loc in locations:
+            user_id = _user_id(loc)
+            last = previous.get(user_id)
+            if last is None:
+                delta.added[user_id] = loc
+            elif self._changed(last, loc):
+                delta.changed[user_id] = loc
+            else:
+                # Keep the last reported record as the baseline
+                current[user_id] = last
+                continue
+            current[user_id] = loc
+
+        for user_id, loc in previous.items():
+            if user_id not in current:
+                delta.removed[user_id] = loc
+
+        self.snapshot = current
+        return delta
+
+    def _changed(self, last: Mapping, loc: Mapping) -> bool:
+        moved = haversine(*_coordinates(last), *_coordinates(loc))
+        if moved > 0 and moved >= self.distance:
+            return True
+
+        if self.battery is not None:
+            before, after = _battery_level(last), _battery_level(loc)
+            if before is not None and after is not None and abs(after - before) >= self.battery:
+                return True
+
+        if self.interval is not None:
+            before, after = self._timestamp(last), self._timestamp(loc)
+            if before is not None and after is not None and after - before >= self.interval:
+                return True
+
+        return False
+
+    def _timestamp(self, loc) -> Optional[float]:
+        if isinstance(loc, FriendLocation):
+            return _timestamp(loc.updated_at)
+        return _timestamp(loc.get(self.timestamp_key))
+
+    def reset(self) -> None:
+        """Forget the snapshot so the next update reports everyone as added."""
+        self.snapshot = {}
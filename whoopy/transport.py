@@ -0,0 +1,328 @@
+"""Pluggable HTTP transports: requests, urllib3, and httpx (HTTP/1.1 or HTTP/2)."""
+import json as _json
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+from urllib.parse import urlencode
+
+from .exceptions import ConnectTimeoutError, TransportError
+
+
+DEFAULT_TRANSPORT = 'requests'
+
+# What was sent; read by Metrics for byte counts
+SentRequest = namedtuple('SentRequest', ['method', 'url', 'body'])
+
+
+class Response:
+    """
+    Backend-neutral response exposing the parts of ``requests.Response``
+    that Whoopy uses (status_code, headers, content, text, json(),
+    iter_content(), close()).
+    """
+
+    def __init__(self, status_code: int, headers, url: str, request: SentRequest,
+                 read: Callable[[], bytes], iter_chunks: Callable[[int], Iterator[bytes]],
+                 close: Callable[[], None]):
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.request = request
+        self._read = read
+        self._iter_chunks = iter_chunks
+        self._close = close
+        self._content: Optional[bytes] = None
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = self._read()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        content_type = self.headers.get('Content-Type', '')
+        charset = content_type.partition('charset=')[2].split(';')[0].strip() or 'utf-8'
+        return self.content.decode(charset, errors='replace')
+
+    def json(self) -> Any:
+        return _json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        if self._content is not None:
+            content = self._content
+            for start in range(0, len(content), chunk_size):
+                yield content[start:start + chunk_size]
+            return
+        yield from self._iter_chunks(chunk_size)
+
+    def close(self) -> None:
+        self._close()
+
+    def __repr__(self):
+        return f'<Response [{self.status_code}]>'
+
+
+def _encode_body(data, json, headers: Dict[str, str]) -> Optional[bytes]:
+    """Form- or JSON-encode a request body the way requests does"""
+    if json is not None:
+        headers.setdefault('Content-Type', 'application/json')
+        return _json.dumps(json).encode()
+    if isinstance(data, dict):
+        headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+        # requests leaves out fields whose value is None
+        return urlencode({key: value for key, value in data.items() if value is not None}, doseq=True).encode()
+    if isinstance(data, str):
+        return data.encode()
+    return data
+
+
+class Transport:
+    """
+    Interface between HTTPClient and an HTTP library.
+
+    Transports keep no default headers: HTTPClient passes the complete set
+    with every request, so one transport can be shared by many threads.
+    request() must not retry on its own and must raise TransportError, or
+    ConnectTimeoutError when connecting timed out, instead of library exceptions.
+    """
+
+    name = ''
+
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None, data=None,
+                json=None, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+                stream: bool = False):
+        """
+        Send one request.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            params: Query parameters (optional)
+            data: Form dict or raw body (optional)
+            json: JSON body (optional)
+            headers: Every header to send (optional; must not be modified)
+            timeout: Seconds for connecting and for each read (default: self.timeout)
+            stream: Leave the body unread until content/iter_content() is used
+
+        Returns:
+            Response (requests.Response for unstreamed requests on the requests backend)
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Close pooled connections"""
+
+
+class RequestsTransport(Transport):
+    """requests.Session with a sized connection pool (HTTP/1.1)"""
+
+    name = 'requests'
+
+    def __init__(self, timeout: float = 30, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False):
+        # Imported here so that ``import whoopy`` stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        super().__init__(timeout)
+        self.session = requests.Session()
+        # Only the headers passed to request() are sent
+        self.session.headers.clear()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None,
+                timeout=None, stream=False):
+        from requests.exceptions import ConnectTimeout, RequestException
+
+        try:
+            response = self.session.request(method, url, params=params, data=data, json=json,
+                                            headers=headers, stream=stream,
+                                            timeout=self.timeout if timeout is None else timeout)
+        except ConnectTimeout as err:
+            raise ConnectTimeoutError(f"Request failed: {err}") from err
+        except RequestException as err:
+            raise TransportError(f"Request failed: {err}") from err
+        if not stream:
+            return response
+
+        # The body is read later, so its errors need wrapping too
+        def read():
+            try:
+                return response.content
+            except RequestException as err:
+                raise TransportError(f"Request failed: {err}") from err
+
+        def iter_chunks(chunk_size):
+            try:
+                yield from response.iter_content(chunk_size)
+            except RequestException as err:
+                raise TransportError(f"Request failed: {err}") from err
+
+        return Response(response.status_code, response.headers, response.url,
+                        SentRequest(method, response.request.url, response.request.body),
+                        read, iter_chunks, response.close)
+
+    def close(self):
+        self.session.close()
+
+
+class Urllib3Transport(Transport):
+    """urllib3.PoolManager without the requests layer on top (HTTP/1.1)"""
+
+    name = 'urllib3'
+
+    def __init__(self, timeout: float = 30, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False):
+        import urllib3
+
+        super().__init__(timeout)
+        self._urllib3 = urllib3
+        self.pool = urllib3.PoolManager(num_pools=pool_connections, maxsize=pool_maxsize,
+                                        block=pool_block, retries=False)
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None,
+                timeout=None, stream=False):
+        urllib3 = self._urllib3
+        if params:
+            url += ('&' if '?' in url else '?') + urlencode(params)
+        merged = dict(headers or {})
+        body = _encode_body(data, json, merged)
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            raw = self.pool.request(method, url, body=body, headers=merged,
+                                    timeout=urllib3.Timeout(connect=timeout, read=timeout),
+                                    preload_content=not stream, redirect=True)
+        except urllib3.exceptions.ConnectTimeoutError as err:
+            raise ConnectTimeoutError(f"Request failed: {err}") from err
+        except urllib3.exceptions.HTTPError as err:
+            raise TransportError(f"Request failed: {err}") from err
+
+        def read():
+            try:
+                return raw.data
+            except urllib3.exceptions.HTTPError as err:
+                raise TransportError(f"Request failed: {err}") from err
+            finally:
+                raw.release_conn()
+
+        def iter_chunks(chunk_size):
+            try:
+                yield from raw.stream(chunk_size)
+            except urllib3.exceptions.HTTPError as err:
+                raise TransportError(f"Request failed: {err}") from err
+            finally:
+                raw.release_conn()
+
+        def close():
+            # Closes the connection only if it still holds an unread body
+            raw.close()
+            raw.release_conn()
+
+        return Response(raw.status, raw.headers, url, SentRequest(method, url, body),
+                        read, iter_chunks, close)
+
+    def close(self):
+        self.pool.clear()
+
+
+class HttpxTransport(Transport):
+    """
+    httpx.Client, optionally speaking HTTP/2.
+
+    With HTTP/2, concurrent calls from several threads (e.g. get_user's
+    friend pages) are multiplexed as streams over one connection per host
+    instead of each taking a pooled connection. ``http1=False`` connects
+    with HTTP/2 prior knowledge, which also works over plain http://.
+    """
+
+    name = 'httpx'
+
+    def __init__(self, timeout: float = 30, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False, http2: bool = True, http1: bool = True):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("HttpxTransport requires httpx: pip install 'whoopy[http2]'") from None
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ImportError("HTTP/2 requires h2: pip install 'whoopy[http2]'") from None
+
+        super().__init__(timeout)
+        self._httpx = httpx
+        # httpx keeps one pool for all hosts, so pool_connections does not apply
+        limits = httpx.Limits(max_connections=pool_maxsize if pool_block else None,
+                              max_keepalive_connections=pool_maxsize)
+        self.client = httpx.Client(http1=http1, http2=http2, limits=limits, timeout=timeout,
+                                   follow_redirects=True)
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None,
+                timeout=None, stream=False):
+        httpx = self._httpx
+        merged = dict(headers or {})
+        body = _encode_body(data, json, merged)
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            request = self.client.build_request(method, url, params=params, content=body,
+                                                headers=merged, timeout=timeout)
+            raw = self.client.send(request, stream=stream)
+        except httpx.ConnectTimeout as err:
+            raise ConnectTimeoutError(f"Request failed: {err}") from err
+        except httpx.HTTPError as err:
+            raise TransportError(f"Request failed: {err}") from err
+
+        def read():
+            try:
+                return raw.read()
+            except httpx.HTTPError as err:
+                raise TransportError(f"Request failed: {err}") from err
+
+        def iter_chunks(chunk_size):
+            try:
+                yield from raw.iter_bytes(chunk_size)
+            except httpx.HTTPError as err:
+                raise TransportError(f"Request failed: {err}") from err
+
+        return Response(raw.status_code, raw.headers, str(raw.url), SentRequest(method, url, body),
+                        read, iter_chunks, raw.close)
+
+    def close(self):
+        self.client.close()
+
+
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'urllib3': Urllib3Transport,
+    'httpx': lambda **options: HttpxTransport(http2=False, **options),
+    'http2': HttpxTransport,
+}
+
+
+def make_transport(transport: Union[str, Transport, None] = DEFAULT_TRANSPORT, **options) -> Transport:
+    """
+    Build a transport by name, or return a Transport instance unchanged.
+
+    Args:
+        transport: 'requests', 'urllib3', 'httpx' (HTTP/1.1), 'http2' (httpx with
+            HTTP/2) or a Transport instance
+        **options: timeout, pool_connections, pool_maxsize, pool_block
+
+    Returns:
+        Transport
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if isinstance(transport, Transport):
+        return transport
+    factory = TRANSPORTS.get(transport or DEFAULT_TRANSPORT)
+    if factory is None:
+        raise ValueError(f"Unknown transport '{transport}'")
+    return factory(**options)
@@ -1,19 +1,28 @@
 """User management for Whoopy API."""
-from typing import Any
+from itertools import islice
+from typing import Any, Iterator, Optional, Union
+from .enums import DEFAULT_BASE_URL
+from .search import iter_matches, search_params
+from .transport import DEFAULT_TRANSPORT, Transport
 from .utils import HTTPClient
 
 
 class User:
     """Handle user-related API operations."""
 
-    def __init__(self, headers: dict):
+    def __init__(self, headers: dict, client: Optional[HTTPClient] = None,
+                 base_url: str = DEFAULT_BASE_URL, transport: Union[str, Transport] = DEFAULT_TRANSPORT):
         """
         Initialize User instance.
 
         Args:
             headers: HTTP headers for API requests
+            client: Shared HTTP client to reuse pooled connections (optional)
+            base_url: API base URL (default: https://www.wh00.ooo/)
+            transport: HTTP backend when no client is given (default: 'requests')
         """
-        self.client = HTTPClient(headers)
+        self.client = client if client is not None else HTTPClient(headers, transport=transport)
+        self.base = base_url
 
     def find_user(self, user_name: str) -> dict[str, Any]:
         """
@@ -28,16 +37,38 @@ class User:
         Raises:
             ValueError: If no user found with the given name
         """
-        params = {
-            "display_name": user_name
-        }
-        response = self.client.get(
-            'https://www.wh00.ooo/api/friends/search',
-            params=params
-        )
-        data = response.json()
-        friends = data.get("friends")
+        friends = self._search_page(user_name, None).get("friends")
         if not isinstance(friends, list) or len(friends) == 0:
             raise ValueError(f"No user found with name '{user_name}'.")
         return friends[0]
 
+    def search_users(self, user_name: str) -> Iterator[dict[str, Any]]:
+        """
+        Iterate over every user matching a display name, fetching result pages as needed.
+
+        Args:
+            user_name: Display name to search for
+
+        Yields:
+            User information dictionaries, in result order
+        """
+        yield from iter_matches(lambda page: self._search_page(user_name, page))
+
+    def find_users(self, user_name: str, limit: Optional[int] = None) -> list[dict[str, Any]]:
+        """
+        Find every user matching a display name.
+
+        Args:
+            user_name: Display name to search for
+            limit: Stop after this many matches (optional)
+
+        Returns:
+            List of user information dictionaries (empty if none)
+        """
+        return list(islice(self.search_users(user_name), limit))
+
+    def _search_page(self, user_name: str, page: Optional[int]) -> dict[str, Any]:
+        """GET one page of api/friends/search."""
+        response = self.client.get(f'{self.base}api/friends/search', params=search_params(user_name, page))
+        return response.json()
+
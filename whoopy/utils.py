@@ -1,59 +1,295 @@
 """Utility functions for HTTP requests and error handling."""
-import requests
-from requests.exceptions import HTTPError, RequestException
-from typing import Any, Optional
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Mapping, Optional, Union
+
+from .exceptions import ConnectTimeoutError, RequestError, TransportError, WhoopyError
+from .retry import CircuitBreakers, RetryPolicy, endpoint_key, parse_retry_after
+from .singleflight import SingleFlight
+from .transport import DEFAULT_TRANSPORT, Transport, make_transport
+
+if TYPE_CHECKING:
+    import requests
+
+    from .metrics import Metrics, RequestEvent
+    from .scheduler import RequestScheduler
+
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def _frozen(mapping) -> Optional[tuple]:
+    """Hashable form of a params/headers dict for single-flight keys"""
+    if not mapping:
+        return None
+    items = mapping.items() if hasattr(mapping, 'items') else mapping
+    return tuple(sorted((str(key), str(value)) for key, value in items))
+
+
+class Headers(MutableMapping):
+    """
+    Case-insensitive default headers with copy-on-write updates.
+
+    Every change swaps in a new dict instead of editing the current one, so
+    a request that took snapshot() sends a consistent set of headers even
+    while another thread replaces the Authorization header.
+    """
+
+    def __init__(self, headers: Optional[Mapping[str, str]] = None):
+        self._lock = threading.Lock()
+        # (lowercase name -> (name, value), name -> value); replaced, never mutated
+        self._state = ({}, {})
+        if headers:
+            self.update(headers)
+
+    def _replace(self, items: Dict[str, tuple]) -> None:
+        self._state = (items, {name: value for name, value in items.values()})
+
+    def __getitem__(self, name: str) -> str:
+        return self._state[0][name.lower()][1]
+
+    def __setitem__(self, name: str, value: str) -> None:
+        with self._lock:
+            items = dict(self._state[0])
+            items[name.lower()] = (name, value)
+            self._replace(items)
+
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            items = dict(self._state[0])
+            del items[name.lower()]
+            self._replace(items)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._state[1])
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def __repr__(self):
+        return f'Headers({self._state[1]!r})'
+
+    def snapshot(self) -> Dict[str, str]:
+        """Current headers as a dict that later changes do not affect (do not modify it)."""
+        return self._state[1]
+
+    def merged(self, extra: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+        """
+        Snapshot with per-request headers applied on top.
+
+        Args:
+            extra: Headers for one request (optional)
+
+        Returns:
+            Dict of every header to send
+        """
+        items, snapshot = self._state
+        if not extra:
+            return snapshot
+        merged = dict(snapshot)
+        for name, value in extra.items():
+            # Drop the default spelled differently so the override replaces it
+            default = items.get(name.lower())
+            if default is not None and default[0] != name:
+                del merged[default[0]]
+            merged[name] = value
+        return merged
 
 
 class HTTPClient:
     """HTTP client with common error handling and timeout configuration."""
 
-    def __init__(self, headers: dict, timeout: int = 30):
+    def __init__(
+        self,
+        headers: dict,
+        timeout: int = 30,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        retry: Optional[RetryPolicy] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        metrics: Optional['Metrics'] = None,
+        transport: Union[str, Transport] = DEFAULT_TRANSPORT,
+        single_flight: Optional[SingleFlight] = None,
+        scheduler: Optional['RequestScheduler'] = None
+    ):
         """
         Initialize HTTP client.
 
         Args:
             headers: HTTP headers for requests
             timeout: Request timeout in seconds (default: 30)
+            pool_connections: Number of per-host connection pools to keep (default: 10)
+            pool_maxsize: Maximum connections kept alive per host (default: 10)
+            pool_block: Block when the per-host pool is exhausted instead of
+                opening a throwaway connection (default: False)
+            keep_alive: Reuse connections between requests (default: True)
+            retry: Retry policy (default: RetryPolicy(); pass False to disable)
+            breakers: Per-endpoint circuit breakers (default: CircuitBreakers();
+                pass False to disable)
+            metrics: Metrics recording every request (optional)
+            transport: 'requests', 'urllib3', 'httpx', 'http2' or a Transport
+                instance (default: 'requests')
+            single_flight: Share one in-flight call between concurrent identical
+                GETs (optional)
+            scheduler: Rate-limit and prioritize requests (optional)
         """
-        self.session = requests.Session()
-        self.session.headers.update(headers)
+        self.transport = make_transport(transport, timeout=timeout, pool_connections=pool_connections,
+                                        pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self._headers = Headers(headers)
+        if not keep_alive:
+            self._headers['Connection'] = 'close'
         self.timeout = timeout
+        self.retry = RetryPolicy() if retry is None else retry or None
+        self.breakers = CircuitBreakers() if breakers is None else breakers or None
+        self.metrics = metrics
+        self.single_flight = single_flight
+        self.scheduler = scheduler
+
+    @property
+    def headers(self) -> Headers:
+        """Headers sent with every request (shared; safe to change from any thread)."""
+        return self._headers
 
-    def _handle_request(self, method: str, url: str, **kwargs) -> requests.Response:
+    def request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                **kwargs) -> 'requests.Response':
         """
-        Execute HTTP request with error handling.
+        Execute HTTP request on the pooled transport without status checking.
+
+        Transient failures are retried according to the retry policy and
+        each endpoint is guarded by a circuit breaker. A retryable status
+        that is still failing after the last retry is returned as is.
+
+        With single flight enabled, a GET identical (URL, params, headers) to
+        one already in flight waits for it and gets the same response or error.
+        With a scheduler, the request first waits for its turn (retries are
+        not rescheduled).
 
         Args:
             method: HTTP method (GET, POST, PATCH, etc.)
             url: Request URL
-            **kwargs: Additional arguments for requests
+            idempotent: Whether the request is safe to repeat (default: by method)
+            **kwargs: params, data, json, headers, timeout or stream
 
         Returns:
             Response object
 
         Raises:
-            Exception: If request fails
+            TransportError: If the request could not be completed
+            CircuitOpenError: If the endpoint's circuit is open
+            QueueFullError: If the scheduler shed the request
         """
-        kwargs.setdefault('timeout', self.timeout)
+        single_flight = self.single_flight
+        if single_flight is not None and method == 'GET' and not kwargs.get('stream'):
+            key = (url, _frozen(kwargs.get('params')), _frozen(kwargs.get('headers')))
+            return single_flight.do(key, lambda: self._measured(method, url, idempotent, **kwargs))
+        return self._measured(method, url, idempotent, **kwargs)
 
+    def _measured(self, method: str, url: str, idempotent: Optional[bool],
+                  **kwargs) -> 'requests.Response':
+        """Send through the retry loop once scheduled, recording metrics when configured"""
+        if self.scheduler is not None:
+            self.scheduler.acquire(method, url)
+        metrics = self.metrics
+        if metrics is None:
+            return self._send(method, url, idempotent, None, **kwargs)
+
+        event = metrics.request_started(method, url)
         try:
-            response = self.session.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response
-        except HTTPError as http_err:
-            status_code = http_err.response.status_code if http_err.response else 'N/A'
-            raise Exception(f"[{status_code}] HTTP error: {http_err}") from http_err
-        except RequestException as req_err:
-            raise Exception(f"Request failed: {req_err}") from req_err
-
-    def get(self, url: str, **kwargs) -> requests.Response:
+            response = self._send(method, url, idempotent, event, **kwargs)
+        except WhoopyError as err:
+            metrics.request_finished(event, error=err)
+            raise
+        metrics.request_finished(event, response, streamed=kwargs.get('stream', False))
+        return response
+
+    def _send(self, method: str, url: str, idempotent: Optional[bool],
+              event: Optional['RequestEvent'], **kwargs) -> 'requests.Response':
+        """Retry loop behind request(); counts retries on ``event`` if given."""
+        kwargs.setdefault('timeout', self.timeout)
+        # One snapshot for every attempt, taken once so a concurrent token swap
+        # cannot mix old and new headers within a request
+        kwargs['headers'] = self._headers.merged(kwargs.get('headers'))
+        retry = self.retry
+        breaker = self.breakers.get(endpoint_key(method, url)) if self.breakers is not None else None
+        if idempotent is None:
+            idempotent = retry is not None and retry.is_idempotent(method)
+
+        if breaker is not None:
+            breaker.before_request()
+
+        attempt = 0
+        while True:
+            try:
+                response = self.transport.request(method, url, **kwargs)
+            except TransportError as err:
+                # Connect timeouts never reached the server, so any method may retry
+                retryable = idempotent or isinstance(err, ConnectTimeoutError)
+                delay = retry.delay(attempt) if retry is not None and retryable else None
+                if delay is None or attempt >= retry.max_retries:
+                    if breaker is not None:
+                        breaker.record_failure()
+                    raise
+            else:
+                status = response.status_code
+                delay = None
+                if retry is not None and attempt < retry.max_retries \
+                        and retry.should_retry_status(status, idempotent):
+                    delay = retry.delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+                if delay is None:
+                    if breaker is not None:
+                        if status >= 500:
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                    return response
+                response.close()
+
+            time.sleep(delay)
+            attempt += 1
+            if event is not None:
+                event.retries = attempt
+
+    def _handle_request(self, method: str, url: str, **kwargs) -> 'requests.Response':
+        """
+        Execute HTTP request with error handling.
+
+        Args:
+            method: HTTP method (GET, POST, PATCH, etc.)
+            url: Request URL
+            **kwargs: params, data, json, headers, timeout or stream
+
+        Returns:
+            Response object
+
+        Raises:
+            RequestError: If the server answers with an error status
+            TransportError: If the request could not be completed
+        """
+        response = self.request(method, url, **kwargs)
+        if response.status_code >= 400:
+            raise RequestError.from_response(response, f'{method} {url}')
+        return response
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
         """Execute GET request."""
         return self._handle_request('GET', url, **kwargs)
 
-    def patch(self, url: str, **kwargs) -> requests.Response:
+    def patch(self, url: str, **kwargs) -> 'requests.Response':
         """Execute PATCH request."""
         return self._handle_request('PATCH', url, **kwargs)
 
-    def post(self, url: str, **kwargs) -> requests.Response:
+    def post(self, url: str, **kwargs) -> 'requests.Response':
         """Execute POST request."""
         return self._handle_request('POST', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> 'requests.Response':
+        """Execute DELETE request."""
+        return self._handle_request('DELETE', url, **kwargs)
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.transport.close()